@@ -1,54 +1,199 @@
 import os
 from langchain_core.messages import convert_to_messages
 from langchain_core.tools import tool
-from langchain_groq import ChatGroq
-from langchain_tavily import TavilySearch
-from langgraph.prebuilt import create_react_agent
-from langgraph_supervisor import create_supervisor
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_cohere import ChatCohere
 from langsmith import traceable
 from dotenv import load_dotenv
 import time
+import shlex
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
 import traceback
-from e2b_code_interpreter import Sandbox
+from dep_cache import PLATFORM_COMMAND, DependencyCache, dependency_key, local_platform
+from local_executor import LocalExecutor
+from compaction import HistoryCompactor
+from disk_cache import DiskCache
+from search_cache import CachedSearch, create_web_search_tool
+from tracing import Tracer, annotate_span, serve_metrics
+from checkpoints import CompactSqliteSaver
+from file_edits import EditError, apply_search_replace, apply_unified_diff, atomic_write, read_range
+from llm_cache import LLMCache
+from prevalidate import validate_code
+from test_runner import run_tests
+from tool_output import LogArtifacts, StreamCapture, bound_text, finish_captures
+from rate_limit import get_limiter
+from sandbox_pool import SandboxPool, E2BSandboxBackend, LocalSandboxBackend
+from workspaces import ArtifactStore, WorkspaceError, Workspaces, detach, resolve_in_workspace
+
+# Provider SDKs, LangGraph's prebuilt agents and the pipeline are imported inside the
+# factories below: importing this module stays cheap and nothing is built until used.
 
 load_dotenv()
 
-# --- Environment Keys ---
-tavily_api_key = os.getenv("TAVILY_API_KEY")
-groq_api_key = os.getenv("GROQ_API_KEY")
-google_api_key = os.getenv("GOOGLE_API_KEY")
-e2b_api_key = os.getenv("E2B_API_KEY")
-cohere_api_key = os.getenv("COHERE_API_KEY")
+# --- Configuration ---
+@dataclass(frozen=True)
+class AgentConfig:
+    """API keys the agent team is built with. Every distinct config gets its own cached components."""
+    tavily_api_key: str = None
+    groq_api_key: str = None
+    google_api_key: str = None
+    e2b_api_key: str = None
+    cohere_api_key: str = None
+
+    @classmethod
+    def from_env(cls) -> "AgentConfig":
+        return cls(
+            tavily_api_key=os.getenv("TAVILY_API_KEY"),
+            groq_api_key=os.getenv("GROQ_API_KEY"),
+            google_api_key=os.getenv("GOOGLE_API_KEY"),
+            e2b_api_key=os.getenv("E2B_API_KEY"),
+            cohere_api_key=os.getenv("COHERE_API_KEY"),
+        )
+
+# ORCHESTRATION_MODE=parallel makes the entry points use the DAG instead of the supervisor.
+orchestration_mode = os.getenv("ORCHESTRATION_MODE", "supervisor")
+
+# --- Execution Infrastructure ---
+@lru_cache(maxsize=None)
+def get_sandbox_pool(e2b_api_key: str = None) -> SandboxPool:
+    """
+    Warm sandboxes shared by every run_python_code call, so debug retries skip the cold start.
+    SANDBOX_BACKEND=local swaps E2B for a temporary-directory stand-in (tests / offline use).
+    """
+    backend = LocalSandboxBackend() if os.getenv("SANDBOX_BACKEND") == "local" else E2BSandboxBackend(api_key=e2b_api_key)
+    return SandboxPool(
+        backend,
+        min_size=int(os.getenv("SANDBOX_POOL_MIN", "1")),
+        max_size=int(os.getenv("SANDBOX_POOL_MAX", "4")),
+        idle_timeout=float(os.getenv("SANDBOX_POOL_IDLE_TIMEOUT", "300")),
+    )
+
+@lru_cache(maxsize=None)
+def get_dep_cache() -> DependencyCache:
+    """Wheel sets keyed by the normalized dependency list, so repeat runs install offline or not at all."""
+    return DependencyCache(
+        root=os.getenv("DEP_CACHE_DIR", ".cache/deps"),
+        max_bytes=int(os.getenv("DEP_CACHE_MAX_MB", "2048")) * 1024 * 1024,
+        max_entries=int(os.getenv("DEP_CACHE_MAX_ENTRIES", "1000")),
+        wheelhouse=os.getenv("DEP_WHEELHOUSE"),
+        offline=os.getenv("DEP_CACHE_OFFLINE") == "1",
+    )
+
+@lru_cache(maxsize=None)
+def get_log_artifacts() -> LogArtifacts:
+    """Full output of run_python_code calls that was too long to return, readable with read_tool_log."""
+    return LogArtifacts(
+        root=os.getenv("TOOL_LOG_DIR", ".cache/tool_logs"),
+        max_bytes=int(os.getenv("TOOL_LOG_MAX_MB", "256")) * 1024 * 1024,
+    )
+
+# Characters of each output stream run_python_code returns: the start and the end.
+TOOL_OUTPUT_HEAD_CHARS = int(os.getenv("TOOL_OUTPUT_HEAD_CHARS", "2000"))
+TOOL_OUTPUT_TAIL_CHARS = int(os.getenv("TOOL_OUTPUT_TAIL_CHARS", "4000"))
+
+@lru_cache(maxsize=None)
+def get_local_executor():
+    """EXECUTION_BACKEND=local runs code in local subprocesses instead of E2B (offline / CI use)."""
+    if os.getenv("EXECUTION_BACKEND", "e2b") != "local":
+        return None
+    return LocalExecutor(
+        get_dep_cache(),
+        max_workers=int(os.getenv("LOCAL_EXEC_WORKERS", str(os.cpu_count() or 4))),
+        cpu_time_s=int(os.getenv("LOCAL_EXEC_CPU_S", "60")),
+        memory_mb=int(os.getenv("LOCAL_EXEC_MEMORY_MB", "2048")),
+        wall_clock_s=float(os.getenv("LOCAL_EXEC_TIMEOUT_S", "120")),
+        artifacts=get_log_artifacts(),
+        head_chars=TOOL_OUTPUT_HEAD_CHARS,
+        tail_chars=TOOL_OUTPUT_TAIL_CHARS,
+    )
 
 # --- Tools (Now decorated with @tool) ---
-web_search = TavilySearch(api_key=tavily_api_key, max_results=3)
-
-
+# web_search goes through CachedSearch (see search_cache.py): near-identical queries are
+# answered from a disk-backed TTL cache and concurrent identical queries share one call.
+# SEARCH_CACHE=0 turns the cache off; SEARCH_BACKEND=fake searches offline.
+@lru_cache(maxsize=None)
+def get_search_cache(tavily_api_key: str = None) -> CachedSearch:
+    if os.getenv("SEARCH_BACKEND", "tavily") == "fake":
+        from fakes import FakeSearch
+        backend = FakeSearch()
+    else:
+        from langchain_tavily import TavilySearch
+        backend = TavilySearch(api_key=tavily_api_key, max_results=3)
+    store = None
+    if os.getenv("SEARCH_CACHE", "1") != "0":
+        store = DiskCache(
+            os.getenv("SEARCH_CACHE_PATH", ".cache/search_cache.sqlite"),
+            ttl_s=float(os.getenv("SEARCH_CACHE_TTL_S", str(24 * 3600))),
+            max_bytes=int(os.getenv("SEARCH_CACHE_MAX_MB", "64")) * 1024 * 1024,
+        )
+    return CachedSearch(backend, store)
+
+@lru_cache(maxsize=None)
+def get_web_search(tavily_api_key: str = None):
+    return create_web_search_tool(get_search_cache(tavily_api_key))
+
+
+# Directory that agents' 'output/...' paths point to. The UI and batch jobs set it per
+# run so concurrent runs each write into their own workspace (see workspaces.py).
+output_root = ContextVar("output_root", default="output")
+
+def resolve_output_path(filepath: str) -> str:
+    """
+    Maps an 'output/...' path onto the current run's output directory.
 
+    Raises:
+        WorkspaceError: If the path points outside that directory.
+    """
+    return resolve_in_workspace(output_root.get(), filepath)
 
 @tool
-def manage_file(filepath: str, mode: str, content: str = None) -> str:
+def manage_file(filepath: str, mode: str, content: str = None, edits: list[dict] = None,
+                offset: int = None, limit: int = None) -> str:
     """
-    Manages file operations: read, write, or append.
+    Manages file operations: read, write, append, edit, or patch.
+
+    Prefer 'edit' (or 'patch') to change a file that already exists: only the changed
+    parts are sent instead of the whole file.
 
     Args:
         filepath: The full path to the file.
-        mode: The operation to perform. Must be one of 'read', 'write', or 'append'.
+        mode: The operation to perform. Must be one of 'read', 'write', 'append', 'edit', or 'patch'.
         content: The text content to write or append. Required for 'write' and 'append' modes.
+            For 'patch' mode, a unified diff ('@@ -a,b +c,d @@' hunks) to apply to the file.
+        edits: For 'edit' mode, a list of {"search": "...", "replace": "..."} hunks. Each search
+            text must appear exactly once in the file; copy it exactly, including indentation.
+        offset: For 'read' mode, the 1-based line to start reading from.
+        limit: For 'read' mode, the maximum number of lines to return.
 
     Returns:
-        The content of the file if mode is 'read', otherwise a status message.
+        The content of the file if mode is 'read' (line-numbered when offset or limit is
+        given), otherwise a status message.
     """
-    if mode not in ['read', 'write', 'append']:
-        return "Error: Invalid mode. Use 'read', 'write', or 'append'."
+    if mode not in ['read', 'write', 'append', 'edit', 'patch']:
+        return "Error: Invalid mode. Use 'read', 'write', 'append', 'edit', or 'patch'."
 
     try:
+        path = resolve_output_path(filepath)
         if mode == 'read':
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return f.read()
-        
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            if offset is None and limit is None:
+                return text
+            return read_range(text, offset, limit)
+
+        # --- For edit and patch modes ---
+        if mode in ['edit', 'patch']:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                original = f.read()
+            if mode == 'edit':
+                updated = apply_search_replace(original, edits)
+            elif content is None:
+                return "Error: A unified diff in 'content' is required for 'patch' mode."
+            else:
+                updated = apply_unified_diff(original, content)
+            atomic_write(path, updated)
+            return f"Successfully performed '{mode}' on file: {filepath} ({len(updated.splitlines())} lines)"
+
         # --- For write and append modes ---
         
         # Content is required for these modes, so we check it here.
@@ -56,144 +201,409 @@ def manage_file(filepath: str, mode: str, content: str = None) -> str:
             return f"Error: Content is required for '{mode}' mode."
         
         # Ensure the directory exists.
-        directory = os.path.dirname(filepath)
+        directory = os.path.dirname(path)
         if directory:
             os.makedirs(directory, exist_ok=True)
 
-        # Use 'w' for write (overwrite) and 'a' for append.
-        file_mode = 'w' if mode == 'write' else 'a'
-        
-        with open(filepath, file_mode, encoding='utf-8') as f:
-            f.write(content)
+        if mode == 'write':
+            # Temp file + rename, so readers never see a half-written file.
+            atomic_write(path, content)
+        else:
+            # Sealed files may be shared with other runs (see workspaces.py); append to a copy.
+            detach(path)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(content)
         
         return f"Successfully performed '{mode}' on file: {filepath}"
 
     except FileNotFoundError:
-        # This error is only relevant for 'read' mode. 
+        # This error is only relevant for 'read', 'edit' and 'patch' modes.
         # For 'write'/'append', the file is created automatically.
         return f"Error: The file '{filepath}' was not found for reading."
+    except EditError as e:
+        return f"Error: {e} The file was not changed."
+    except WorkspaceError as e:
+        return f"Error: {e}"
     except Exception as e:
         return f"An unexpected error occurred: {e}"
-@tool   
-def run_python_code(code: str, dependencies: list[str] = None) -> dict:
+@tool
+def validate_python_code(code: str = None, filepath: str = None, dependencies: list[str] = None) -> dict:
+    """
+    Checks Python code locally in about a second, without a sandbox: syntax, whether every
+    import is covered by `dependencies`, and for a FastAPI file, that `app` loads and its
+    routes and OpenAPI schema build. Run this first and fix what it reports; use
+    run_python_code only for a full runtime check once it passes.
+
+    Args:
+        code: The code to check. Give either this or filepath.
+        filepath: Path of a saved file to check instead, e.g. 'output/backend.py'.
+        dependencies: The pip packages the code will be installed with.
+
+    Returns:
+        A dict with "ok", "diagnostics" (each with stage, severity, line and message),
+        the app's "routes" and "duration_s".
     """
-    Executes Python code or shell commands in a secure E2B sandbox. It can install
-    dependencies before execution. This tool is smart enough to handle multi-line Python code
-    by automatically saving it to a file and running it.
+    if code is None:
+        if filepath is None:
+            return {"ok": False, "error": "Give either 'code' or 'filepath'."}
+        try:
+            with open(resolve_output_path(filepath), "r", encoding="utf-8") as f:
+                code = f.read()
+        except FileNotFoundError:
+            return {"ok": False, "error": f"The file '{filepath}' was not found."}
+        except WorkspaceError as e:
+            return {"ok": False, "error": str(e)}
+    try:
+        return validate_code(code, dependencies)
+    except Exception:
+        return {"ok": False, "error": traceback.format_exc()}
+
+
+@tool
+def read_tool_log(log_id: str, stream: str = "stderr", offset: int = None, limit: int = None) -> str:
     """
+    Reads the full output of a run_python_code call whose result was truncated.
+
+    Args:
+        log_id: The 'log_id' from the run_python_code result.
+        stream: 'stdout' or 'stderr'.
+        offset: The 1-based line to start reading from.
+        limit: The maximum number of lines to return (default 200).
+
+    Returns:
+        The requested lines, numbered, or an error message.
+    """
+    try:
+        text = get_log_artifacts().read(log_id, stream)
+    except ValueError as e:
+        return f"Error: {e}"
+    except FileNotFoundError:
+        return f"Error: No {stream} log for '{log_id}'; it may have been cleaned up."
+    return read_range(text, offset, 200 if limit is None else limit)
+
+
+# Measured test durations per suite, so the next run of it is sharded evenly.
+_test_durations = {}
+
+@tool
+def run_test_suite(filepath: str = "output/test_app.py") -> dict:
+    """
+    Runs a saved pytest suite against the backend next to it ('output/backend.py'),
+    split across worker processes.
+
+    Args:
+        filepath: Path of the test file.
+
+    Returns:
+        A dict with the "passed", "failed", "errors" and "skipped" counts, "duration_s" and
+        a "summary" with one line per failure. Each failure is tagged with who should fix
+        it: [backend_agent] for errors raised inside backend.py, [qa_agent] otherwise.
+    """
+    try:
+        path = resolve_output_path(filepath)
+    except WorkspaceError as e:
+        return {"error": str(e)}
+    if not os.path.isfile(path):
+        return {"error": f"The file '{filepath}' was not found."}
+    try:
+        report = run_tests(os.path.dirname(path) or ".", os.path.basename(path),
+                           durations=_test_durations.get(path))
+    except Exception:
+        return {"error": traceback.format_exc()}
+    _test_durations[path] = report["durations"]
+    return {key: report[key] for key in ("passed", "failed", "errors", "skipped", "duration_s", "summary")}
+
+
+def _run_command(sbx, command: str, timeout: int):
+    # E2B raises on a non-zero exit code; the exception carries the same result fields.
+    try:
+        return sbx.commands.run(command, timeout=timeout)
+    except Exception as e:
+        if hasattr(e, "exit_code"):
+            return e
+        raise
+
+
+def _install_dependencies(entry, dependencies: list[str]):
+    """
+    Installs `dependencies` into a pooled sandbox, using the dependency cache. Wheels
+    are cached under the sandbox's platform tag, so ones built here are only offered
+    to a sandbox with the same interpreter and OS, and vice versa.
+
+    Returns:
+        A tuple of (failed command result or None, install seconds saved by the cache).
+    """
+    dep_cache = get_dep_cache()
+    sbx = entry.sandbox
+    if entry.platform is None:
+        proc = _run_command(sbx, PLATFORM_COMMAND, timeout=30)
+        entry.platform = proc.stdout.strip() if proc.exit_code == 0 and proc.stdout.strip() else "unknown"
+    platform = entry.platform
+    key = dependency_key(dependencies, platform)
+    if key in entry.installed:
+        return None, dep_cache.saved_seconds(dependencies, platform=platform)
+
+    packages = " ".join(shlex.quote(d) for d in dependencies)
+    wheel_dir = f"/home/user/wheels/{key}"
     start_time = time.time()
+
+    cached = dep_cache.lookup(dependencies, platform)
+    if cached is None and dep_cache.wheelhouse and platform == local_platform():
+        try:
+            cached = dep_cache.build(dependencies)
+        except RuntimeError:
+            cached = None
+    if cached is not None:
+        sbx.files.write(f"{wheel_dir}.tar", dep_cache.archive(cached))
+        proc = _run_command(sbx, (
+            f"mkdir -p {wheel_dir} && tar -xf {wheel_dir}.tar -C {wheel_dir} && "
+            f"pip install --quiet --no-index --find-links {wheel_dir} {packages}"
+        ), timeout=300)
+        if proc.exit_code == 0:
+            entry.installed.add(key)
+            return None, dep_cache.saved_seconds(dependencies, time.time() - start_time, platform)
+        # Cached wheels that don't fit this sandbox are dropped and rebuilt by a cold install.
+        dep_cache.invalidate(dependencies, platform)
+
+    proc = _run_command(sbx, (
+        f"pip wheel --quiet -w {wheel_dir} {packages} && "
+        f"pip install --quiet --no-index --find-links {wheel_dir} {packages} && "
+        f"tar -cf {wheel_dir}.tar -C {wheel_dir} ."
+    ), timeout=300)
+    if proc.exit_code != 0:
+        return proc, 0.0
+    elapsed = time.time() - start_time
+    entry.installed.add(key)
+    dep_cache.record_install(dependencies, elapsed, platform)
     try:
-        is_python_script = "\n" in code and ("import " in code or "def " in code or "print(" in code)
-        
-        with Sandbox.create(api_key=e2b_api_key) as sbx:
-            if dependencies:
-                pip_command = f"pip install --quiet {' '.join(dependencies)}"
-                install_proc = sbx.commands.run(pip_command, timeout=300)
-                if install_proc.exit_code != 0:
-                    return {
-                        "stdout": install_proc.stdout, "stderr": install_proc.stderr,
-                        "error": f"Dependency installation failed.",
-                    }
+        dep_cache.store_archive(dependencies, sbx.files.read(f"{wheel_dir}.tar", format="bytes"), elapsed,
+                                platform)
+    except Exception:
+        pass  # The sandbox keeps its packages either way; only the on-disk cache misses out.
+    return None, 0.0
+
+
+@lru_cache(maxsize=None)
+def create_run_python_code_tool(e2b_api_key: str = None):
+    """Builds the run_python_code tool on top of the sandbox pool for `e2b_api_key`."""
+    sandbox_pool = get_sandbox_pool(e2b_api_key)
+
+    @tool
+    def run_python_code(code: str, dependencies: list[str] = None) -> dict:
+        """
+        Executes Python code or shell commands in a secure E2B sandbox. It can install
+        dependencies before execution. This tool is smart enough to handle multi-line Python code
+        by automatically saving it to a file and running it.
+
+        Sandboxes come from a warm pool, so repeated calls reuse an already running sandbox
+        (and its installed packages) instead of creating a new one each time. Dependencies are
+        installed from a content-addressed wheel cache; 'install_saved_s' in the result reports
+        the install time that saved. With EXECUTION_BACKEND=local the code runs in a local,
+        resource-limited subprocess instead, returning the same fields.
+
+        Output is streamed and bounded: 'stdout' and 'stderr' keep their first and last
+        few thousand characters, 'traceback' holds the last Python traceback with library
+        frames collapsed, and if output was cut, 'truncated' is set and the full output
+        can be read with read_tool_log using 'log_id'.
+        """
+        start_time = time.time()
+        try:
+            is_python_script = "\n" in code and ("import " in code or "def " in code or "print(" in code)
+
+            local_executor = get_local_executor()
+            if local_executor is not None:
+                result = local_executor.run(code, dependencies, is_python_script=is_python_script)
+                annotate_span(queue_s=result.get("queue_s", 0.0))
+                return result
+
+            install_saved_s = 0.0
+            with sandbox_pool.sandbox() as entry:
+                annotate_span(queue_s=round(time.time() - start_time, 4))
+                sbx = entry.sandbox
+                if dependencies:
+                    install_proc, install_saved_s = _install_dependencies(entry, dependencies)
+                    if install_proc is not None:
+                        return {
+                            "stdout": bound_text(install_proc.stdout, TOOL_OUTPUT_HEAD_CHARS, TOOL_OUTPUT_TAIL_CHARS),
+                            "stderr": bound_text(install_proc.stderr, TOOL_OUTPUT_HEAD_CHARS, TOOL_OUTPUT_TAIL_CHARS),
+                            "error": f"Dependency installation failed.",
+                        }
             
-            if is_python_script:
-                sbx.files.write("/home/user/script.py", code)
-                execution_command = "python /home/user/script.py"
-            else:
-                execution_command = code
-
-            execution = sbx.commands.run(execution_command, timeout=120)
+                if is_python_script:
+                    sbx.files.write("/home/user/script.py", code)
+                    execution_command = "python /home/user/script.py"
+                else:
+                    execution_command = code
+
+                # Output is captured as it streams in, so a chatty script never builds up in memory.
+                artifacts = get_log_artifacts()
+                log_id = artifacts.new_id()
+                out, err = (StreamCapture(TOOL_OUTPUT_HEAD_CHARS, TOOL_OUTPUT_TAIL_CHARS, artifacts.path(log_id, stream))
+                            for stream in ("stdout", "stderr"))
+                try:
+                    exit_code = sbx.commands.run(execution_command, timeout=120,
+                                                 on_stdout=out.feed, on_stderr=err.feed).exit_code
+                except Exception as e:
+                    # E2B raises on a non-zero exit; the output already went to the captures.
+                    if getattr(e, "exit_code", None) is None:
+                        raise
+                    exit_code = e.exit_code
+                output = finish_captures(out, err, log_id)
+                if output.get("truncated"):
+                    artifacts.gc()
+
+                return {
+                    **output,
+                    "exit_code": exit_code,
+                    "duration_s": round(time.time() - start_time, 3),
+                    "install_saved_s": install_saved_s,
+                }
 
+        except Exception:
             return {
-                "stdout": execution.stdout,
-                "stderr": execution.stderr,
-                "exit_code": execution.exit_code,
+                "stdout": "", "stderr": "", "error": traceback.format_exc(),
                 "duration_s": round(time.time() - start_time, 3),
             }
 
-    except Exception:
-        return {
-            "stdout": "", "stderr": "", "error": traceback.format_exc(),
-            "duration_s": round(time.time() - start_time, 3),
-        }
-    
+    return run_python_code
+
+# --- LLM Response Cache ---
+# Identical prompts (same model, parameters, messages and tools) are answered from disk.
+# LLM_CACHE=0 turns it off; LLM_CACHE_DISABLED_AGENTS opts single agents out.
+llm_caches = {}
+
+@lru_cache(maxsize=None)
+def get_llm_cache_store():
+    if os.getenv("LLM_CACHE", "1") == "0":
+        return None
+    return DiskCache(
+        os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite"),
+        ttl_s=float(os.getenv("LLM_CACHE_TTL_S", str(24 * 3600))),
+        max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    )
+
+def llm_cache_for(agent_name: str):
+    """Returns the response cache for an agent, or None if caching is off for it."""
+    disabled = {a.strip() for a in os.getenv("LLM_CACHE_DISABLED_AGENTS", "").split(",") if a.strip()}
+    store = get_llm_cache_store()
+    if store is None or agent_name in disabled:
+        return None
+    return llm_caches.setdefault(agent_name, LLMCache(store, name=agent_name))
+
+def llm_cache_stats() -> dict:
+    """Hit/miss counters per agent."""
+    return {name: cache.stats() for name, cache in llm_caches.items()}
+
 # --- Models ---
+# Every model shares a rate limiter per provider/model (see rate_limit.py); the callback
+# reports latency and 429s back to it for adaptive concurrency.
+def rate_limit_kwargs(provider: str, model: str) -> dict:
+    limiter = get_limiter(provider, model)
+    return {"rate_limiter": limiter, "callbacks": [limiter.callback]}
+
 @traceable
-def create_groq_supervisor_model():
-    return ChatGroq(model="openai/gpt-oss-20b", api_key=groq_api_key )# Powerful model for reasoning
+def create_groq_supervisor_model(api_key=None, cache=None):
+    from langchain_groq import ChatGroq
+    return ChatGroq(model="openai/gpt-oss-20b", api_key=api_key or os.getenv("GROQ_API_KEY"), cache=cache,
+                    **rate_limit_kwargs("groq", "openai/gpt-oss-20b"))# Powerful model for reasoning
 
 @traceable
-def create_groq_coding_model():
-    return ChatGroq(model="llama-3.3-70b-versatile", api_key=groq_api_key) # Powerful model for coding
+def create_groq_coding_model(api_key=None, cache=None):
+    from langchain_groq import ChatGroq
+    return ChatGroq(model="llama-3.3-70b-versatile", api_key=api_key or os.getenv("GROQ_API_KEY"), cache=cache,
+                    **rate_limit_kwargs("groq", "llama-3.3-70b-versatile")) # Powerful model for coding
 
 @traceable
-def create_google_coding2_model():
-    return ChatGoogleGenerativeAI(model="gemini-2.5-flash",api_key=google_api_key) # Powerful model for coding
+def create_google_coding2_model(api_key=None, cache=None):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash",api_key=api_key or os.getenv("GOOGLE_API_KEY"), cache=cache,
+                                  **rate_limit_kwargs("google", "gemini-2.5-flash")) # Powerful model for coding
 
 @traceable
-def create_groq_coding3_model():
-    return ChatGroq(model="moonshotai/kimi-k2-instruct-0905", api_key=groq_api_key) # Powerful model for coding
+def create_groq_coding3_model(api_key=None, cache=None):
+    from langchain_groq import ChatGroq
+    return ChatGroq(model="moonshotai/kimi-k2-instruct-0905", api_key=api_key or os.getenv("GROQ_API_KEY"), cache=cache,
+                    **rate_limit_kwargs("groq", "moonshotai/kimi-k2-instruct-0905")) # Powerful model for coding
 
 
 @traceable
-def create_cohere_coding4_model():
-    return ChatCohere(api_key=cohere_api_key,
+def create_cohere_coding4_model(api_key=None, cache=None):
+    from langchain_cohere import ChatCohere
+    return ChatCohere(api_key=api_key or os.getenv("COHERE_API_KEY"),
     model="command-a-03-2025", # Using the stable and powerful model
     max_retries=3,
-    temperature=0.7,max_token=4000) 
-
-
-sup_model = create_groq_supervisor_model()
-coding_model = create_groq_coding_model()
-coding_model2 = create_google_coding2_model()
-coding_model3 = create_groq_coding3_model()
-coding_model4 = create_cohere_coding4_model() 
-
-#--Agents---
-# --- Planner Agent ---
-
-planner_agent = create_react_agent(
-    model=coding_model4,
-    tools=[],         
-    prompt=(
-        """You are a Planner Agent who will take a task from the user and create a proper plan. This plan should be concise. You have two agents with you: a Frontend Agent and a Backend Agent. You have to create the plan according to both of their roles so that the agents do not get confused or make mistakes.
+    temperature=0.7,max_token=4000, cache=cache,
+    **rate_limit_kwargs("cohere", "command-a-03-2025")) 
+
+
+# --- Model Routing ---
+# MODEL_ROUTING=1 pairs every agent's model with one from another provider (see
+# routing.py): slow calls are hedged to it and failing providers are routed around.
+MODEL_FALLBACKS = {
+    "backend_agent": ("google/gemini-2.5-flash", "google"),
+    "supervisor": ("groq/openai/gpt-oss-20b", "groq_supervisor"),
+    "frontend_agent": ("google/gemini-2.5-flash", "google"),
+    "qa_agent": ("google/gemini-2.5-flash", "google"),
+    "planner_agent": ("groq/moonshotai/kimi-k2-instruct-0905", "groq_coding3"),
+}
+MODEL_NAMES = {
+    "backend_agent": "groq/openai/gpt-oss-20b",
+    "supervisor": "google/gemini-2.5-flash",
+    "frontend_agent": "groq/moonshotai/kimi-k2-instruct-0905",
+    "qa_agent": "groq/moonshotai/kimi-k2-instruct-0905",
+    "planner_agent": "cohere/command-a-03-2025",
+}
+
+def routed_model(agent_name: str, primary, fallback):
+    from routing import RoutedChatModel
+    return RoutedChatModel(
+        models=[primary, fallback], names=[MODEL_NAMES[agent_name], MODEL_FALLBACKS[agent_name][0]],
+        hedge_min_s=float(os.getenv("HEDGE_MIN_S", "2")),
+        hedge_default_s=float(os.getenv("HEDGE_DEFAULT_S", "30")),
+        hedge_multiplier=float(os.getenv("HEDGE_P95_MULTIPLIER", "1.0")),
+    )
+
+@lru_cache(maxsize=8)
+def get_models(config: AgentConfig) -> dict:
+    """Chat models keyed by the agent that uses them."""
+    factories = {
+        "groq_supervisor": lambda cache: create_groq_supervisor_model(config.groq_api_key, cache=cache),
+        "google": lambda cache: create_google_coding2_model(config.google_api_key, cache=cache),
+        "groq_coding3": lambda cache: create_groq_coding3_model(config.groq_api_key, cache=cache),
+        "cohere": lambda cache: create_cohere_coding4_model(config.cohere_api_key, cache=cache),
+    }
+    models = {
+        "backend_agent": factories["groq_supervisor"](llm_cache_for("backend_agent")),
+        "supervisor": factories["google"](llm_cache_for("supervisor")),
+        "frontend_agent": factories["groq_coding3"](llm_cache_for("frontend_agent")),
+        "qa_agent": factories["groq_coding3"](llm_cache_for("qa_agent")), # Same model as frontend, own cache counters
+        "planner_agent": factories["cohere"](llm_cache_for("planner_agent")),
+    }
+    if os.getenv("MODEL_ROUTING", "0") == "1":
+        models = {name: routed_model(name, model, factories[MODEL_FALLBACKS[name][1]](llm_cache_for(name)))
+                  for name, model in models.items()}
+    return models
+
+#--Prompts---
+PLANNER_PROMPT = """You are a Planner Agent who will take a task from the user and create a proper plan. This plan should be concise. You have two agents with you: a Frontend Agent and a Backend Agent. You have to create the plan according to both of their roles so that the agents do not get confused or make mistakes.
 
 Your Backend Agent writes code in Python using FastAPI, Django, or Flask and creates a single, self-contained backend file. Your Frontend Agent writes code in HTML and vanilla JS and creates a single, self-contained frontend file.
 
 You must create a concise plan in which you will make two sections: a frontend section and a backend section.pass plan to supervisor but do not call any tool  respond with the exact message: "plan passed successfully to supervisor." 
 
 """
-    ),
-    name="planner_agent",
-)
 
-# ---Frontend_Agent ---
-frontend_agent = create_react_agent(
-    model=coding_model3,
-    tools=[manage_file, web_search],
-    prompt=(
-        """You are an expert frontend developer. Your task is to write a single, self-contained HTML file.
+FRONTEND_PROMPT = """You are an expert frontend developer. Your task is to write a single, self-contained HTML file.
 
 Follow these critical instructions exactly:
 
 1. Use only the backend summary provided to you to connect the frontend with the backend via fetch() calls.  
 2. Write the complete HTML code in one file, including inline CSS and vanilla JavaScript.  
-3. Use the manage_file tool to save the file. The filepath argument MUST be exactly 'output/index.html'.  
+3. Use the manage_file tool to save the file. The filepath argument MUST be exactly 'output/index.html'.  To change it afterwards, use manage_file mode 'edit' with small search/replace hunks instead of rewriting the whole file.  
 4. After saving, respond with the exact message: "Frontend code saved successfully."  
 5. Do not include any explanations, reasoning, or extra commentary in your output."""
 
-    ),
-    name="frontend_agent",
-    
-)
-
-# --- Backend Agent ---
-
-
-backend_agent = create_react_agent(
-    model=sup_model,
-    tools=[manage_file, web_search,run_python_code],
-    prompt=(
-        """ou are an expert, production-focused backend developer. Your task is to write a single, self-contained, and robust FastAPI file.
+BACKEND_PROMPT = """ou are an expert, production-focused backend developer. Your task is to write a single, self-contained, and robust FastAPI file.
 
 Follow these critical instructions precisely:
 
@@ -203,58 +613,261 @@ Follow these critical instructions precisely:
 
 3.  **Code Verification and Debugging:** Before saving the file, you are required to verify its correctness.
     a. First, identify all necessary Python library dependencies (e.g., `fastapi`, `uvicorn`, `requests`).
-    b. Next, use the `run_python_code` tool to install these dependencies and execute your full script.
-    c. If the tool reports an error, you must debug the code and retry the execution. You may attempt to fix the code a maximum of two times. If it still fails, proceed to the next step and save the file as-is.
+    b. Next, check the script with the `validate_python_code` tool, passing the code and these dependencies. It finds syntax errors, missing dependencies and app startup errors in about a second. Fix every error it reports.
+    c. Then use the `run_python_code` tool to install the dependencies and execute your full script. Long output is truncated; read the `traceback` field first, and if you need the omitted part, use `read_tool_log` with the returned `log_id`.
+    d. If either tool reports an error, you must debug the code and retry. You may attempt to fix the code a maximum of two times. If it still fails, proceed to the next step and save the file as-is.
 
-4.  **Save the File:** Use the `manage_file` tool to save the final code. The `filepath` argument MUST be exactly `'output/backend.py'`.
+4.  **Save the File:** Use the `manage_file` tool to save the final code. The `filepath` argument MUST be exactly `'output/backend.py'`. To change the file after it is saved, use `manage_file` with mode `'edit'` and small search/replace hunks instead of rewriting the whole file.
 
 5.  **Confirmation:** After saving the file, you MUST respond with the exact message: "Backend code saved successfully."
 
 6.  **Provide Summary:** Following the confirmation message, provide a concise summary of the backend, including: all API endpoints, their HTTP methods, the server URL, expected inputs, and successful outputs."""
 
-    ),
-    name="backend_agent",
-)
-
-#_-- QA Agent ---
-qa_agent = create_react_agent(
-    model=coding_model3,
-    tools=[manage_file],
-    prompt=(
-  """You are a specialized QA Test Writer. Your sole purpose is to write pytest unit tests.
+QA_PROMPT = """You are a specialized QA Test Writer. Your sole purpose is to write pytest unit tests.
 
 Follow these instructions exactly:
 1.  You will be given a summary of a backend API.
 2.  Based on that summary, write thorough unit tests using the pytest framework.
 3.  Use the `manage_file` tool to save the complete test code to 'output/test_app.py'.
-4.  After saving the file, respond with the exact message: `Pytest tests generated successfully`.
-5.  Make a readme.md file of the project using manage_file tool and save it to output/readme.md file
-6.  Do not include any explanations, reasoning, or extra commentary in your output."""
+4.  Run the tests with the `run_test_suite` tool. Fix failures tagged [qa_agent] in your tests with `manage_file` mode 'edit' and run them again, at most two times. Do not change tests to hide failures tagged [backend_agent].
+5.  Respond with the exact message: `Pytest tests generated successfully`. If failures tagged [backend_agent] remain, add a line `Backend failures:` followed by their summary lines.
+6.  Make a readme.md file of the project using manage_file tool and save it to output/readme.md file
+7.  Do not include any explanations, reasoning, or extra commentary in your output."""
 
-    ),
-    name="qa_agent",
-)
-
-
-# --- Supervisor ---
-supervisor = create_supervisor(
-    model=coding_model2,
-    agents=[planner_agent, backend_agent, frontend_agent, qa_agent],
-    prompt=(
-"""
+SUPERVISOR_PROMPT = """
 You are a Project Manager Supervisor. Your job is to manage a step-by-step workflow.
 
 1.  First, pass the user request to `planner_agent`.
 2.  After the planner agent is finished,you get the plan delegate to backend task to `backend_agent`.
 3.  After the backend  is saved, you give the backend summary to `frontend_agent`.
 4.  After the frontend is done, delegate to `qa_agent` to write tests and a README.
-5.  Do not do any work yourself, only delegate the task to agents. Respond with the final confirmation once all tasks are complete."""
+5.  If the QA agent reports backend failures, send them to `backend_agent` once to fix, then to `qa_agent` once to re-run the tests.
+6.  Do not do any work yourself, only delegate the task to agents. Respond with the final confirmation once all tasks are complete."""
 
-    ),
-    sanitize_names=True,
-    add_handoff_back_messages=True,
-    output_mode="full_history",
-).compile()
+#--Agents---
+def build_agents(models: dict, web_search, run_python_code, compactor: HistoryCompactor = None) -> dict:
+    """
+    Assembles the four worker agents from chat models keyed by agent name and the
+    shared tools. Benchmarks call this directly with fake models and tools. With a
+    `compactor`, each agent compacts the history it sends to its model.
+    """
+    from langgraph.prebuilt import create_react_agent
+
+    def hook(name):
+        return compactor.hook(name) if compactor else None
+
+    # --- Planner Agent ---
+    planner_agent = create_react_agent(
+        model=models["planner_agent"],
+        tools=[],
+        prompt=PLANNER_PROMPT,
+        name="planner_agent",
+        pre_model_hook=hook("planner_agent"),
+    )
+
+    # ---Frontend_Agent ---
+    frontend_agent = create_react_agent(
+        model=models["frontend_agent"],
+        tools=[manage_file, web_search],
+        prompt=FRONTEND_PROMPT,
+        name="frontend_agent",
+        pre_model_hook=hook("frontend_agent"),
+    )
+
+    # --- Backend Agent ---
+    backend_agent = create_react_agent(
+        model=models["backend_agent"],
+        tools=[manage_file, web_search, validate_python_code, run_python_code, read_tool_log],
+        prompt=BACKEND_PROMPT,
+        name="backend_agent",
+        pre_model_hook=hook("backend_agent"),
+    )
+
+    #_-- QA Agent ---
+    qa_agent = create_react_agent(
+        model=models["qa_agent"],
+        tools=[manage_file, run_test_suite],
+        prompt=QA_PROMPT,
+        name="qa_agent",
+        pre_model_hook=hook("qa_agent"),
+    )
+    return {"planner_agent": planner_agent, "backend_agent": backend_agent,
+            "frontend_agent": frontend_agent, "qa_agent": qa_agent}
+
+
+def build_supervisor(agents: dict, model, compactor: HistoryCompactor = None, checkpointer=None):
+    """Compiles the supervisor graph over agents from `build_agents`."""
+    from langgraph_supervisor import create_supervisor
+
+    return create_supervisor(
+        model=model,
+        agents=[agents["planner_agent"], agents["backend_agent"], agents["frontend_agent"], agents["qa_agent"]],
+        prompt=SUPERVISOR_PROMPT,
+        sanitize_names=True,
+        add_handoff_back_messages=True,
+        output_mode="full_history",
+        pre_model_hook=compactor.hook("supervisor") if compactor else None,
+    ).compile(checkpointer=checkpointer)
+
+
+@lru_cache(maxsize=None)
+def get_history_compactor():
+    """
+    Compacts what each agent sends to its model between handoffs (see compaction.py).
+    HISTORY_COMPACTION=0 turns it off; HISTORY_TOKEN_BUDGET caps each prompt's history.
+    """
+    if os.getenv("HISTORY_COMPACTION", "1") == "0":
+        return None
+    return HistoryCompactor(token_budget=int(os.getenv("HISTORY_TOKEN_BUDGET", "12000")))
+
+@lru_cache(maxsize=8)
+def get_agents(config: AgentConfig) -> dict:
+    return build_agents(
+        get_models(config),
+        web_search=get_web_search(config.tavily_api_key),
+        run_python_code=create_run_python_code_tool(config.e2b_api_key),
+        compactor=get_history_compactor(),
+    )
+
+# --- Tracing ---
+# Spans for every graph node, LLM call, tool call and handoff (see tracing.py), written
+# to TRACE_JSONL. METRICS_PORT serves Prometheus metrics at /metrics. TRACING=0 turns it off.
+@lru_cache(maxsize=None)
+def get_tracer():
+    if os.getenv("TRACING", "1") == "0":
+        return None
+    tracer = Tracer(jsonl_path=os.getenv("TRACE_JSONL", ".cache/traces.jsonl") or None)
+    if os.getenv("METRICS_PORT"):
+        serve_metrics(tracer, int(os.getenv("METRICS_PORT")))
+    return tracer
+
+def instrument(graph):
+    """Attaches the tracer to a compiled graph, so every run of it is traced."""
+    tracer = get_tracer()
+    return graph if tracer is None else graph.with_config(callbacks=[tracer])
+
+# --- Checkpoints ---
+# Graph state is saved to SQLite after every step, so a failed or interrupted run can be
+# resumed from the last finished agent (see resume.py). CHECKPOINTS=0 turns it off.
+@lru_cache(maxsize=None)
+def get_checkpointer():
+    if os.getenv("CHECKPOINTS", "1") == "0":
+        return None
+    return CompactSqliteSaver.open(
+        os.getenv("CHECKPOINT_PATH", ".cache/checkpoints.sqlite"),
+        keep=int(os.getenv("CHECKPOINT_KEEP", "2")),
+    )
+
+def run_config(thread_id: str, **extra) -> dict:
+    """Config for one build. The output directory is saved with the checkpoints, for resuming."""
+    return {"configurable": {"thread_id": thread_id}, "metadata": {"output_root": output_root.get()}, **extra}
+
+def finish_run(thread_id: str) -> None:
+    """Drops the intermediate checkpoints of a completed run, keeping only its final state."""
+    checkpointer = get_checkpointer()
+    if checkpointer is not None:
+        checkpointer.prune([thread_id])
+
+# --- Supervisor ---
+@lru_cache(maxsize=8)
+def _get_supervisor(config: AgentConfig):
+    return instrument(build_supervisor(get_agents(config), get_models(config)["supervisor"],
+                                       compactor=get_history_compactor(), checkpointer=get_checkpointer()))
+
+def get_supervisor(config: AgentConfig = None):
+    """
+    Returns the compiled supervisor graph for `config` (default: keys from the
+    environment). It is built on first use and cached; a different config builds a
+    separate graph without re-importing this module.
+    """
+    return _get_supervisor(config or AgentConfig.from_env())
+
+# --- Build Cache ---
+# Lets the parallel pipeline skip agents whose inputs did not change since an earlier
+# build (see build_cache.py). BUILD_CACHE=0 turns it off.
+@lru_cache(maxsize=None)
+def get_build_cache():
+    if os.getenv("BUILD_CACHE", "1") == "0":
+        return None
+    from build_cache import BuildCache
+    return BuildCache(DiskCache(
+        os.getenv("BUILD_CACHE_PATH", ".cache/build_cache.sqlite"),
+        ttl_s=float(os.getenv("BUILD_CACHE_TTL_S", str(7 * 24 * 3600))),
+        max_bytes=int(os.getenv("BUILD_CACHE_MAX_MB", "128")) * 1024 * 1024,
+    ))
+
+# --- Workspaces ---
+# The UI builds every run in its own workspace (see workspaces.py); finished runs are
+# deduplicated into the artifact store and old ones are collected. ARTIFACT_STORE=0
+# keeps sealed files as plain copies.
+@lru_cache(maxsize=None)
+def get_workspaces() -> Workspaces:
+    store = None
+    if os.getenv("ARTIFACT_STORE", "1") != "0":
+        store = ArtifactStore(os.getenv("ARTIFACT_STORE_DIR", ".cache/artifacts"))
+    max_mb = os.getenv("WORKSPACE_MAX_MB", "1024")
+    return Workspaces(
+        os.getenv("WORKSPACE_ROOT", ".cache/workspaces"),
+        store=store,
+        keep_runs=int(os.getenv("WORKSPACE_KEEP_RUNS", "50")),
+        max_age_s=float(os.getenv("WORKSPACE_MAX_AGE_H", "168")) * 3600,
+        max_bytes=int(max_mb) * 1024 * 1024 if max_mb else None,
+    )
+
+# --- Load Test ---
+# The parallel pipeline boots the generated app and load-tests it (see loadtest.py).
+# LOADTEST=0 skips the stage; empty threshold values disable that threshold.
+def load_test_config():
+    if os.getenv("LOADTEST", "1") == "0":
+        return None
+    from loadtest import thresholds_from_env
+    return {"duration_s": float(os.getenv("LOADTEST_DURATION_S", "5")),
+            "concurrency": int(os.getenv("LOADTEST_CONCURRENCY", "16")),
+            "thresholds": thresholds_from_env()}
+
+# --- Parallel Pipeline ---
+# Same agents as an explicit DAG: frontend and QA run concurrently after the backend.
+@lru_cache(maxsize=8)
+def _get_parallel_pipeline(config: AgentConfig):
+    from pipeline import build_parallel_pipeline
+    return instrument(build_parallel_pipeline(**get_agents(config), checkpointer=get_checkpointer(),
+                                              build_cache=get_build_cache(), output_dir=output_root.get,
+                                              test_stage=os.getenv("TEST_STAGE", "1") != "0",
+                                              max_fix_rounds=int(os.getenv("TEST_FIX_ROUNDS", "2")),
+                                              load_test=load_test_config(),
+                                              on_load_failure=os.getenv("LOADTEST_ON_FAILURE", "revise"),
+                                              max_revise_rounds=int(os.getenv("LOADTEST_REVISE_ROUNDS", "1"))))
+
+def get_parallel_pipeline(config: AgentConfig = None):
+    return _get_parallel_pipeline(config or AgentConfig.from_env())
+
+def get_graph(config: AgentConfig = None):
+    """The graph selected by ORCHESTRATION_MODE."""
+    if orchestration_mode == "parallel":
+        return get_parallel_pipeline(config)
+    return get_supervisor(config)
+
+def clear_component_cache() -> None:
+    """Drops every cached model, agent and graph so the next call rebuilds them."""
+    for factory in (get_models, get_agents, _get_supervisor, _get_parallel_pipeline,
+                    get_search_cache, get_web_search, create_run_python_code_tool, get_tracer, get_build_cache):
+        factory.cache_clear()
+
+# Backwards compatibility: `from agents import supervisor` (and friends) still works,
+# building from environment keys on first access.
+_LAZY_ATTRIBUTES = {
+    "supervisor": get_supervisor,
+    "parallel_pipeline": get_parallel_pipeline,
+    "graph": get_graph,
+    "sandbox_pool": lambda: get_sandbox_pool(AgentConfig.from_env().e2b_api_key),
+    "web_search": lambda: get_web_search(AgentConfig.from_env().tavily_api_key),
+    "run_python_code": lambda: create_run_python_code_tool(AgentConfig.from_env().e2b_api_key),
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --- Printing and Execution Logic ---
 def pretty_print_message(message, indent=False):
@@ -291,7 +904,11 @@ def pretty_print_messages(update, last_message=False):
 
 # --- Run the Stream ---
 if __name__ == "__main__":
-    for chunk in supervisor.stream(
+    # Warm a sandbox while the planner is still thinking.
+    get_sandbox_pool(AgentConfig.from_env().e2b_api_key).start()
+    thread_id = f"cli-run-{time.time()}"
+    print(f"Run id: {thread_id} (if it fails, continue it with `python resume.py {thread_id}`)")
+    for chunk in get_graph().stream(
         {
             "messages": [
                 {
@@ -300,7 +917,23 @@ if __name__ == "__main__":
                 }
             ]
         },
+        config=run_config(thread_id),
     ):
         pretty_print_messages(chunk, last_message=True)
-
-    final_message_history = chunk["supervisor"]["messages"]
+    finish_run(thread_id)
+
+    # The last update comes from "supervisor" (supervisor mode) or "join" (parallel mode).
+    final_message_history = list(chunk.values())[-1]["messages"]
+    if os.getenv("RECORD_TRANSCRIPT"):
+        # Replayable with bench_pipeline.py (supervisor mode only).
+        from transcripts import save_transcript, transcript_from_messages
+        save_transcript(os.getenv("RECORD_TRANSCRIPT"), transcript_from_messages(final_message_history))
+
+    if get_history_compactor() is not None:
+        print("Prompt tokens per agent, before and after history compaction:")
+        print(get_history_compactor().format_report())
+
+    search_stats = get_search_cache(AgentConfig.from_env().tavily_api_key).stats()
+    print(f"Web search: {search_stats['hits']} cache hits, {search_stats['coalesced']} coalesced, "
+          f"{search_stats['misses']} calls (hit rate {search_stats['hit_rate']:.0%}, "
+          f"~{search_stats['latency_saved_s']}s saved)")
@@ -1,8 +1,14 @@
 import os
-import shutil
 import streamlit as st
 from langchain_core.messages import convert_to_messages
 import time
+import uuid
+import altair as alt
+import pandas as pd
+# Importing agents is cheap: models and graphs are only built by get_graph().
+from agents import (AgentConfig, finish_run, get_checkpointer, get_graph, get_parallel_pipeline, get_sandbox_pool,
+                    get_tracer, get_workspaces, output_root, run_config)
+from build_cache import read_manifest
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -21,6 +27,7 @@ tavily_api_key = st.sidebar.text_input("Tavily API Key", type="password")
 groq_api_key = st.sidebar.text_input("Groq API Key", type="password")
 google_api_key = st.sidebar.text_input("Google API Key", type="password")
 e2b_api_key = st.sidebar.text_input("E2B API Key", type="password")
+cohere_api_key = st.sidebar.text_input("Cohere API Key", type="password")
 
 
 st.sidebar.info("The application will only run after all API keys are provided.")
@@ -36,16 +43,71 @@ st.markdown("Provide your application idea, and the AI team will handle the rest
 # Initialize session state for log messages
 if "log_messages" not in st.session_state:
     st.session_state.log_messages = []
+if "trace_spans" not in st.session_state:
+    st.session_state.trace_spans = []
+if "failed_thread_id" not in st.session_state:
+    st.session_state.failed_thread_id = None
+    st.session_state.failure_message = ""
+# Each session builds into its own workspace, so concurrent users never share files.
+if "workspace" not in st.session_state:
+    st.session_state.workspace = None
+
+# Tool outputs longer than this are shown as a preview; the rest is rendered on demand.
+TOOL_PREVIEW_CHARS = 1500
 
 # --- Helper function to render messages ---
-def render_message(msg):
+def render_message(msg, key=None):
+    """
+    Renders one log message. Large tool payloads only show a head/tail preview; once the
+    run is over (`key` given) a toggle renders the full payload on demand.
+    """
     if msg.type == "ai":
-        st.markdown(f"**🤖 Agent Message:**\n> {msg.content.strip()}")
+        content = msg.content if isinstance(msg.content, str) else str(msg.content)
+        if content.strip():
+            st.markdown(f"**🤖 Agent Message:**\n> {content.strip()}")
     elif msg.type == "tool":
         tool_name = msg.name.split('.')[-1]
         tool_content = str(msg.content)
         with st.expander(f"🛠️ Tool Call: `{tool_name}`", expanded=False):
-            st.code(tool_content, language="text", line_numbers=True)
+            if len(tool_content) <= TOOL_PREVIEW_CHARS:
+                st.code(tool_content, language="text", line_numbers=True)
+                return
+            if key is not None and st.toggle(f"Show all {len(tool_content):,} characters", key=key):
+                st.code(tool_content, language="text", line_numbers=True)
+                return
+            half = TOOL_PREVIEW_CHARS // 2
+            hidden = len(tool_content) - 2 * half
+            st.code(f"{tool_content[:half]}\n\n… {hidden:,} characters hidden …\n\n{tool_content[-half:]}", language="text")
+
+def message_key(msg):
+    return msg.id or f"obj-{id(msg)}"
+
+def render_waterfall(spans):
+    """Timing waterfall of a run: agents (top-level nodes), LLM calls, tool calls and handoffs."""
+    root = next((s for s in spans if s["kind"] == "graph"), None)
+    shown = [s for s in spans if s["kind"] in ("llm", "tool", "handoff") or (s["kind"] == "node" and s.get("depth") == 0)]
+    if root is None or not shown:
+        return
+    rows = pd.DataFrame([{
+        "span": f"{index:03d} {s['agent']} · {s['name'] if s['kind'] != 'llm' else 'LLM ' + s['name']}",
+        "kind": "agent" if s["kind"] == "node" else s["kind"],
+        "start_s": round(s["start"] - root["start"], 3),
+        "end_s": round((s["end"] or s["start"]) - root["start"], 3),
+        "duration_s": s.get("duration_s", 0.0),
+        "queue_s": s.get("queue_s", 0.0),
+        "tokens": f"{s.get('prompt_tokens', 0)} → {s.get('completion_tokens', 0)}" if s["kind"] == "llm" else "",
+        "status": s["status"],
+    } for index, s in enumerate(shown)])
+    st.caption(f"Total {root.get('duration_s', 0):.1f}s · {len(rows[rows.kind == 'llm'])} LLM calls · "
+               f"{len(rows[rows.kind == 'tool'])} tool calls · {rows.queue_s.sum():.1f}s queued")
+    chart = alt.Chart(rows).mark_bar().encode(
+        x=alt.X("start_s:Q", title="seconds since start"),
+        x2="end_s:Q",
+        y=alt.Y("span:N", sort=None, title=None, axis=alt.Axis(labelLimit=320)),
+        color=alt.Color("kind:N", title=None),
+        tooltip=["span", "duration_s", "queue_s", "tokens", "status"],
+    ).properties(height=max(200, 18 * len(rows)))
+    st.altair_chart(chart, use_container_width=True)
 
 # --- Input and Control Area ---
 prompt = st.text_area(
@@ -54,61 +116,156 @@ prompt = st.text_area(
     height=100
 )
 
-if st.button("🚀 Build Application", type="primary", use_container_width=True):
+# Changes this session's last app instead of starting over: only agents whose part of the
+# plan changed run again, and they edit the existing files (see pipeline.py).
+modify_existing = st.checkbox(
+    "✏️ Modify the existing app",
+    disabled=not (st.session_state.workspace and read_manifest(st.session_state.workspace)),
+    help="Describe a change to the last app built. Unchanged parts are reused from the build cache.",
+)
+
+build_clicked = st.button("🚀 Build Application", type="primary", use_container_width=True)
+# A failed run continues from its last checkpoint; agents that already finished are not re-run.
+failure_notice = st.empty()
+if st.session_state.failed_thread_id:
+    failure_notice.error(f"The last run stopped: {st.session_state.failure_message}. Progress up to the last "
+             "completed agent is saved.")
+resume_clicked = bool(st.session_state.failed_thread_id) and st.button(
+    "↩️ Resume Failed Run", use_container_width=True,
+    help="Continue the last run from the last agent that completed, instead of starting over.",
+)
+
+if build_clicked or resume_clicked:
     # Validate that all inputs are provided
-    if not all([tavily_api_key, groq_api_key, google_api_key, e2b_api_key,]):
+    if not all([tavily_api_key, groq_api_key, google_api_key, e2b_api_key, cohere_api_key]):
         st.error("Please enter all the required API keys in the sidebar.")
-    elif not prompt:
+    elif build_clicked and not prompt:
         st.warning("Please enter a prompt to build the application.")
     else:
-        # Clean up previous run's output and logs
-        if os.path.exists("output"):
-            shutil.rmtree("output")
-        st.session_state.log_messages = []
-
-        # --- CRITICAL STEP ---
-        # Set environment variables from the user's input.
-        # This MUST be done before importing the agents file.
-        os.environ["TAVILY_API_KEY"] = tavily_api_key
-        os.environ["GROQ_API_KEY"] = groq_api_key
-        os.environ["GOOGLE_API_KEY"] = google_api_key
-        os.environ["E2B_API_KEY"] = e2b_api_key
-        
-        
-        # --- CRITICAL STEP ---
-        # Import the supervisor object now that the environment variables are set.
-        from agents import supervisor
+        if build_clicked:
+            # A new app gets a fresh workspace; earlier ones are left to the workspace GC.
+            if not modify_existing:
+                st.session_state.workspace = get_workspaces().create()
+            st.session_state.log_messages = []
+            st.session_state.trace_spans = []
+            # Use a unique thread for each run to avoid state conflicts
+            thread_id = f"streamlit-run-{time.time()}"
+            graph_input = {"messages": [{"role": "user", "content": prompt}]}
+            if modify_existing:
+                graph_input["modify"] = True
+            st.session_state.modify_run = modify_existing
+        else:
+            thread_id = st.session_state.failed_thread_id
+            graph_input = None  # None continues from the last checkpoint
+        st.session_state.failed_thread_id = None
+        failure_notice.empty()
+
+        # The graph for these keys is built on the first run and reused by later runs.
+        agent_config = AgentConfig(
+            tavily_api_key=tavily_api_key,
+            groq_api_key=groq_api_key,
+            google_api_key=google_api_key,
+            e2b_api_key=e2b_api_key,
+            cohere_api_key=cohere_api_key,
+        )
+        get_sandbox_pool(e2b_api_key).start()
+        # Modifying an app needs the explicit pipeline, which knows which agents to re-run.
+        graph = get_parallel_pipeline(agent_config) if st.session_state.get("modify_run") else get_graph(agent_config)
 
-        user_input = {"messages": [{"role": "user", "content": prompt}]}
-        
         st.header("📢 Agent Activity Log", divider="rainbow")
-        log_container = st.empty()
-
-        with st.spinner("Agents are working... This might take a few minutes."):
-            # Use a unique config for each run to avoid state conflicts
-            config = {"configurable": {"thread_id": f"streamlit-run-{time.time()}"}}
-            
-            for chunk in supervisor.stream(user_input, config=config):
-                # The structure of chunks from the supervisor is a bit different
-                if "supervisor" in chunk:
-                    for message in chunk["supervisor"].get("messages", []):
-                        st.session_state.log_messages.append(message)
-                
-                # Re-render the entire log on each update
-                with log_container.container():
-                    for log_msg in st.session_state.log_messages:
-                        render_message(log_msg)
-        
+        # Messages are appended to the log as they arrive instead of re-rendering it.
+        log_container = st.container()
+        # Tokens of the LLM turn in progress, replaced once the finished message lands in the log.
+        live_output = st.empty()
+        with log_container:
+            for message in st.session_state.log_messages:
+                render_message(message)
+
+        workspace = st.session_state.workspace
+        # The agents' 'output/...' paths resolve into this session's workspace.
+        root_token = output_root.set(workspace)
+        with st.spinner("Agents are working... This might take a few minutes."), get_workspaces().lease(workspace):
+            # The run id doubles as the trace id of this run (see tracing.py).
+            run_id = uuid.uuid4()
+            config = run_config(thread_id, run_id=run_id)
+            seen_ids = {message_key(message) for message in st.session_state.log_messages}
+            failure = None
+            live_text, live_id, last_draw = "", None, 0.0
+
+            try:
+                for namespace, mode, data in graph.stream(
+                    graph_input, config=config, stream_mode=["updates", "messages"], subgraphs=True,
+                ):
+                    if mode == "messages":
+                        token, metadata = data
+                        # Finished messages (e.g. tool results) also come through here; only show LLM tokens.
+                        if token.type != "AIMessageChunk" or not isinstance(token.content, str) or not token.content:
+                            continue
+                        if token.id != live_id:
+                            live_text, live_id = "", token.id
+                        live_text += token.content
+                        # Redrawing on every token would be its own O(n²); a few frames per second is enough.
+                        if time.time() - last_draw > 0.15:
+                            agent = namespace[0].split(":")[0] if namespace else metadata.get("langgraph_node", "agent")
+                            live_output.markdown(f"**✍️ {agent} is writing…**\n> {live_text[-3000:]}")
+                            last_draw = time.time()
+                        continue
+
+                    # Only top-level updates are logged; agents in full_history mode resend their
+                    # whole history, so messages are de-duplicated by id.
+                    if namespace:
+                        continue
+                    for node_update in data.values():
+                        new_messages = []
+                        for message in (node_update or {}).get("messages", []):
+                            if message.type in ("ai", "tool") and message_key(message) not in seen_ids:
+                                seen_ids.add(message_key(message))
+                                new_messages.append(message)
+                        if new_messages:
+                            live_output.empty()
+                            st.session_state.log_messages.extend(new_messages)
+                            with log_container:
+                                for message in new_messages:
+                                    render_message(message)
+            except Exception as e:
+                failure = e
+            finally:
+                output_root.reset(root_token)
+
+        if get_tracer() is not None:
+            st.session_state.trace_spans = get_tracer().trace(run_id)
+
+        if failure is not None:
+            if get_checkpointer() is not None:
+                # Rerun so the resume button shows up above the log of this run.
+                st.session_state.failed_thread_id = thread_id
+                st.session_state.failure_message = str(failure)
+                st.rerun()
+            st.error(f"The run stopped: {failure}")
+            st.stop()
+
+        finish_run(thread_id)
+        # Identical files of earlier runs are stored once; old workspaces are removed.
+        get_workspaces().seal(workspace)
+        get_workspaces().gc()
         st.success("✅ Workflow completed successfully!")
 
+        if st.session_state.trace_spans:
+            with st.expander("⏱️ Timing Waterfall", expanded=False):
+                render_waterfall(st.session_state.trace_spans)
+
         st.header("🎉 Your Application is Ready!", divider="rainbow")
         
+        st.caption(f"Files of this run are in `{workspace}`.")
         output_files = {
-            "📄 Frontend (index.html)": "output/index.html",
-            "🐍 Backend (backend.py)": "output/backend.py",
-            "🧪 Tests (test_app.py)": "output/test_app.py",
-            "📖 README.md": "output/readme.md"
+            "📄 Frontend (index.html)": os.path.join(workspace, "index.html"),
+            "🐍 Backend (backend.py)": os.path.join(workspace, "backend.py"),
+            "🧪 Tests (test_app.py)": os.path.join(workspace, "test_app.py"),
+            "📖 README.md": os.path.join(workspace, "readme.md")
         }
+        # Written by the parallel pipeline's load test stage.
+        if os.path.exists(os.path.join(workspace, "loadtest.json")):
+            output_files["📈 Load Test (loadtest.json)"] = os.path.join(workspace, "loadtest.json")
         
         tabs = st.tabs(list(output_files.keys()))
         
@@ -118,12 +275,14 @@ if st.button("🚀 Build Application", type="primary", use_container_width=True)
                     with open(filepath, "r", encoding="utf-8") as f:
                         content = f.read()
                     
-                    language = "python" if filepath.endswith(".py") else "html" if filepath.endswith(".html") else "markdown"
+                    language = ("python" if filepath.endswith(".py") else "html" if filepath.endswith(".html")
+                                else "json" if filepath.endswith(".json") else "markdown")
                     st.code(content, language=language, line_numbers=True)
 
                     mime_type = "text/plain"
                     if filepath.endswith(".html"): mime_type = "text/html"
                     elif filepath.endswith(".md"): mime_type = "text/markdown"
+                    elif filepath.endswith(".json"): mime_type = "application/json"
                     
                     st.download_button(
                         label=f"📥 Download {os.path.basename(filepath)}",
@@ -135,3 +294,13 @@ if st.button("🚀 Build Application", type="primary", use_container_width=True)
                 except FileNotFoundError:
                     st.warning(f"File `{os.path.basename(filepath)}` was not generated by the agent.")
 
+# --- Log of the Previous Run ---
+# Any widget interaction reruns the script; the last run's log is then rendered from
+# session state, where large tool payloads can be expanded on demand.
+elif st.session_state.log_messages:
+    st.header("📢 Agent Activity Log", divider="rainbow")
+    for index, log_msg in enumerate(st.session_state.log_messages):
+        render_message(log_msg, key=f"full-output-{index}")
+    if st.session_state.trace_spans:
+        with st.expander("⏱️ Timing Waterfall", expanded=False):
+            render_waterfall(st.session_state.trace_spans)
@@ -0,0 +1,187 @@
+"""
+Runs many builds from a JSONL file concurrently.
+
+Each input line is a JSON object with a prompt in "prompt" (or "body", optionally
+with a "title") and an optional "id"/"request_id". Every job writes its generated
+files to <out-dir>/<id>/ (<out-dir>/<id>.retry-<n>/ for a retry after a timeout),
+and one result line per job (status, attempts, timings, output_dir) is appended to
+<out-dir>/results.jsonl as jobs finish.
+
+    python batch.py requests.jsonl --concurrency 4 --retries 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+import traceback
+
+from checkpoints import CompactSqliteSaver
+
+
+def read_jobs(path: str):
+    """Yields (job_id, prompt) pairs from a JSONL file without loading it all."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            prompt = record.get("prompt") or record.get("body") or record.get("content")
+            if not prompt:
+                raise ValueError(f"{path}:{line_number}: no 'prompt' or 'body' field")
+            if record.get("title") and "prompt" not in record:
+                prompt = f"{record['title']}\n\n{prompt}"
+            job_id = str(record.get("id") or record.get("request_id") or f"job-{line_number:04d}")
+            yield re.sub(r"[^A-Za-z0-9._-]", "_", job_id), prompt
+
+
+async def run_job(graph, output_root, job_id: str, prompt: str, job_dir: str, attempt: int,
+                  timeout: float, thread_id: str = None) -> dict:
+    """
+    Streams one build into `job_dir` and returns its timings. If the graph has a
+    checkpointer, a retry continues the failed attempt from its last checkpoint.
+    """
+    os.makedirs(job_dir, exist_ok=True)
+    # Each worker task has its own context, so this only redirects this job's files.
+    token = output_root.set(job_dir)
+    start_time = time.perf_counter()
+    first_chunk_s = None
+    chunks = 0
+    last_chunk = None
+    try:
+        thread_id = thread_id or f"batch-{job_id}-{attempt}"
+        config = {"configurable": {"thread_id": thread_id}, "metadata": {"output_root": job_dir}}
+        user_input = {"messages": [{"role": "user", "content": prompt}]}
+        resumed = False
+        if attempt > 1 and graph.checkpointer:
+            state = await graph.aget_state(config)
+            if state.next:
+                user_input, resumed = None, True
+
+        async def consume():
+            nonlocal first_chunk_s, chunks, last_chunk
+            async for chunk in graph.astream(user_input, config=config):
+                if first_chunk_s is None:
+                    first_chunk_s = time.perf_counter() - start_time
+                chunks += 1
+                last_chunk = chunk
+
+        await asyncio.wait_for(consume(), timeout=timeout)
+    finally:
+        output_root.reset(token)
+    if isinstance(graph.checkpointer, CompactSqliteSaver):
+        graph.checkpointer.prune([thread_id])
+
+    if last_chunk:
+        messages = list(last_chunk.values())[-1].get("messages", [])
+        with open(os.path.join(job_dir, "transcript.txt"), "w", encoding="utf-8") as f:
+            f.write("\n\n".join(m.pretty_repr() for m in messages))
+    return {
+        "duration_s": round(time.perf_counter() - start_time, 3),
+        "time_to_first_chunk_s": round(first_chunk_s, 3) if first_chunk_s is not None else None,
+        "chunks": chunks,
+        "resumed": resumed,
+    }
+
+
+async def run_batch(graph, output_root, jobs, out_dir: str, concurrency: int = 4, retries: int = 1,
+                    retry_backoff_s: float = 5.0, timeout: float = 1800.0) -> list[dict]:
+    """
+    Runs `jobs` ((job_id, prompt) pairs) through `graph` with at most `concurrency`
+    builds in flight. A failed job is re-queued after a backoff, up to `retries` times,
+    without holding a worker slot while it waits. A retry after an error shares the
+    failed attempt's checkpoint thread and directory, so it resumes where that attempt
+    stopped. A retry after a timeout starts over with its own thread and directory:
+    tool calls of the timed-out attempt may still be running in worker threads (they
+    cannot be cancelled) and would otherwise write over the retry's files.
+
+    Job ids must be unique, since they name the output directories: a repeated id gets
+    a '-2', '-3', ... suffix.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    results_path = os.path.join(out_dir, "results.jsonl")
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    results = []
+    batch_tag = time.strftime("%Y%m%d-%H%M%S")
+    # The event loop only keeps weak references to tasks; pending retries are held here.
+    retry_tasks = set()
+
+    def write_result(result: dict) -> None:
+        results.append(result)
+        with open(results_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+        print(f"[{result['status']}] {result['id']} ({result['attempts']} attempt(s), {result['duration_s']}s)")
+
+    async def requeue_later(item):
+        await asyncio.sleep(retry_backoff_s * item[2])
+        await queue.put(item)
+        # Only now mark the failed attempt done, so queue.join() keeps waiting for the retry.
+        queue.task_done()
+
+    async def worker():
+        while True:
+            # `first` is the attempt that started the current thread and directory.
+            job_id, prompt, attempt, first = await queue.get()
+            suffix = f".retry-{first - 1}" if first > 1 else ""
+            job_dir = os.path.join(out_dir, job_id + suffix)
+            started_at = time.time()
+            try:
+                timings = await run_job(graph, output_root, job_id, prompt, job_dir, attempt, timeout,
+                                        thread_id=f"batch-{batch_tag}-{job_id}{suffix}")
+                write_result({"id": job_id, "status": "ok", "attempts": attempt, "started_at": started_at,
+                              "output_dir": job_dir, **timings})
+            except Exception as e:
+                if attempt <= retries:
+                    timed_out = isinstance(e, asyncio.TimeoutError)
+                    task = asyncio.create_task(requeue_later((job_id, prompt, attempt + 1,
+                                                              attempt + 1 if timed_out else first)))
+                    retry_tasks.add(task)
+                    task.add_done_callback(retry_tasks.discard)
+                    continue
+                write_result({"id": job_id, "status": "failed", "attempts": attempt, "started_at": started_at,
+                              "output_dir": job_dir, "duration_s": round(time.time() - started_at, 3),
+                              "error": "".join(traceback.format_exception_only(type(e), e)).strip()})
+            queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    seen = set()
+    for job_id, prompt in jobs:
+        unique_id, number = job_id, 1
+        while unique_id in seen:
+            number += 1
+            unique_id = f"{job_id}-{number}"
+        seen.add(unique_id)
+        await queue.put((unique_id, prompt, 1, 1))
+    await queue.join()
+    for w in workers:
+        w.cancel()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("jobs", help="JSONL file with one build request per line.")
+    parser.add_argument("--out-dir", default="batch_output", help="Directory for per-job output and results.jsonl.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum builds running at once.")
+    parser.add_argument("--retries", type=int, default=1, help="Retries per failed job.")
+    parser.add_argument("--retry-backoff", type=float, default=5.0, help="Base backoff before a retry (s).")
+    parser.add_argument("--timeout", type=float, default=1800.0, help="Per-attempt timeout (s).")
+    args = parser.parse_args()
+
+    from agents import AgentConfig, get_graph, get_sandbox_pool, output_root
+    config = AgentConfig.from_env()
+    get_sandbox_pool(config.e2b_api_key).start()
+    start_time = time.perf_counter()
+    results = asyncio.run(run_batch(
+        get_graph(config), output_root, read_jobs(args.jobs), args.out_dir, concurrency=args.concurrency,
+        retries=args.retries, retry_backoff_s=args.retry_backoff, timeout=args.timeout,
+    ))
+    failed = sum(1 for r in results if r["status"] != "ok")
+    print(f"{len(results)} job(s), {failed} failed, {time.perf_counter() - start_time:.1f}s total")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
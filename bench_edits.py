@@ -0,0 +1,86 @@
+"""
+Estimates the output tokens an agent saves by fixing a saved file with manage_file's
+'edit' mode instead of re-writing it, using the sample files in output/.
+
+The scenario is a debug retry: the file is already saved and one small fix is needed.
+Both variants are applied for real, through the tool and a temporary workspace, to check
+they give the same file.
+
+    python bench_edits.py
+"""
+import json
+import os
+import shutil
+import tempfile
+
+from langchain_core.messages import AIMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from agents import manage_file, output_root
+
+# (sample file, search, replace): one-line fixes of the kind a debug retry makes.
+SCENARIOS = [
+    ("output/backend.py",
+     'raise HTTPException(status_code=400, detail="Division by zero")',
+     'raise HTTPException(status_code=400, detail="Cannot divide by zero")'),
+    ("output/index.html",
+     "<title>",
+     "<title>Calculator | "),
+]
+
+
+def tool_call_tokens(args: dict) -> int:
+    """Approximate output tokens of an assistant message that makes this manage_file call."""
+    message = AIMessage(content="", tool_calls=[{"name": "manage_file", "args": args, "id": "call_0"}])
+    return count_tokens_approximately([message])
+
+
+def measure(scenarios: list = SCENARIOS) -> list:
+    """Tokens of the 'write' and 'edit' call for each scenario."""
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="bench-edits-")
+    # manage_file only writes inside the run's workspace; the agents' 'output/...' paths map into it.
+    token = output_root.set(work_dir)
+    try:
+        for sample, search, replace in scenarios:
+            with open(sample, "r", encoding="utf-8", newline="") as f:
+                original = f.read()
+            if original.count(search) != 1:
+                raise SystemExit(f"{sample}: scenario search text must occur exactly once")
+            fixed = original.replace(search, replace, 1)
+
+            write_name, edit_name = "write_" + os.path.basename(sample), "edit_" + os.path.basename(sample)
+            shutil.copy(sample, os.path.join(work_dir, edit_name))
+
+            write_args = {"filepath": f"output/{write_name}", "mode": "write", "content": fixed}
+            edit_args = {"filepath": f"output/{edit_name}", "mode": "edit",
+                         "edits": [{"search": search, "replace": replace}]}
+            for args in (write_args, edit_args):
+                status = manage_file.invoke(args)
+                if not status.startswith("Successfully"):
+                    raise SystemExit(f"{sample}: {status}")
+            with open(os.path.join(work_dir, write_name), "r", encoding="utf-8") as a, \
+                    open(os.path.join(work_dir, edit_name), "r", encoding="utf-8") as b:
+                if a.read() != b.read():
+                    raise SystemExit(f"{sample}: write and edit produced different files")
+
+            write_tokens, edit_tokens = tool_call_tokens(write_args), tool_call_tokens(edit_args)
+            results.append({
+                "file": sample,
+                "write_tokens": write_tokens,
+                "edit_tokens": edit_tokens,
+                "saved_tokens": write_tokens - edit_tokens,
+                "saved_pct": round(100 * (write_tokens - edit_tokens) / write_tokens, 1),
+            })
+    finally:
+        output_root.reset(token)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def main():
+    print(json.dumps(measure(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compares wall-clock time of the supervisor workflow and the parallel pipeline using
+scripted fake models, so it runs without any API keys.
+
+    python bench_parallel.py --agent-delay 0.5 --supervisor-delay 0.2
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+
+from langgraph.prebuilt import create_react_agent
+from langgraph_supervisor import create_supervisor
+
+from fakes import ScriptedChatModel, handoff
+from pipeline import build_parallel_pipeline
+
+AGENT_REPLIES = {
+    "planner_agent": "plan passed successfully to supervisor.",
+    "backend_agent": "Backend code saved successfully. POST /calculate on http://localhost:8000",
+    "frontend_agent": "Frontend code saved successfully.",
+    "qa_agent": "Pytest tests generated successfully",
+}
+
+
+def build_agents(agent_delay: float) -> dict:
+    return {
+        name: create_react_agent(
+            model=ScriptedChatModel(responses=[reply], delay_s=agent_delay), tools=[], name=name,
+        )
+        for name, reply in AGENT_REPLIES.items()
+    }
+
+
+def build_supervisor(agent_delay: float, supervisor_delay: float):
+    agents = build_agents(agent_delay)
+    script = [handoff(name, f"call_{i}") for i, name in enumerate(AGENT_REPLIES)] + ["All tasks are complete."]
+    return create_supervisor(
+        model=ScriptedChatModel(responses=script, delay_s=supervisor_delay),
+        agents=list(agents.values()),
+        add_handoff_back_messages=True,
+        output_mode="full_history",
+    ).compile()
+
+
+def timed_run(build_graph, runs: int) -> float:
+    """
+    Best wall-clock time of `runs` runs. Every run gets a freshly built graph: the
+    scripted models repeat their last reply once the script is used up, so a reused
+    supervisor would finish after a single turn.
+    """
+    user_input = {"messages": [{"role": "user", "content": "Create a calculator app"}]}
+    timings = []
+    for _ in range(runs):
+        graph = build_graph()
+        start_time = time.perf_counter()
+        graph.invoke(user_input)
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def compare(agent_delay: float = 0.5, supervisor_delay: float = 0.2, runs: int = 3) -> dict:
+    supervisor_s = timed_run(lambda: build_supervisor(agent_delay, supervisor_delay), runs)
+    # The fake agents write no files; keep the pipeline's manifest out of output/.
+    scratch_dir = tempfile.mkdtemp(prefix="bench-parallel-")
+    try:
+        parallel_s = timed_run(lambda: build_parallel_pipeline(**build_agents(agent_delay),
+                                                               output_dir=lambda: scratch_dir, test_stage=False), runs)
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    return {
+        "supervisor_s": round(supervisor_s, 3),
+        "parallel_s": round(parallel_s, 3),
+        "saved_s": round(supervisor_s - parallel_s, 3),
+        "speedup": round(supervisor_s / parallel_s, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agent-delay", type=float, default=0.5, help="Simulated latency per agent LLM call (s).")
+    parser.add_argument("--supervisor-delay", type=float, default=0.2, help="Simulated latency per supervisor call (s).")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(json.dumps(compare(args.agent_delay, args.supervisor_delay, args.runs), indent=2))
+
+
+if __name__ == "__main__":
+    main()
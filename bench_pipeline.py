@@ -0,0 +1,282 @@
+"""
+End-to-end pipeline benchmark without API keys. A recorded transcript (see
+transcripts.py) is replayed through the real agents and supervisor graph from
+agents.py: every agent gets a scripted fake model that repeats its recorded replies,
+web_search goes to FakeSearch and run_python_code runs in the local executor.
+manage_file writes into a temporary output directory.
+
+Reports wall time, LLM turns, tool calls, approximate prompt/completion tokens and
+LLM/tool time per agent, plus the orchestration overhead (wall time during which no model
+call or tool was running), as JSON.
+
+    python bench_pipeline.py bench_transcripts/calculator.json --runs 3 --output bench.json
+    python bench_pipeline.py bench_transcripts/calculator.json --baseline bench.json --max-regression-pct 20
+
+Record a new transcript from a live run with `RECORD_TRANSCRIPT=path.json python agents.py`.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages.utils import count_tokens_approximately
+
+import agents
+from fakes import FakeSearch, ScriptedChatModel
+from pipeline import build_parallel_pipeline
+from search_cache import CachedSearch, create_web_search_tool
+from transcripts import load_transcript, scripts_by_agent
+
+AGENT_NAMES = ["planner_agent", "backend_agent", "frontend_agent", "qa_agent"]
+
+
+def _agent_of(metadata: dict) -> str:
+    """The top-level graph node (agent) a callback event belongs to."""
+    metadata = metadata or {}
+    namespace = metadata.get("checkpoint_ns") or metadata.get("langgraph_checkpoint_ns") or ""
+    return namespace.split(":")[0] or metadata.get("langgraph_node") or "graph"
+
+
+class PipelineMetrics(BaseCallbackHandler):
+    """Collects per-agent timings and counts from the graph's callback events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}
+        self.agents = {}
+        self.busy_intervals = []
+
+    def _agent(self, name: str) -> dict:
+        return self.agents.setdefault(name, {
+            "wall_s": 0.0, "llm_turns": 0, "llm_s": 0.0, "prompt_tokens": 0, "completion_tokens": 0,
+            "tool_calls": 0, "tool_s": 0.0, "handoffs": 0,
+        })
+
+    def _start(self, run_id, agent: str, kind: str, **extra) -> None:
+        with self._lock:
+            self._started[run_id] = (agent, kind, time.perf_counter(), extra)
+
+    def _end(self, run_id):
+        with self._lock:
+            entry = self._started.pop(run_id, None)
+        if entry is None:
+            return None
+        agent, kind, start_time, extra = entry
+        end_time = time.perf_counter()
+        if kind != "node":
+            with self._lock:
+                self.busy_intervals.append((start_time, end_time))
+        return agent, kind, end_time - start_time, extra
+
+    # Agent (top-level node) wall time
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        is_top_level_node = "langgraph_node" in metadata and not metadata.get("checkpoint_ns") \
+            and kwargs.get("name") == metadata["langgraph_node"]
+        if is_top_level_node:
+            self._start(run_id, metadata["langgraph_node"], "node")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._record_end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._record_end(run_id)
+
+    # LLM turns and tokens
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, _agent_of(metadata), "llm", prompt_tokens=count_tokens_approximately(messages[0]))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        ended = self._end(run_id)
+        if ended is None:
+            return
+        agent, _, elapsed, extra = ended
+        message = getattr(response.generations[0][0], "message", None)
+        usage = getattr(message, "usage_metadata", None) or {}
+        with self._lock:
+            stats = self._agent(agent)
+            stats["llm_turns"] += 1
+            stats["llm_s"] += elapsed
+            stats["prompt_tokens"] += usage.get("input_tokens") or extra["prompt_tokens"]
+            stats["completion_tokens"] += usage.get("output_tokens") or \
+                (count_tokens_approximately([message]) if message is not None else 0)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    # Tool calls (handoffs are counted separately)
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, _agent_of(metadata), "tool", name=(serialized or {}).get("name") or kwargs.get("name", ""))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._record_end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._record_end(run_id)
+
+    def busy_s(self) -> float:
+        """Time during which at least one model call or tool was running."""
+        total, current_end = 0.0, None
+        for start_time, end_time in sorted(self.busy_intervals):
+            if current_end is None or start_time > current_end:
+                total += end_time - start_time
+                current_end = end_time
+            elif end_time > current_end:
+                total += end_time - current_end
+                current_end = end_time
+        return total
+
+    def _record_end(self, run_id) -> None:
+        ended = self._end(run_id)
+        if ended is None:
+            return
+        agent, kind, elapsed, extra = ended
+        with self._lock:
+            stats = self._agent(agent)
+            if kind == "node":
+                stats["wall_s"] += elapsed
+            elif extra["name"].startswith("transfer_"):
+                stats["handoffs"] += 1
+            else:
+                stats["tool_calls"] += 1
+                stats["tool_s"] += elapsed
+
+
+def build_graph(transcript: dict, orchestration: str, llm_delay_s: float, search_delay_s: float):
+    """Builds the real agents and graph around scripted models. Returns (graph, models)."""
+    scripts = scripts_by_agent(transcript)
+    models = {name: ScriptedChatModel(responses=scripts.get(name) or ["Done."], delay_s=llm_delay_s)
+              for name in AGENT_NAMES}
+    web_search = create_web_search_tool(CachedSearch(FakeSearch(delay_s=search_delay_s)))
+    run_python_code = agents.create_run_python_code_tool(None)
+    compactor = agents.get_history_compactor()
+    built = agents.build_agents(models, web_search=web_search, run_python_code=run_python_code, compactor=compactor)
+    if orchestration == "parallel":
+        return build_parallel_pipeline(**built, output_dir=agents.output_root.get, test_stage=False), models
+    models["supervisor"] = ScriptedChatModel(responses=scripts.get("supervisor") or ["Done."], delay_s=llm_delay_s)
+    return agents.build_supervisor(built, models["supervisor"], compactor=compactor), models
+
+
+def run_once(transcript: dict, orchestration: str, llm_delay_s: float, search_delay_s: float) -> dict:
+    graph, models = build_graph(transcript, orchestration, llm_delay_s, search_delay_s)
+    metrics = PipelineMetrics()
+    output_dir = tempfile.mkdtemp(prefix="bench-pipeline-")
+    token = agents.output_root.set(output_dir)
+    try:
+        start_time = time.perf_counter()
+        graph.invoke({"messages": [{"role": "user", "content": transcript["prompt"]}]},
+                     config={"callbacks": [metrics], "recursion_limit": 200})
+        wall_s = time.perf_counter() - start_time
+        files = sorted(os.listdir(output_dir))
+    finally:
+        agents.output_root.reset(token)
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    llm_s = sum(s["llm_s"] for s in metrics.agents.values())
+    tool_s = sum(s["tool_s"] for s in metrics.agents.values())
+    return {
+        "wall_s": wall_s,
+        "llm_s": llm_s,
+        "tool_s": tool_s,
+        "orchestration_overhead_s": wall_s - metrics.busy_s(),
+        "agents": metrics.agents,
+        "files": files,
+        # Agents whose recorded replies were not all used: the replay diverged.
+        "unreplayed_turns": {name: len(model.responses) - model._index for name, model in models.items()
+                             if model._index < len(model.responses)},
+    }
+
+
+def _median(values: list):
+    if all(isinstance(v, int) for v in values):
+        return int(statistics.median_low(values))
+    return round(statistics.median(values), 4)
+
+
+def summarize(samples: list) -> dict:
+    """Medians over runs; counts are the same in every run of a deterministic replay."""
+    summary = {key: _median([s[key] for s in samples]) for key in ("wall_s", "llm_s", "tool_s", "orchestration_overhead_s")}
+    summary["agents"] = {
+        name: {key: _median([s["agents"].get(name, {}).get(key, 0) for s in samples])
+               for key in samples[0]["agents"][name]}
+        for name in samples[0]["agents"]
+    }
+    summary["totals"] = {
+        key: sum(stats[key] for stats in summary["agents"].values())
+        for key in ("llm_turns", "tool_calls", "handoffs", "prompt_tokens", "completion_tokens")
+    }
+    summary["files"] = samples[0]["files"]
+    summary["unreplayed_turns"] = samples[0]["unreplayed_turns"]
+    return summary
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, max_regression_pct: float) -> list:
+    """Metrics that got slower than the baseline by more than `max_regression_pct`."""
+    regressions = []
+    for key in ("wall_s", "orchestration_overhead_s"):
+        old, new = baseline.get(key), results[key]
+        if old and new > old * (1 + max_regression_pct / 100):
+            regressions.append(f"{key}: {old}s -> {new}s (+{round(100 * (new - old) / old, 1)}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("transcript", nargs="?", default="bench_transcripts/calculator.json")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--orchestration", choices=["supervisor", "parallel"], default="supervisor")
+    parser.add_argument("--llm-delay-s", type=float, default=0.0, help="Simulated latency per LLM call.")
+    parser.add_argument("--search-delay-s", type=float, default=0.0, help="Simulated latency per web search.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", help="Results JSON of an earlier commit to compare against.")
+    parser.add_argument("--max-regression-pct", type=float, default=20.0)
+    args = parser.parse_args()
+
+    # run_python_code runs locally; nothing in the replay needs E2B.
+    os.environ["EXECUTION_BACKEND"] = "local"
+    agents.get_local_executor.cache_clear()
+    agents.create_run_python_code_tool.cache_clear()
+
+    transcript = load_transcript(args.transcript)
+    samples = [run_once(transcript, args.orchestration, args.llm_delay_s, args.search_delay_s)
+               for _ in range(args.runs)]
+    results = {
+        "transcript": args.transcript,
+        "commit": git_commit(),
+        "orchestration": args.orchestration,
+        "runs": args.runs,
+        "llm_delay_s": args.llm_delay_s,
+        "search_delay_s": args.search_delay_s,
+        **summarize(samples),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if results["unreplayed_turns"]:
+        print(f"Warning: the replay diverged from the transcript: {results['unreplayed_turns']}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.max_regression_pct)
+        if regressions:
+            print("Regressions against the baseline:\n" + "\n".join(regressions))
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Hedged routing benchmark: sends the same calls to a primary fake model with occasional
+stalls, directly and through RoutedChatModel with a steady fallback, and reports
+p50/p95/p99 latency. A second run makes the primary fail outright to show failover,
+and the async run shows the losing requests being cancelled.
+
+    python bench_routing.py --calls 40 --stall-s 3 --stall-every 10
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from langchain_core.messages import HumanMessage
+
+import routing
+from fakes import ScriptedChatModel
+from routing import RoutedChatModel, routing_stats
+
+
+class FailingChatModel(ScriptedChatModel):
+    """A provider that is down: every call fails after `delay_s`."""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.delay_s)
+        raise ConnectionError("provider unavailable")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.delay_s)
+        raise ConnectionError("provider unavailable")
+
+
+def percentiles(latencies: list) -> dict:
+    ordered = sorted(latencies)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))], 3)
+    return {"p50_s": pick(50), "p95_s": pick(95), "p99_s": pick(99), "max_s": round(ordered[-1], 3)}
+
+
+def timed_calls(model, calls: int) -> list:
+    latencies = []
+    for index in range(calls):
+        start_time = time.perf_counter()
+        model.invoke([HumanMessage(content=f"request {index}")])
+        latencies.append(time.perf_counter() - start_time)
+    return latencies
+
+
+async def timed_async_calls(model, calls: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> float:
+        async with semaphore:
+            start_time = time.perf_counter()
+            await model.ainvoke([HumanMessage(content=f"request {index}")])
+            return time.perf_counter() - start_time
+
+    return await asyncio.gather(*(one(index) for index in range(calls)))
+
+
+def reset_stats() -> None:
+    routing._stats.clear()
+    routing._counters.update({key: 0 for key in routing._counters})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--delay-s", type=float, default=0.2, help="Usual latency of the primary.")
+    parser.add_argument("--stall-s", type=float, default=3.0, help="Latency of a stalled primary call.")
+    parser.add_argument("--stall-every", type=int, default=10, help="Every n-th primary call stalls.")
+    parser.add_argument("--fallback-delay-s", type=float, default=0.4)
+    args = parser.parse_args()
+
+    delays = [args.delay_s] * (args.stall_every - 1) + [args.stall_s]
+
+    def primary():
+        return ScriptedChatModel(responses=["primary"], delays=delays)
+
+    def routed(first):
+        return RoutedChatModel(models=[first, ScriptedChatModel(responses=["fallback"], delay_s=args.fallback_delay_s)],
+                               names=["primary", "fallback"], hedge_min_s=args.delay_s * 1.5,
+                               hedge_default_s=args.stall_s / 2)
+
+    results = {"direct": percentiles(timed_calls(primary(), args.calls))}
+
+    reset_stats()
+    results["hedged"] = {**percentiles(timed_calls(routed(primary()), args.calls)), **routing_stats()}
+
+    reset_stats()
+    latencies = asyncio.run(timed_async_calls(routed(primary()), args.calls, concurrency=4))
+    results["hedged_async"] = {**percentiles(latencies), **routing_stats()}
+
+    reset_stats()
+    results["failover"] = {**percentiles(timed_calls(routed(FailingChatModel(responses=[""], delay_s=0.05)), args.calls)),
+                           **routing_stats()}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Sandbox pool benchmark: replays builds that each run their code a few times (the first
+run plus debug retries), with and without the pool, on a local backend whose sandboxes
+take `--create-s` seconds to start, and reports the pool's hit rate and the time spent
+waiting for a sandbox.
+
+    python bench_sandbox.py --builds 5 --retries 3 --create-s 0.5
+"""
+import argparse
+import json
+import time
+
+from sandbox_pool import LocalSandboxBackend, SandboxPool
+
+
+class SlowStartBackend(LocalSandboxBackend):
+    """A local sandbox that takes `create_s` seconds to start, like a cold E2B sandbox."""
+
+    def __init__(self, create_s: float):
+        self.create_s = create_s
+
+    def create(self):
+        time.sleep(self.create_s)
+        return super().create()
+
+
+def measure(builds: int = 5, retries: int = 3, create_s: float = 0.5) -> dict:
+    """Acquire wait with and without the pool over `builds` x (1 + `retries`) runs."""
+    runs = builds * (1 + retries)
+    backend = SlowStartBackend(create_s)
+
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        sandbox = backend.create()
+        backend.close(sandbox)
+    unpooled_s = time.perf_counter() - start_time
+
+    pool = SandboxPool(backend, min_size=1, max_size=2)
+    pool.start()
+    try:
+        # The pool is started with the app, before the first build needs a sandbox.
+        deadline = time.monotonic() + create_s + 5
+        while not pool.stats()["idle"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        for _ in range(runs):
+            with pool.sandbox() as entry:
+                entry.sandbox.files.write("/home/user/script.py", "print('hi')\n")
+                entry.sandbox.commands.run("true")
+        stats = pool.stats()
+    finally:
+        pool.close()
+    return {
+        "runs": runs,
+        "hit_rate": stats["hit_rate"],
+        "misses": stats["misses"],
+        "unpooled_wait_s": round(unpooled_s, 3),
+        "pooled_wait_s": round(stats["acquire_latency_avg_s"] * runs, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--builds", type=int, default=5, help="Builds to replay.")
+    parser.add_argument("--retries", type=int, default=3, help="Debug retries per build.")
+    parser.add_argument("--create-s", type=float, default=0.5, help="Simulated sandbox start time.")
+    args = parser.parse_args()
+    print(json.dumps(measure(args.builds, args.retries, args.create_s), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Search cache benchmark: replays a list of near-identical queries, the way agents issue
+them, through CachedSearch backed by the offline FakeSearch and reports backend calls,
+hit rate and the search latency saved. Queries in the same round run concurrently, so
+identical in-flight queries are coalesced; later rounds are answered from the cache.
+
+    python bench_search.py --delay-s 0.5
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from disk_cache import DiskCache
+from fakes import FakeSearch
+from search_cache import CachedSearch
+
+ROUNDS = [
+    # frontend_agent and backend_agent searching at the same time
+    ["FastAPI CORS example", "fastapi cors example", "FastAPI  CORS example"],
+    ["FastAPI CORS example", " FastAPI CORS Example", "uvicorn run fastapi app"],
+    ["Uvicorn run FastAPI app", "javascript fetch json example"],
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay-s", type=float, default=0.5, help="Simulated latency of one search call.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-search-") as tmp:
+        backend = FakeSearch(delay_s=args.delay_s)
+        search = CachedSearch(backend, DiskCache(os.path.join(tmp, "search.sqlite"), ttl_s=3600))
+        start_time = time.perf_counter()
+        queries = 0
+        for queries_in_round in ROUNDS:
+            with ThreadPoolExecutor(max_workers=len(queries_in_round)) as pool:
+                list(pool.map(search.search, queries_in_round))
+            queries += len(queries_in_round)
+        wall_s = time.perf_counter() - start_time
+
+    print(json.dumps({
+        "queries": queries,
+        "backend_calls": backend.calls,
+        "uncached_wall_s": round(queries * args.delay_s, 3),
+        "wall_s": round(wall_s, 3),
+        **search.stats(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
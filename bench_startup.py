@@ -0,0 +1,89 @@
+"""
+Startup benchmark: how long `import agents` takes, how long building the graph takes
+and how long until the first streamed chunk, each measured in a fresh interpreter.
+
+By default the graph is built from scripted fake models (no API keys needed); --live
+uses the real models and keys from the environment.
+
+    python bench_startup.py --runs 5 --max-import-s 1.5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+def measure_once(live: bool) -> dict:
+    start_time = time.perf_counter()
+    import agents
+    import_s = time.perf_counter() - start_time
+
+    if live:
+        graph = agents.get_graph()
+    else:
+        from langchain_core.tools import tool
+        from fakes import ScriptedChatModel, handoff
+
+        @tool
+        def fake_search(query: str) -> str:
+            """Returns nothing."""
+            return ""
+
+        names = ["planner_agent", "backend_agent", "frontend_agent", "qa_agent"]
+        models = {name: ScriptedChatModel(responses=["done"]) for name in names}
+        script = [handoff(name, f"call_{i}") for i, name in enumerate(names)] + ["All tasks are complete."]
+        graph = agents.build_supervisor(
+            agents.build_agents(models, web_search=fake_search, run_python_code=fake_search),
+            ScriptedChatModel(responses=script),
+        )
+    build_s = time.perf_counter() - start_time - import_s
+
+    user_input = {"messages": [{"role": "user", "content": "Create a FastAPI app that returns the time in India"}]}
+    for _ in graph.stream(user_input, config={"configurable": {"thread_id": f"bench-startup-{time.time()}"}}):
+        break
+    first_chunk_s = time.perf_counter() - start_time
+    return {"import_s": import_s, "build_s": build_s, "first_chunk_s": first_chunk_s}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--live", action="store_true", help="Use real models and API keys from the environment.")
+    parser.add_argument("--max-import-s", type=float, default=None, help="Fail if the median import time is above this.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_once(args.live)))
+        return
+
+    samples = []
+    for _ in range(args.runs):
+        cmd = [sys.executable, "-W", "ignore", __file__, "--child"] + (["--live"] if args.live else [])
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+
+    results = {
+        metric: {
+            "median_s": round(statistics.median(s[metric] for s in samples), 3),
+            "min_s": round(min(s[metric] for s in samples), 3),
+        }
+        for metric in ("import_s", "build_s", "first_chunk_s")
+    }
+    results["runs"] = args.runs
+    results["live"] = args.live
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_import_s is not None and results["import_s"]["median_s"] > args.max_import_s:
+        print(f"Import time budget exceeded: {results['import_s']['median_s']}s > {args.max_import_s}s")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from disk_cache import DiskCache
+from file_edits import atomic_write
+
+# Files each agent writes into the output directory.
+ARTIFACTS = {
+    "planner_agent": [],
+    "backend_agent": ["backend.py"],
+    "frontend_agent": ["index.html"],
+    "qa_agent": ["test_app.py", "readme.md"],
+}
+
+# Words in a plan heading that mark the section as one agent's.
+_SECTION_KEYWORDS = {
+    "backend_agent": ("backend", "api", "server", "endpoint"),
+    "frontend_agent": ("frontend", "front-end", "ui", "html", "client", "interface"),
+    "qa_agent": ("test", "qa", "readme", "quality"),
+}
+_HEADING = re.compile(r"^\s*(#{1,6}\s+.*|\*\*[^*]+\*\*:?\s*|\d+[.)]\s+\S.{0,60}|[A-Z][\w /&()-]{2,50}:)\s*$")
+
+MANIFEST = ".build.json"
+
+
+def _hash(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:24]
+
+
+def plan_sections(plan: str) -> dict:
+    """
+    Splits a plan into the part each agent depends on: text under headings that mention
+    the backend, frontend or tests goes to that agent, everything else is shared by all.
+    Without recognizable headings every agent gets the whole plan.
+    """
+    owners = {agent: [] for agent in _SECTION_KEYWORDS}
+    shared = []
+    current = None
+    for line in plan.splitlines():
+        if _HEADING.match(line):
+            words = set(re.findall(r"[a-z-]+", line.lower()))
+            matches = [agent for agent, keywords in _SECTION_KEYWORDS.items() if words & set(keywords)]
+            current = matches[0] if len(matches) == 1 else None
+        (owners[current] if current else shared).append(line)
+    if not any(owners.values()):
+        return {agent: plan for agent in _SECTION_KEYWORDS}
+    return {agent: "\n".join(shared + lines).strip() for agent, lines in owners.items()}
+
+
+def read_artifacts(output_dir: str, names: list) -> dict:
+    """Contents of the given files in `output_dir` (None for missing ones)."""
+    contents = {}
+    for name in names:
+        path = os.path.join(output_dir, name)
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                contents[name] = f.read()
+        except FileNotFoundError:
+            contents[name] = None
+    return contents
+
+
+def read_manifest(output_dir: str) -> dict:
+    """The request, plan, backend summary and later changes of the app last built into `output_dir`."""
+    try:
+        with open(os.path.join(output_dir, MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_manifest(output_dir: str, **fields) -> None:
+    atomic_write(os.path.join(output_dir, MANIFEST), json.dumps({**fields, "built_at": time.time()}, indent=2))
+
+
+class BuildCache:
+    """
+    Remembers what each agent produced for a given fingerprint of its inputs, so a rebuild
+    can skip agents whose inputs did not change. An entry holds the agent's final summary
+    and the files it wrote. Entries belong to the output directory they were built in, so
+    one session's (or tenant's) files are never restored into another's workspace.
+
+    On a hit the agent is skipped if its files in the output directory are missing (they
+    are restored from the entry) or unchanged; if someone edited them since, the agent
+    runs again so the edit is not overwritten.
+    """
+
+    def __init__(self, store: DiskCache):
+        self.store = store
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "restored_files": 0}
+
+    def key(self, agent_name: str, inputs: dict, output_dir: str) -> str:
+        workspace = os.path.realpath(output_dir)
+        return f"{agent_name}:{_hash({'workspace': workspace, 'inputs': inputs})}"
+
+    def lookup(self, key: str, output_dir: str):
+        """Returns the cached summary if the agent can be skipped, else None."""
+        raw = self.store.get(key)
+        entry = json.loads(raw) if raw is not None else None
+        current = read_artifacts(output_dir, list(entry["artifacts"])) if entry else {}
+        if entry is None or any(current[name] is not None and current[name] != content
+                                for name, content in entry["artifacts"].items()):
+            self._count("misses")
+            return None
+        for name, content in entry["artifacts"].items():
+            if current[name] is None and content is not None:
+                atomic_write(os.path.join(output_dir, name), content)
+                self._count("restored_files")
+        self._count("hits")
+        return entry["summary"]
+
+    def store_result(self, key: str, summary: str, output_dir: str, artifacts: list) -> None:
+        self.store.set(key, json.dumps({"summary": summary, "artifacts": read_artifacts(output_dir, artifacts)}))
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+
+class CompressedSerializer:
+    """Wraps a checkpoint serializer and zlib-compresses payloads above `min_bytes`."""
+
+    prefix = "zlib:"
+
+    def __init__(self, inner=None, min_bytes: int = 512, level: int = 6):
+        self.inner = inner or JsonPlusSerializer()
+        self.min_bytes = min_bytes
+        self.level = level
+
+    def dumps_typed(self, obj) -> tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if len(data) < self.min_bytes:
+            return type_, data
+        return self.prefix + type_, zlib.compress(data, self.level)
+
+    def loads_typed(self, data: tuple[str, bytes]):
+        type_, payload = data
+        if type_.startswith(self.prefix):
+            return self.inner.loads_typed((type_[len(self.prefix):], zlib.decompress(payload)))
+        return self.inner.loads_typed(data)
+
+
+class CompactSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver that keeps on-disk state small for long batch workloads:
+
+    - checkpoint and write payloads are zlib-compressed (the message history in every
+      checkpoint is mostly generated code)
+    - only the newest `keep` checkpoints of each thread/namespace are kept, which is
+      all that resuming needs; older ones and their pending writes are deleted on put
+    - `gc()` removes threads that have not been touched for a while and vacuums
+
+    The async methods run the sync ones in a worker thread, so one compiled graph
+    works for `stream` (app.py) as well as `astream` (batch.py).
+    """
+
+    def __init__(self, conn: sqlite3.Connection, keep: int = 2):
+        super().__init__(conn, serde=CompressedSerializer())
+        self.keep = max(1, keep)
+
+    @classmethod
+    def open(cls, path: str, keep: int = 2) -> "CompactSqliteSaver":
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        saver = cls(conn, keep=keep)
+        saver.setup()
+        return saver
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        # Called from cursor() with the lock already held.
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS thread_activity (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+
+    # --- Writing ---
+    def put(self, config, checkpoint, metadata, new_versions):
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self.cursor() as cur:
+            cur.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+                (thread_id, checkpoint_ns, self.keep - 1),
+            )
+            row = cur.fetchone()
+            if row is not None:
+                # Checkpoint ids are time-ordered, so everything before the oldest kept one goes.
+                for table in ("checkpoints", "writes"):
+                    cur.execute(
+                        f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                        (thread_id, checkpoint_ns, row[0]),
+                    )
+            cur.execute("INSERT OR REPLACE INTO thread_activity (thread_id, updated_at) VALUES (?, ?)",
+                        (thread_id, time.time()))
+        return saved
+
+    def prune(self, thread_ids, *, strategy: str = "keep_latest") -> None:
+        """
+        "keep_latest" keeps only the newest checkpoint of each thread's root graph and
+        drops the per-agent (subgraph) namespaces; "delete" removes the threads.
+        """
+        for thread_id in thread_ids:
+            if strategy == "delete":
+                self.delete_thread(thread_id)
+                continue
+            with self.cursor() as cur:
+                cur.execute("SELECT MAX(checkpoint_id) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ''",
+                            (str(thread_id),))
+                latest = cur.fetchone()[0]
+                for table in ("checkpoints", "writes"):
+                    cur.execute(
+                        f"DELETE FROM {table} WHERE thread_id = ? AND (checkpoint_ns != '' OR checkpoint_id != ?)",
+                        (str(thread_id), latest or ""),
+                    )
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (str(thread_id),))
+
+    def gc(self, max_age_s: float) -> int:
+        """Deletes threads idle for more than `max_age_s` and vacuums. Returns how many went."""
+        with self.cursor() as cur:
+            cur.execute("SELECT thread_id FROM thread_activity WHERE updated_at < ?", (time.time() - max_age_s,))
+            stale = [row[0] for row in cur.fetchall()]
+        for thread_id in stale:
+            self.delete_thread(thread_id)
+        with self.lock:
+            self.conn.execute("VACUUM")
+        return len(stale)
+
+    # --- Reading ---
+    def threads(self, limit: int = 50) -> list[dict]:
+        """Most recently active threads with the metadata of their latest root checkpoint."""
+        with self.cursor(transaction=False) as cur:
+            cur.execute("SELECT thread_id, updated_at FROM thread_activity ORDER BY updated_at DESC LIMIT ?", (limit,))
+            rows = cur.fetchall()
+            threads = []
+            for thread_id, updated_at in rows:
+                cur.execute(
+                    "SELECT metadata FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id,),
+                )
+                row = cur.fetchone()
+                metadata = json.loads(row[0]) if row and row[0] else {}
+                threads.append({"thread_id": thread_id, "updated_at": updated_at,
+                                "step": metadata.get("step"), "metadata": metadata})
+        return threads
+
+    def stats(self) -> dict:
+        with self.cursor(transaction=False) as cur:
+            cur.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(checkpoint)), 0) FROM checkpoints")
+            checkpoints, checkpoint_bytes = cur.fetchone()
+            cur.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM writes")
+            writes, write_bytes = cur.fetchone()
+            cur.execute("SELECT COUNT(*) FROM thread_activity")
+            threads = cur.fetchone()[0]
+        return {"threads": threads, "checkpoints": checkpoints, "writes": writes,
+                "payload_bytes": checkpoint_bytes + write_bytes}
+
+    # --- Async (sync methods in a worker thread) ---
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        for item in await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit))):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id: str, task_path: str = "") -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def resume_state(graph, thread_id: str):
+    """
+    The saved state of a run and whether it can be resumed: a run is resumable when its
+    latest checkpoint still has nodes to execute (it failed or was stopped midway).
+    """
+    state = graph.get_state({"configurable": {"thread_id": thread_id}})
+    return state, bool(state.next)
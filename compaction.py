@@ -0,0 +1,139 @@
+import threading
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+
+class HistoryCompactor:
+    """
+    Shrinks the history an agent sends to its model when the supervisor runs with
+    output_mode="full_history". Used as each agent's `pre_model_hook`, so only the
+    LLM input is compacted; the graph state keeps the full transcript.
+
+    - Everything since the last handoff (the agent's own current turn) is kept as is,
+      so e.g. the backend agent still sees its latest run_python_code output.
+    - The user request, the planner's plan and the backend agent's summary are kept
+      verbatim.
+    - Older tool results, large tool-call arguments (file contents, scripts) and other
+      agents' chatter are cut down to short previews.
+    - If that is still over `token_budget`, the oldest of those messages are dropped
+      (a tool call always together with its results).
+    """
+
+    pinned_agents = ("planner_agent", "backend_agent")
+
+    def __init__(self, token_budget: int = 12000, preview_chars: int = 300):
+        self.token_budget = token_budget
+        self.preview_chars = preview_chars
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def hook(self, agent_name: str):
+        """Returns a pre_model_hook for `agent_name`."""
+        def pre_model_hook(state) -> dict:
+            return {"llm_input_messages": self.compact(state["messages"], agent_name)}
+        return pre_model_hook
+
+    # --- Compaction ---
+    def compact(self, messages: list, agent_name: str = "agent") -> list:
+        boundary = _current_turn_start(messages)
+        prefix, current = messages[:boundary], messages[boundary:]
+        pinned = _pinned_ids(prefix, self.pinned_agents)
+
+        units = []
+        for message in prefix:
+            keep = isinstance(message, HumanMessage) or id(message) in pinned
+            if isinstance(message, ToolMessage) and units and units[-1]["call_ids"] and \
+                    message.tool_call_id in units[-1]["call_ids"]:
+                units[-1]["messages"].append(self._shrink(message))
+                continue
+            call_ids = {c["id"] for c in getattr(message, "tool_calls", None) or []}
+            units.append({"messages": [message if keep else self._shrink(message)],
+                          "call_ids": call_ids, "keep": keep})
+
+        tokens = count_tokens_approximately([m for unit in units for m in unit["messages"]] + current)
+        for unit in units:
+            if tokens <= self.token_budget:
+                break
+            if not unit["keep"]:
+                tokens -= count_tokens_approximately(unit["messages"])
+                unit["messages"] = []
+        compacted = [m for unit in units for m in unit["messages"]] + current
+
+        self._record(agent_name, count_tokens_approximately(messages), count_tokens_approximately(compacted))
+        return compacted
+
+    def _shrink(self, message):
+        if isinstance(message, ToolMessage):
+            text = _text(message.content)
+            if len(text) <= self.preview_chars:
+                return message
+            return message.model_copy(update={"content": self._preview(text)})
+        if isinstance(message, AIMessage):
+            update = {}
+            text = _text(message.content)
+            if len(text) > self.preview_chars:
+                update["content"] = self._preview(text)
+            if message.tool_calls:
+                update["tool_calls"] = [
+                    {**call, "args": {k: self._preview(v) if isinstance(v, str) and len(v) > self.preview_chars else v
+                                      for k, v in call["args"].items()}}
+                    for call in message.tool_calls
+                ]
+            return message.model_copy(update=update) if update else message
+        return message
+
+    def _preview(self, text: str) -> str:
+        return f"{text[:self.preview_chars]}\n[... {len(text) - self.preview_chars} characters omitted from history ...]"
+
+    # --- Report ---
+    def _record(self, agent_name: str, before: int, after: int) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(agent_name, {"calls": 0, "tokens_before": 0, "tokens_after": 0,
+                                                        "max_before": 0, "max_after": 0})
+            stats["calls"] += 1
+            stats["tokens_before"] += before
+            stats["tokens_after"] += after
+            stats["max_before"] = max(stats["max_before"], before)
+            stats["max_after"] = max(stats["max_after"], after)
+
+    def report(self) -> dict:
+        """Prompt tokens per agent (approximate) before and after compaction."""
+        with self._lock:
+            return {
+                name: {**stats, "saved_pct": round(100 * (1 - stats["tokens_after"] / stats["tokens_before"]), 1)
+                       if stats["tokens_before"] else 0.0}
+                for name, stats in self._stats.items()
+            }
+
+    def format_report(self) -> str:
+        lines = [f"{'agent':<16}{'calls':>7}{'tokens before':>16}{'tokens after':>15}{'saved':>8}"]
+        for name, stats in self.report().items():
+            lines.append(f"{name:<16}{stats['calls']:>7}{stats['tokens_before']:>16}"
+                         f"{stats['tokens_after']:>15}{stats['saved_pct']:>7}%")
+        return "\n".join(lines)
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+
+def _current_turn_start(messages: list) -> int:
+    """Index just after the last handoff tool result, i.e. where the current agent's turn begins."""
+    for index in range(len(messages) - 1, -1, -1):
+        message = messages[index]
+        if isinstance(message, ToolMessage) and (message.name or "").startswith("transfer_"):
+            return index + 1
+    return 0
+
+
+def _pinned_ids(messages: list, agents: tuple) -> set:
+    """The last plain answer of each pinned agent (the plan and the backend summary)."""
+    pinned = {}
+    for message in messages:
+        if isinstance(message, AIMessage) and message.name in agents and not message.tool_calls \
+                and _text(message.content).strip():
+            pinned[message.name] = id(message)
+    return set(pinned.values())
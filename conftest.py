@@ -0,0 +1,3 @@
+# Generated apps (output/, batch_output/, workspaces) carry their own test_app.py;
+# those are run by the agents, not by this suite.
+collect_ignore = ["output", "batch_output"]
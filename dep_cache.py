@@ -0,0 +1,312 @@
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import sysconfig
+import tarfile
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+
+def normalize_dependencies(dependencies: list[str]) -> list[str]:
+    """
+    Normalizes a dependency list so that equivalent lists share one cache entry:
+    names are lower-cased with '_'/'.' runs folded to '-', whitespace is dropped,
+    duplicates are removed and the result is sorted.
+    """
+    normalized = set()
+    for dep in dependencies or []:
+        dep = "".join(dep.split())
+        if not dep:
+            continue
+        match = re.match(r"^([A-Za-z0-9][A-Za-z0-9._-]*)(.*)$", dep)
+        if match:
+            name, rest = match.groups()
+            dep = re.sub(r"[-_.]+", "-", name).lower() + rest
+        normalized.add(dep)
+    return sorted(normalized)
+
+
+def local_platform() -> str:
+    """Interpreter and platform tag of this machine, e.g. 'cpython-311-linux-x86_64'."""
+    return f"{sys.implementation.cache_tag}-{sysconfig.get_platform()}"
+
+
+# Prints the same tag as local_platform() on another machine (e.g. inside a sandbox).
+PLATFORM_COMMAND = ("python -c \"import sys, sysconfig; "
+                    "print(sys.implementation.cache_tag + '-' + sysconfig.get_platform())\"")
+
+
+def dependency_key(dependencies: list[str], platform: str = None) -> str:
+    """
+    Content address of a dependency list for one platform (sha256 of its normalized
+    form and the platform tag): wheels built for one interpreter/OS are never offered
+    to another. `platform` defaults to this machine's.
+    """
+    payload = "\n".join(normalize_dependencies(dependencies) + ["@" + (platform or local_platform())])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+class DependencyCache:
+    """
+    Content-addressed cache of wheel sets, keyed by `dependency_key`: the dependency
+    list plus the platform the wheels were built for (this machine unless a method is
+    given another `platform`, such as a sandbox's).
+
+    Each entry is a directory of wheels that can be installed with
+    `pip install --no-index --find-links <dir>`, so repeat runs never hit the
+    package index. Entries are evicted least-recently-used first once the cache
+    grows beyond `max_bytes` or `max_entries`. The index also remembers how long a
+    cold install took, which is what a cache hit saves.
+
+    Builds and installs hold a lock for their key only, so jobs with other
+    dependency sets are not held up by a slow pip run. Entries being built or
+    installed, or leased by a running job (see `lease`), are never evicted.
+    """
+
+    def __init__(self, root: str = ".cache/deps", max_bytes: int = 2 * 1024 ** 3,
+                 wheelhouse: str = None, offline: bool = False, max_entries: int = 1000):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.wheelhouse = wheelhouse
+        self.offline = offline
+        self._lock = threading.RLock()  # guards the index
+        self._key_locks = {}
+        self._leases = {}  # key -> number of running jobs using its site dir
+        self._index_path = os.path.join(root, "index.json")
+        self._saved_s = 0.0
+        os.makedirs(root, exist_ok=True)
+        self._index = self._load_index()
+
+    # --- Index ---
+    def _load_index(self) -> dict:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self) -> None:
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self._index_path)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    # --- Lookup / Store ---
+    def lookup(self, dependencies: list[str], platform: str = None) -> str | None:
+        """Returns the wheel directory for `dependencies` on `platform`, or None on a miss."""
+        key = dependency_key(dependencies, platform)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or not os.path.isdir(self._entry_dir(key)):
+                return None
+            entry["last_used"] = time.time()
+            self._save_index()
+            return self._entry_dir(key)
+
+    def store(self, dependencies: list[str], wheel_dir: str, build_seconds: float, platform: str = None) -> str:
+        """Moves a directory of wheels built for `platform` into the cache and returns its new location."""
+        key = dependency_key(dependencies, platform)
+        dest = self._entry_dir(key)
+        with self._lock:
+            shutil.rmtree(dest, ignore_errors=True)
+            shutil.move(wheel_dir, dest)
+            self._index[key] = {
+                "dependencies": normalize_dependencies(dependencies),
+                "platform": platform or local_platform(),
+                "size": _dir_size(dest),
+                "build_s": round(build_seconds, 3),
+                "install_s": self._index.get(key, {}).get("install_s"),
+                "last_used": time.time(),
+            }
+            self._evict()
+            self._save_index()
+        return dest
+
+    def store_archive(self, dependencies: list[str], archive: bytes, build_seconds: float,
+                      platform: str = None) -> str:
+        """Like `store`, but takes the wheel set as the bytes of a tar archive."""
+        tmp_dir = tempfile.mkdtemp(dir=self.root, prefix="incoming-")
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(tmp_dir, filter="data")
+        return self.store(dependencies, tmp_dir, build_seconds, platform)
+
+    def invalidate(self, dependencies: list[str], platform: str = None) -> None:
+        """Drops an entry whose wheels turned out not to install."""
+        key = dependency_key(dependencies, platform)
+        with self._lock:
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            if self._index.pop(key, None) is not None:
+                self._save_index()
+
+    def build(self, dependencies: list[str]) -> str:
+        """
+        Builds the wheel set for this machine with `pip wheel` and caches it. Uses the
+        configured wheelhouse as an extra source, and as the only source when offline.
+
+        Raises:
+            RuntimeError: If pip cannot build the wheel set.
+        """
+        tmp_dir = tempfile.mkdtemp(dir=self.root, prefix="build-")
+        cmd = [sys.executable, "-m", "pip", "wheel", "--quiet", "-w", tmp_dir]
+        cmd += self.pip_source_args()
+        cmd += normalize_dependencies(dependencies)
+        start_time = time.time()
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+        if proc.returncode != 0:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise RuntimeError(f"pip wheel failed: {proc.stderr.strip()}")
+        return self.store(dependencies, tmp_dir, time.time() - start_time)
+
+    def get_or_build(self, dependencies: list[str]) -> str:
+        with self._key_lock(dependency_key(dependencies)):
+            return self.lookup(dependencies) or self.build(dependencies)
+
+    def site_packages(self, dependencies: list[str]) -> tuple[str, bool]:
+        """
+        Returns a directory with `dependencies` installed (for adding to sys.path) and
+        whether it came from the cache. It is built once from the cached wheel set and
+        lives inside the cache entry, so it is evicted together with the wheels. A
+        cached wheel set that does not install is rebuilt once from the index.
+        """
+        key = dependency_key(dependencies)
+        with self._key_lock(key):
+            wheel_dir = self.lookup(dependencies) or self.build(dependencies)
+            site_dir = os.path.join(wheel_dir, "site")
+            if os.path.isdir(site_dir):
+                return site_dir, True
+            start_time = time.time()
+            try:
+                tmp_dir = self._install(dependencies, wheel_dir)
+            except RuntimeError:
+                if self.offline and not self.wheelhouse:
+                    raise
+                self.invalidate(dependencies)
+                wheel_dir = self.build(dependencies)
+                site_dir = os.path.join(wheel_dir, "site")
+                tmp_dir = self._install(dependencies, wheel_dir)
+            os.replace(tmp_dir, site_dir)
+            with self._lock:
+                entry = self._index[key]
+                entry["size"] = _dir_size(wheel_dir)
+                entry["install_s"] = round((entry.get("build_s") or 0.0) + time.time() - start_time, 3)
+                self._evict()
+                self._save_index()
+            return site_dir, False
+
+    @contextmanager
+    def lease(self, dependencies: list[str]):
+        """
+        `site_packages` for a job that uses the directory while it runs: yields the same
+        (site dir, cache hit) pair and keeps the entry from being evicted until the job ends.
+        """
+        key = dependency_key(dependencies)
+        with self._lock:
+            self._leases[key] = self._leases.get(key, 0) + 1
+        try:
+            yield self.site_packages(dependencies)
+        finally:
+            with self._lock:
+                self._leases[key] -= 1
+                if not self._leases[key]:
+                    del self._leases[key]
+
+    def _install(self, dependencies: list[str], wheel_dir: str) -> str:
+        """Installs a cached wheel set into a new directory inside it and returns that directory."""
+        tmp_dir = tempfile.mkdtemp(dir=wheel_dir, prefix=".site-")
+        proc = subprocess.run(
+            [sys.executable, "-m", "pip", "install", "--quiet", "--no-index", "--find-links", wheel_dir,
+             "--target", tmp_dir, *normalize_dependencies(dependencies)],
+            capture_output=True, text=True, timeout=600,
+        )
+        if proc.returncode != 0:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise RuntimeError(f"pip install failed: {proc.stderr.strip()}")
+        return tmp_dir
+
+    def pip_source_args(self) -> list[str]:
+        args = []
+        if self.wheelhouse:
+            args += ["--find-links", self.wheelhouse]
+        if self.offline:
+            args.append("--no-index")
+        return args
+
+    def archive(self, wheel_dir: str) -> bytes:
+        """Packs a cached wheel directory into tar bytes for uploading to a sandbox."""
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            for name in sorted(os.listdir(wheel_dir)):
+                if name.endswith(".whl"):
+                    tar.add(os.path.join(wheel_dir, name), arcname=name)
+        return buffer.getvalue()
+
+    # --- Install-time accounting ---
+    def record_install(self, dependencies: list[str], seconds: float, platform: str = None) -> None:
+        """Remembers how long a cold (index) install of `dependencies` took."""
+        key = dependency_key(dependencies, platform)
+        with self._lock:
+            entry = self._index.setdefault(key, {"dependencies": normalize_dependencies(dependencies),
+                                                 "platform": platform or local_platform(),
+                                                 "size": 0, "last_used": time.time()})
+            if not entry.get("install_s") or seconds > entry["install_s"]:
+                entry["install_s"] = round(seconds, 3)
+            self._evict()
+            self._save_index()
+
+    def saved_seconds(self, dependencies: list[str], actual_seconds: float = 0.0, platform: str = None) -> float:
+        """Records and returns the install time a cache hit saved for this run."""
+        with self._lock:
+            entry = self._index.get(dependency_key(dependencies, platform)) or {}
+            saved = max(0.0, (entry.get("install_s") or 0.0) - actual_seconds)
+            self._saved_s += saved
+        return round(saved, 3)
+
+    # --- Eviction ---
+    def _in_use(self, key: str) -> bool:
+        """Being built or installed right now, or leased by a running job."""
+        return key in self._leases or (key in self._key_locks and self._key_locks[key].locked())
+
+    def _evict(self) -> None:
+        """Drops least recently used entries until the index fits `max_bytes` and `max_entries`. Call with the lock held."""
+        total = sum(e.get("size", 0) for e in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k].get("last_used", 0)):
+            over_count = len(self._index) > self.max_entries
+            if total <= self.max_bytes and not over_count:
+                break
+            # Entries without wheels (installs recorded for a sandbox) only count against max_entries.
+            if self._in_use(key) or (not over_count and not self._index[key].get("size")):
+                continue
+            total -= self._index[key].get("size", 0)
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            del self._index[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": sum(1 for e in self._index.values() if e.get("size")),
+                "bytes": sum(e.get("size", 0) for e in self._index.values()),
+                "install_saved_s": round(self._saved_s, 3),
+            }
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            total += os.path.getsize(os.path.join(dirpath, name))
+    return total
@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class DiskCache:
+    """
+    A small SQLite-backed key/value store with a per-entry TTL and a bound on the
+    total stored size. When the bound is exceeded the least recently read entries
+    are evicted first. Safe to share between threads.
+    """
+
+    def __init__(self, path: str, ttl_s: float = 24 * 3600, max_bytes: int = 256 * 1024 ** 2):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        """Returns the stored value, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at < now:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key: str, value, ttl_s: float = None) -> None:
+        """Stores a str or bytes value, then evicts entries if the size bound is exceeded."""
+        now = time.time()
+        size = len(value.encode("utf-8") if isinstance(value, str) else value)
+        expires_at = now + (self.ttl_s if ttl_s is None else ttl_s)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, expires_at, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": count, "bytes": total}
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    A deterministic stand-in for a real chat model, for benchmarks and offline runs.
+
+    Replies with `responses` in order (strings or AIMessages, which may carry tool
+    calls), repeating the last one when the script runs out, after sleeping `delay_s`
+    seconds to imitate provider latency (or the next of `delays`, cycling, to imitate
+    varying latency). Tool binding is accepted and ignored.
+    """
+
+    responses: list
+    delay_s: float = 0.0
+    delays: list = None
+    _index: int = PrivateAttr(default=0)
+    _calls: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _next_message(self) -> AIMessage:
+        with self._lock:
+            response = self.responses[min(self._index, len(self.responses) - 1)]
+            self._index += 1
+        if isinstance(response, str):
+            return AIMessage(content=response)
+        # add_messages assigns ids in place, so never hand out the scripted object itself.
+        return response.model_copy(deep=True)
+
+    def _next_delay(self) -> float:
+        if not self.delays:
+            return self.delay_s
+        with self._lock:
+            self._calls += 1
+            return self.delays[(self._calls - 1) % len(self.delays)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._next_delay())
+        return ChatResult(generations=[ChatGeneration(message=self._next_message())])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._next_delay())
+        return ChatResult(generations=[ChatGeneration(message=self._next_message())])
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def handoff(agent_name: str, call_id: str) -> AIMessage:
+    """A supervisor reply that transfers control to `agent_name`."""
+    return AIMessage(content="", tool_calls=[{"name": f"transfer_to_{agent_name}", "args": {}, "id": call_id}])
+
+
+class FakeSearch:
+    """
+    An offline stand-in for TavilySearch: `.invoke({"query": ...})` returns canned
+    results in Tavily's shape after sleeping `delay_s` seconds, and counts its calls.
+    """
+
+    def __init__(self, delay_s: float = 0.0, results: list = None):
+        self.delay_s = delay_s
+        self.results = results
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, input: dict, config=None) -> dict:
+        query = input["query"] if isinstance(input, dict) else str(input)
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay_s)
+        results = self.results or [{
+            "title": f"Result for {query}",
+            "url": "https://example.com/search",
+            "content": f"Example content about {query}.",
+            "score": 1.0,
+        }]
+        return {"query": query, "results": results, "response_time": self.delay_s}
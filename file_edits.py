@@ -0,0 +1,128 @@
+import os
+import re
+import tempfile
+
+
+class EditError(ValueError):
+    """An edit or patch that does not apply cleanly to the file."""
+
+
+def atomic_write(filepath: str, content: str) -> None:
+    """Writes `content` to a temp file next to `filepath` and renames it into place."""
+    directory = os.path.dirname(filepath) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filepath)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_range(text: str, offset: int = None, limit: int = None) -> str:
+    """
+    Returns lines `offset` (1-based) through `offset + limit - 1` prefixed with their
+    line numbers, plus a header saying which part of the file this is.
+    """
+    lines = text.splitlines()
+    start = max(1, offset or 1)
+    end = len(lines) if limit is None else min(len(lines), start + max(0, limit) - 1)
+    width = len(str(end))
+    body = "\n".join(f"{n:>{width}}| {lines[n - 1]}" for n in range(start, end + 1))
+    return f"[lines {start}-{end} of {len(lines)}]\n{body}"
+
+
+def apply_search_replace(text: str, edits: list[dict]) -> str:
+    """
+    Applies search/replace hunks in order. Each hunk is {"search": ..., "replace": ...}
+    and its search text must occur exactly once in the file at that point.
+
+    Raises:
+        EditError: If a hunk is malformed, not found or ambiguous. Nothing is applied then.
+    """
+    if not edits:
+        raise EditError("No edits given.")
+    for number, edit in enumerate(edits, start=1):
+        search, replace = edit.get("search"), edit.get("replace")
+        if not isinstance(search, str) or not isinstance(replace, str) or not search:
+            raise EditError(f"Edit {number}: needs non-empty 'search' and a 'replace' string.")
+        count = text.count(search)
+        if count == 0:
+            raise EditError(f"Edit {number}: search text not found. Read the file again and copy it exactly.")
+        if count > 1:
+            raise EditError(f"Edit {number}: search text occurs {count} times; include more context to make it unique.")
+        text = text.replace(search, replace, 1)
+    return text
+
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def apply_unified_diff(text: str, diff: str, max_drift: int = 50) -> str:
+    """
+    Applies a unified diff to `text`. Hunks are located by their line numbers and, if
+    the file has shifted, by searching up to `max_drift` lines around them for the
+    hunk's context. File headers (---/+++) are optional.
+
+    Raises:
+        EditError: If the diff is malformed or a hunk's context does not match.
+    """
+    lines = text.splitlines(keepends=True)
+    newline = "\r\n" if "\r\n" in text else "\n"
+    hunks = []
+    current = None
+    for raw in diff.splitlines():
+        match = _HUNK_HEADER.match(raw)
+        if match:
+            current = {"start": int(match.group(1)), "old_count": match.group(2), "old": [], "new": []}
+            hunks.append(current)
+        elif raw.startswith(("---", "+++")) and current is None:
+            continue
+        elif current is None:
+            continue
+        elif raw.startswith("\\"):
+            continue  # "\ No newline at end of file"
+        elif raw.startswith("-"):
+            current["old"].append(raw[1:])
+        elif raw.startswith("+"):
+            current["new"].append(raw[1:])
+        else:
+            line = raw[1:] if raw.startswith(" ") else raw
+            current["old"].append(line)
+            current["new"].append(line)
+    if not hunks:
+        raise EditError("No hunks found; expected lines starting with '@@ -a,b +c,d @@'.")
+
+    stripped = [line.rstrip("\r\n") for line in lines]
+    drift = 0
+    for number, hunk in enumerate(hunks, start=1):
+        # '-N,0' (a pure insertion) means "after line N"; otherwise the hunk starts at line N.
+        after = hunk["old_count"] == "0"
+        expected = max(0, hunk["start"] - (0 if after else 1) + drift)
+        position = _find_block(stripped, hunk["old"], expected, max_drift)
+        if position is None:
+            raise EditError(f"Hunk {number}: context does not match the file near line {hunk['start']}.")
+        replacement = [line + newline for line in hunk["new"]]
+        end = position + len(hunk["old"])
+        if end == len(lines) and lines and not lines[-1].endswith(("\n", "\r")) and replacement:
+            # The file has no final newline: keep it that way.
+            if position == len(lines):
+                lines[-1] += newline  # appending after the last line
+            replacement[-1] = replacement[-1].rstrip("\r\n")
+        lines[position:end] = replacement
+        stripped[position:end] = hunk["new"]
+        drift += len(hunk["new"]) - len(hunk["old"])
+    return "".join(lines)
+
+
+def _find_block(lines: list[str], block: list[str], expected: int, max_drift: int):
+    if not block:
+        return min(expected, len(lines))
+    for delta in range(max_drift + 1):
+        for position in (expected - delta, expected + delta):
+            if 0 <= position <= len(lines) - len(block) and lines[position:position + len(block)] == block:
+                return position
+    return None
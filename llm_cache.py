@@ -0,0 +1,69 @@
+import hashlib
+import json
+import threading
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from disk_cache import DiskCache
+
+
+class LLMCache(BaseCache):
+    """
+    Persistent chat-model response cache, passed to a model as `cache=...`.
+
+    LangChain hands the cache the serialized messages as `prompt` and the model name,
+    parameters and bound tool schemas as `llm_string`, so the key covers all of them.
+    Each agent gets its own instance (sharing one `DiskCache`) so hits and misses can
+    be counted per agent.
+    """
+
+    def __init__(self, store: DiskCache, name: str = "default"):
+        self.store = store
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str):
+        value = self.store.get(self._key(prompt, llm_string))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return [_generation_from_dict(item) for item in json.loads(value)]
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        payload = json.dumps([_generation_to_dict(g) for g in return_val])
+        self.store.set(self._key(prompt, llm_string), payload)
+
+    def clear(self, **kwargs) -> None:
+        self.store.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+def _generation_to_dict(generation: Generation) -> dict:
+    if isinstance(generation, ChatGeneration):
+        return {"message": message_to_dict(generation.message), "generation_info": generation.generation_info}
+    return {"text": generation.text, "generation_info": generation.generation_info}
+
+
+def _generation_from_dict(data: dict) -> Generation:
+    if "message" in data:
+        message = messages_from_dict([data["message"]])[0]
+        return ChatGeneration(message=message, generation_info=data.get("generation_info"))
+    return Generation(text=data["text"], generation_info=data.get("generation_info"))
@@ -0,0 +1,297 @@
+"""
+Load test for a generated backend: boots `backend:app` from an output directory under
+uvicorn, drives it with concurrent requests and reports throughput and latency
+percentiles. The endpoints come from the backend agent's summary ("POST /calculate"),
+falling back to the app's OpenAPI schema, and request bodies are filled from example
+JSON in the summary or generated from the schema.
+
+    python loadtest.py output --duration-s 5 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from file_edits import atomic_write
+from test_runner import untrusted_env
+
+RESULTS_FILE = "loadtest.json"
+
+_ENDPOINT = re.compile(r"\b(GET|POST|PUT|PATCH|DELETE)\s+`?(/[\w\-/{}.]*)", re.IGNORECASE)
+
+
+# --- Request specs ---
+def _sample(schema: dict, components: dict):
+    """A plausible value for a JSON schema."""
+    if "$ref" in schema:
+        return _sample(components.get(schema["$ref"].split("/")[-1], {}), components)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if schema.get(key):
+            return _sample(schema[key][0], components)
+    if "example" in schema:
+        return schema["example"]
+    if schema.get("enum"):
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object" or "properties" in schema:
+        return {name: _sample(prop, components) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_sample(schema.get("items", {}), components)]
+    return {"integer": 2, "number": 2.5, "boolean": True}.get(kind, "test")
+
+
+def _summary_examples(summary: str) -> list:
+    """JSON objects quoted in the summary, e.g. example request bodies."""
+    examples = []
+    for match in re.finditer(r"\{[^{}]*\}", summary or ""):
+        try:
+            value = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict) and value:
+            examples.append(value)
+    return examples
+
+
+def build_requests(openapi: dict, summary: str = "") -> list:
+    """
+    Request specs ({"method", "path", "json"}) to drive the app with: the endpoints the
+    summary names that exist in the schema, or every schema operation if it names none.
+    Path parameters are filled with sample values.
+    """
+    components = openapi.get("components", {}).get("schemas", {})
+    operations = {(method.upper(), path): operation
+                  for path, methods in openapi.get("paths", {}).items()
+                  for method, operation in methods.items() if isinstance(operation, dict)}
+    named = {(method.upper(), path.rstrip("/") or "/") for method, path in _ENDPOINT.findall(summary or "")}
+    selected = [key for key in operations if (key[0], key[1].rstrip("/") or "/") in named] or list(operations)
+    examples = _summary_examples(summary)
+
+    specs = []
+    for method, path in selected:
+        operation = operations[(method, path)]
+        for parameter in operation.get("parameters", []):
+            if parameter.get("in") == "path":
+                value = _sample(parameter.get("schema", {}), components)
+                path = path.replace("{" + parameter["name"] + "}", str(value))
+        body = None
+        schema = operation.get("requestBody", {}).get("content", {}).get("application/json", {}).get("schema")
+        if schema is not None:
+            body = _sample(schema, components)
+            if isinstance(body, dict):
+                # Prefer an example from the summary with the same fields: generated values
+                # often fail validation in the app's own logic (e.g. operation="test").
+                body = next((example for example in examples if set(example) == set(body)), body)
+        specs.append({"method": method, "path": path, "json": body})
+    return specs
+
+
+# --- Server ---
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app_dir: str, app: str = "backend:app", timeout_s: float = 20.0):
+    """
+    Boots `app` under uvicorn on a free local port, with a minimal environment (no API
+    keys). Its stderr goes to a temporary file rather than a pipe: a pipe nobody reads
+    fills up once the app logs tracebacks under load and then blocks the server.
+
+    Returns:
+        A tuple of (process, base URL, OpenAPI schema).
+
+    Raises:
+        RuntimeError: If the app does not come up within `timeout_s`.
+    """
+    port = _free_port()
+    log = tempfile.TemporaryFile("w+", encoding="utf-8", errors="replace")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=app_dir, env=untrusted_env(PYTHONDONTWRITEBYTECODE="1"), stdout=subprocess.DEVNULL, stderr=log,
+    )
+    proc.log = log
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            log.seek(0)
+            message = log.read()[-1500:]
+            log.close()
+            raise RuntimeError(f"The app exited during startup: {message}")
+        try:
+            response = httpx.get(f"{base_url}/openapi.json", timeout=1.0)
+            if response.status_code == 200:
+                return proc, base_url, response.json()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    stop_server(proc)
+    raise RuntimeError(f"The app did not start within {timeout_s}s.")
+
+
+def stop_server(proc) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+    proc.log.close()
+
+
+# --- Load generation ---
+def _percentile(ordered: list, q: float):
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))] * 1000, 2)
+
+
+async def generate_load(base_url: str, specs: list, duration_s: float = 5.0, concurrency: int = 16,
+                        warmup_requests: int = 10) -> dict:
+    """
+    Sends requests round-robin over `specs` from `concurrency` workers for `duration_s`.
+    Server errors (5xx) and transport errors count as errors; 4xx responses are
+    counted separately since sample inputs may be rejected on purpose.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    samples = []  # (spec index, latency_s, status or None)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=10.0) as client:
+        for index in range(min(warmup_requests, len(specs) * 2)):
+            spec = specs[index % len(specs)]
+            try:
+                await client.request(spec["method"], spec["path"], json=spec["json"])
+            except httpx.HTTPError:
+                pass
+
+        counter = 0
+        start_time = time.perf_counter()
+        end_time = start_time + duration_s
+
+        async def worker() -> None:
+            nonlocal counter
+            while time.perf_counter() < end_time:
+                index = counter % len(specs)
+                counter += 1
+                spec = specs[index]
+                sent = time.perf_counter()
+                try:
+                    response = await client.request(spec["method"], spec["path"], json=spec["json"])
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = None
+                samples.append((index, time.perf_counter() - sent, status))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start_time
+
+    def stats(selected: list) -> dict:
+        ordered = sorted(latency for _, latency, _ in selected)
+        errors = sum(1 for _, _, status in selected if status is None or status >= 500)
+        return {
+            "requests": len(selected),
+            "throughput_rps": round(len(selected) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": _percentile(ordered, 50), "p95_ms": _percentile(ordered, 95),
+            "p99_ms": _percentile(ordered, 99),
+            "error_rate": round(errors / len(selected), 4) if selected else 0.0,
+            "client_errors": sum(1 for _, _, status in selected if status is not None and 400 <= status < 500),
+        }
+
+    return {
+        **stats(samples), "duration_s": round(elapsed, 2), "concurrency": concurrency,
+        "endpoints": [{"method": spec["method"], "path": spec["path"],
+                       **stats([s for s in samples if s[0] == index])} for index, spec in enumerate(specs)],
+    }
+
+
+# --- Thresholds ---
+def check_thresholds(report: dict, max_p95_ms: float = None, min_rps: float = None,
+                     max_error_rate: float = None) -> list:
+    """Human-readable list of missed thresholds (empty if all are met or unset)."""
+    violations = []
+    if max_p95_ms is not None and report["p95_ms"] is not None and report["p95_ms"] > max_p95_ms:
+        violations.append(f"p95 latency {report['p95_ms']} ms exceeds {max_p95_ms} ms")
+    if min_rps is not None and report["throughput_rps"] < min_rps:
+        violations.append(f"throughput {report['throughput_rps']} req/s is below {min_rps} req/s")
+    if max_error_rate is not None and report["error_rate"] > max_error_rate:
+        violations.append(f"server error rate {report['error_rate']:.1%} exceeds {max_error_rate:.1%}")
+    for endpoint in report.get("endpoints", []):
+        if max_p95_ms is not None and endpoint["p95_ms"] is not None and endpoint["p95_ms"] > max_p95_ms:
+            violations.append(f"{endpoint['method']} {endpoint['path']}: p95 {endpoint['p95_ms']} ms")
+    return violations
+
+
+def thresholds_from_env() -> dict:
+    def number(name: str, default: str):
+        value = os.getenv(name, default)
+        return float(value) if value else None
+    return {"max_p95_ms": number("LOADTEST_MAX_P95_MS", "250"), "min_rps": number("LOADTEST_MIN_RPS", "50"),
+            "max_error_rate": number("LOADTEST_MAX_ERROR_RATE", "0.01")}
+
+
+def run_load_test(app_dir: str, summary: str = "", duration_s: float = 5.0, concurrency: int = 16,
+                  thresholds: dict = None) -> dict:
+    """
+    Boots the app in `app_dir`, load-tests it and saves the report to
+    `<app_dir>/loadtest.json`.
+
+    Returns:
+        The report: overall and per-endpoint "requests", "throughput_rps", "p50_ms",
+        "p95_ms", "p99_ms", "error_rate" and "client_errors", plus "violations" of
+        `thresholds`. If the app cannot be started or exposes no endpoints, "skipped"
+        holds the reason instead.
+    """
+    try:
+        proc, base_url, openapi = start_server(app_dir)
+    except RuntimeError as e:
+        report = {"skipped": str(e), "violations": []}
+    else:
+        try:
+            specs = build_requests(openapi, summary)
+            if specs:
+                report = asyncio.run(generate_load(base_url, specs, duration_s, concurrency))
+                report["violations"] = check_thresholds(report, **(thresholds or {}))
+            else:
+                report = {"skipped": "The app has no endpoints.", "violations": []}
+        finally:
+            stop_server(proc)
+    report["thresholds"] = thresholds or {}
+    report["measured_at"] = time.time()
+    atomic_write(os.path.join(app_dir, RESULTS_FILE), json.dumps(report, indent=2))
+    return report
+
+
+def format_report(report: dict) -> str:
+    """One-line summary plus one line per missed threshold."""
+    if "skipped" in report:
+        return f"Load test skipped: {report['skipped']}"
+    lines = [f"{report['requests']} requests in {report['duration_s']}s at concurrency {report['concurrency']}: "
+             f"{report['throughput_rps']} req/s, p50 {report['p50_ms']} ms, p95 {report['p95_ms']} ms, "
+             f"p99 {report['p99_ms']} ms, {report['error_rate']:.1%} server errors"]
+    lines += [f"MISSED {violation}" for violation in report["violations"]]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("app_dir", nargs="?", default="output")
+    parser.add_argument("--summary", default="", help="Backend summary naming the endpoints to drive.")
+    parser.add_argument("--duration-s", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    report = run_load_test(args.app_dir, args.summary, args.duration_s, args.concurrency, thresholds_from_env())
+    print(format_report(report))
+    raise SystemExit(1 if report["violations"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import codecs
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import threading
+import time
+import venv
+from concurrent.futures import ThreadPoolExecutor, Future
+from contextlib import ExitStack
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, wall clock only.
+    resource = None
+
+from dep_cache import DependencyCache
+from tool_output import LogArtifacts, StreamCapture, bound_text, finish_captures
+
+# Sets the job's rlimits in the child, then execs the job. preexec_fn would do the same
+# between fork and exec, but it can deadlock when the parent has threads, as it does here.
+_LIMITED_EXEC = (
+    "import os, resource, sys; cpu, memory = int(sys.argv[1]), int(sys.argv[2]); "
+    "resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu)); "
+    "resource.setrlimit(resource.RLIMIT_AS, (memory, memory)); "
+    "os.execvp(sys.argv[3], sys.argv[3:])"
+)
+
+
+class LocalExecutor:
+    """
+    Runs scripts on this machine as an alternative to the E2B sandbox.
+
+    Every job gets its own temporary directory and a throwaway virtualenv (created
+    without pip, so it takes milliseconds) that sees the job's dependencies through a
+    `.pth` file pointing at a cached install from `DependencyCache`. The process is
+    started in its own session with CPU-time and address-space limits and is killed
+    when it exceeds the wall-clock limit. At most `max_workers` jobs run at once.
+
+    Output is read as it is produced and bounded to its first `head_chars` and last
+    `tail_chars` characters per stream (see tool_output.py); with `artifacts`, the full
+    output of a truncated job is kept on disk under the returned 'log_id'.
+    """
+
+    def __init__(self, dep_cache: DependencyCache, max_workers: int = 4, cpu_time_s: int = 60,
+                 memory_mb: int = 2048, wall_clock_s: float = 120.0, artifacts: LogArtifacts = None,
+                 head_chars: int = 2000, tail_chars: int = 4000):
+        self.dep_cache = dep_cache
+        self.artifacts = artifacts
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self.max_workers = max_workers
+        self.cpu_time_s = cpu_time_s
+        self.memory_mb = memory_mb
+        self.wall_clock_s = wall_clock_s
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="local-exec")
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, code: str, dependencies: list[str] = None, is_python_script: bool = True) -> Future:
+        """Queues a job and returns a Future resolving to the result dict."""
+        return self._pool.submit(self._run_job, code, dependencies or [], is_python_script, time.time())
+
+    def run(self, code: str, dependencies: list[str] = None, is_python_script: bool = True) -> dict:
+        """
+        Runs `code` (a Python script, or a shell command if `is_python_script` is False).
+
+        Returns:
+            A dict with 'stdout', 'stderr', 'exit_code', 'duration_s', 'install_saved_s' and
+            'queue_s' (time spent waiting for a free worker), plus 'error' if the job could
+            not be run or hit a limit, 'traceback' if it raised, and 'truncated' and
+            'log_id' if its output was cut.
+        """
+        return self.submit(code, dependencies, is_python_script).result()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- Job execution ---
+    def _run_job(self, code: str, dependencies: list[str], is_python_script: bool, submitted_at: float = None) -> dict:
+        start_time = time.time()
+        queue_s = round(start_time - submitted_at, 4) if submitted_at else 0.0
+        job_dir = tempfile.mkdtemp(prefix="local-job-")
+        with self._lock:
+            self._active += 1
+        leases = ExitStack()  # keeps the job's cached dependencies from being evicted while it runs
+        try:
+            install_saved_s = 0.0
+            site_dir = None
+            if dependencies:
+                install_start = time.time()
+                try:
+                    site_dir, hit = leases.enter_context(self.dep_cache.lease(dependencies))
+                except RuntimeError as e:
+                    return {
+                        "stdout": "", "stderr": bound_text(str(e), self.head_chars, self.tail_chars),
+                        "error": "Dependency installation failed.",
+                        "duration_s": round(time.time() - start_time, 3), "queue_s": queue_s,
+                    }
+                if hit:
+                    install_saved_s = self.dep_cache.saved_seconds(dependencies, time.time() - install_start)
+
+            env_dir = os.path.join(job_dir, "venv")
+            python = self._create_venv(env_dir, site_dir)
+            env = {
+                "PATH": os.pathsep.join([os.path.dirname(python), os.environ.get("PATH", "")]),
+                "HOME": job_dir,
+                "VIRTUAL_ENV": env_dir,
+                "PYTHONDONTWRITEBYTECODE": "1",
+            }
+            if is_python_script:
+                script_path = os.path.join(job_dir, "script.py")
+                with open(script_path, "w", encoding="utf-8") as f:
+                    f.write(code)
+                cmd, shell = [python, "-I", script_path], False
+            else:
+                cmd, shell = code, True
+            if resource:
+                cmd, shell = self._limited(cmd if not shell else ["/bin/sh", "-c", cmd]), False
+
+            proc = subprocess.Popen(
+                cmd, shell=shell, cwd=job_dir, env=env,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True,
+            )
+            log_id = self.artifacts.new_id() if self.artifacts else None
+            captures = [
+                StreamCapture(self.head_chars, self.tail_chars,
+                              self.artifacts.path(log_id, stream) if log_id else None)
+                for stream in ("stdout", "stderr")
+            ]
+            readers = [threading.Thread(target=self._pump, args=(pipe, capture), daemon=True)
+                       for pipe, capture in zip((proc.stdout, proc.stderr), captures)]
+            for reader in readers:
+                reader.start()
+            timed_out = False
+            try:
+                proc.wait(timeout=self.wall_clock_s)
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+                timed_out = True
+            for reader in readers:
+                reader.join()
+            output = finish_captures(*captures, log_id)
+            if output.get("truncated") and self.artifacts:
+                self.artifacts.gc()
+            if timed_out:
+                return {
+                    **output, "exit_code": proc.returncode,
+                    "error": f"Execution exceeded the {self.wall_clock_s}s wall-clock limit.",
+                    "duration_s": round(time.time() - start_time, 3), "queue_s": queue_s,
+                    "install_saved_s": install_saved_s,
+                }
+            return {
+                **output,
+                "exit_code": proc.returncode,
+                "duration_s": round(time.time() - start_time, 3),
+                "queue_s": queue_s,
+                "install_saved_s": install_saved_s,
+            }
+        finally:
+            leases.close()
+            with self._lock:
+                self._active -= 1
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    @staticmethod
+    def _pump(pipe, capture: StreamCapture) -> None:
+        """Feeds a process pipe into a capture as output arrives."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        with pipe:
+            while True:
+                data = os.read(pipe.fileno(), 65536)
+                if not data:
+                    break
+                capture.feed(decoder.decode(data))
+        capture.feed(decoder.decode(b"", final=True))
+
+    def _create_venv(self, env_dir: str, site_dir: str = None) -> str:
+        venv.EnvBuilder(with_pip=False, symlinks=(os.name != "nt")).create(env_dir)
+        purelib = sysconfig.get_path("purelib", vars={"base": env_dir, "platbase": env_dir})
+        if site_dir:
+            with open(os.path.join(purelib, "_job_deps.pth"), "w", encoding="utf-8") as f:
+                f.write(os.path.abspath(site_dir) + "\n")
+        if os.name == "nt":
+            return os.path.join(env_dir, "Scripts", "python.exe")
+        return os.path.join(env_dir, "bin", "python")
+
+    def _limited(self, cmd: list) -> list:
+        """`cmd` wrapped so it runs under the CPU-time and memory limits."""
+        return [sys.executable, "-I", "-S", "-c", _LIMITED_EXEC,
+                str(self.cpu_time_s), str(self.memory_mb * 1024 * 1024), *cmd]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"max_workers": self.max_workers, "active": self._active}
@@ -0,0 +1,253 @@
+import operator
+import os
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+
+from build_cache import ARTIFACTS, BuildCache, plan_sections, read_artifacts, read_manifest, write_manifest
+from loadtest import format_report, run_load_test
+from test_runner import run_tests
+
+
+class PipelineState(TypedDict, total=False):
+    messages: Annotated[list, add_messages]
+    # True to change the app already in the output directory instead of building a new one.
+    modify: bool
+    request: str
+    plan: str
+    backend_summary: str
+    # Agents skipped because their inputs were unchanged.
+    reused: Annotated[list, operator.add]
+    # Build cache key of each agent's last result, so fixes can update the entry.
+    cache_keys: Annotated[dict, operator.or_]
+    test_report: dict
+    fix_rounds: int
+    load_report: dict
+    revise_rounds: int
+
+
+def _final_text(result: dict) -> str:
+    """Content of the last message an agent produced."""
+    content = result["messages"][-1].content
+    if isinstance(content, list):
+        content = "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content
+
+
+def _user_request(state: PipelineState) -> str:
+    for message in state["messages"]:
+        if isinstance(message, HumanMessage):
+            return message.content
+    return state["messages"][0].content
+
+
+def build_parallel_pipeline(planner_agent, backend_agent, frontend_agent, qa_agent, checkpointer=None,
+                            build_cache: BuildCache = None, output_dir=None, max_fix_rounds: int = 2,
+                            test_stage: bool = True, load_test: dict = None, on_load_failure: str = "revise",
+                            max_revise_rounds: int = 1):
+    """
+    Builds the planner -> backend -> (frontend || qa) -> join workflow as an explicit
+    LangGraph DAG. Frontend and QA only need the backend summary, so they run in the
+    same step and the graph joins once both are done. Unlike the supervisor, no LLM
+    call is spent on routing.
+
+    The compiled graph takes the same input as the supervisor
+    ({"messages": [{"role": "user", "content": ...}]}) and streams one update per agent.
+    With "modify": True in the input, the message is a change request for the app
+    already in the output directory: the planner updates the saved plan and the agents
+    edit the existing files.
+
+    With a `build_cache`, an agent whose inputs are unchanged since an earlier build is
+    skipped and its summary and files are reused. The inputs are its section of the plan
+    (see build_cache.plan_sections), the backend summary and the upstream files it reads,
+    e.g. backend.py for the QA agent. `output_dir` returns the current output directory;
+    only builds into the same directory share cache entries.
+
+    With `test_stage`, the generated test suite then runs against the backend (see
+    test_runner.py). Failures go back to the agent that owns them, the backend agent for
+    errors raised in backend.py and the QA agent otherwise, for at most `max_fix_rounds`
+    rounds of fix and re-test.
+
+    With `load_test` (keyword arguments for loadtest.run_load_test, e.g. thresholds),
+    the app is then booted and load-tested, and the report is saved next to the files.
+    When thresholds are missed, `on_load_failure` decides what happens next: "revise"
+    sends the report to the backend agent for at most `max_revise_rounds` rounds, then
+    tests and load-tests again; "fail" fails the run; "report" only records it.
+    """
+    output_dir = output_dir or (lambda: "output")
+
+    def run_cached(agent_name: str, inputs: dict, run):
+        """Returns (summary, reused, cache key)."""
+        if build_cache is None:
+            return run(), False, None
+        directory = output_dir()
+        key = build_cache.key(agent_name, inputs, directory)
+        summary = build_cache.lookup(key, directory)
+        if summary is not None:
+            return summary, True, key
+        summary = run()
+        build_cache.store_result(key, summary, directory, ARTIFACTS[agent_name])
+        return summary, False, key
+
+    def edit_note(state: PipelineState, agent_name: str) -> str:
+        """In modify mode, tells an agent to edit its existing files rather than rewrite them."""
+        existing = [name for name, content in read_artifacts(output_dir(), ARTIFACTS[agent_name]).items() if content]
+        if not state.get("modify") or not existing:
+            return ""
+        files = ", ".join(f"'output/{name}'" for name in existing)
+        return (f"\n\nThe app already exists: {files}. Change request:\n{_user_request(state)}\n"
+                "Read the existing file and apply only the changes this needs, using manage_file mode 'edit'.")
+
+    def result(agent_name: str, summary: str, reused: bool, key: str, **update) -> dict:
+        return {**update, "reused": [agent_name] if reused else [], "cache_keys": {agent_name: key} if key else {},
+                "messages": [AIMessage(content=summary, name=agent_name)]}
+
+    def planner(state: PipelineState) -> dict:
+        request = _user_request(state)
+        base = read_manifest(output_dir()) if state.get("modify") else {}
+        if base.get("plan"):
+            task = (f"This app already exists. Original request:\n{base['request']}\n\nCurrent plan:\n{base['plan']}\n\n"
+                    f"Change request:\n{request}\n\nRewrite the plan with the change applied. Keep every part "
+                    "the change does not affect word for word.")
+            inputs = {"plan": base["plan"], "change": request}
+            request = f"{base['request']}\n\nChange request: {request}"
+        else:
+            task, inputs = request, {"request": request}
+        plan, reused, key = run_cached("planner_agent", inputs, lambda: _final_text(
+            planner_agent.invoke({"messages": [HumanMessage(content=task)]})))
+        return result("planner_agent", plan, reused, key, plan=plan, request=request)
+
+    def backend(state: PipelineState) -> dict:
+        task = f"User request:\n{state['request']}\n\nPlan:\n{state['plan']}" + edit_note(state, "backend_agent")
+        summary, reused, key = run_cached(
+            "backend_agent", {"plan": plan_sections(state["plan"])["backend_agent"]},
+            lambda: _final_text(backend_agent.invoke({"messages": [HumanMessage(content=task)]})))
+        return result("backend_agent", summary, reused, key, backend_summary=summary)
+
+    def frontend(state: PipelineState) -> dict:
+        task = f"Plan:\n{state['plan']}\n\nBackend summary:\n{state['backend_summary']}" + edit_note(state, "frontend_agent")
+        summary, reused, key = run_cached(
+            "frontend_agent",
+            {"plan": plan_sections(state["plan"])["frontend_agent"], "backend_summary": state["backend_summary"]},
+            lambda: _final_text(frontend_agent.invoke({"messages": [HumanMessage(content=task)]})))
+        return result("frontend_agent", summary, reused, key)
+
+    def qa(state: PipelineState) -> dict:
+        task = f"Backend summary:\n{state['backend_summary']}" + edit_note(state, "qa_agent")
+        summary, reused, key = run_cached(
+            "qa_agent",
+            {"plan": plan_sections(state["plan"])["qa_agent"], "backend_summary": state["backend_summary"],
+             "files": read_artifacts(output_dir(), ARTIFACTS["backend_agent"])},
+            lambda: _final_text(qa_agent.invoke({"messages": [HumanMessage(content=task)]})))
+        return result("qa_agent", summary, reused, key)
+
+    def save_manifest(state: PipelineState, changes: list = None) -> None:
+        """
+        Writes the manifest of the app in the output directory, after every node that writes
+        files. `changes` are the summaries of edits made after the build (test fixes, load
+        revisions); they are added to the ones already recorded. Without, a new build starts.
+        """
+        directory = output_dir()
+        if not os.path.isdir(directory):
+            return
+        recorded = read_manifest(directory).get("changes", []) if changes is not None else []
+        write_manifest(directory, request=state["request"], plan=state["plan"],
+                       backend_summary=state["backend_summary"], changes=recorded + (changes or []))
+
+    def join(state: PipelineState) -> dict:
+        save_manifest(state)
+        message = "All tasks are complete: plan, backend, frontend, tests and README."
+        if state.get("reused"):
+            message += f" Unchanged, reused from the build cache: {', '.join(state['reused'])}."
+        return {"messages": [AIMessage(content=message, name="supervisor")]}
+
+    def test(state: PipelineState) -> dict:
+        previous = state.get("test_report") or {}
+        report = run_tests(output_dir(), durations=previous.get("durations"))
+        return {"test_report": report,
+                "messages": [AIMessage(content=f"Test run:\n{report['summary']}", name="test_runner")]}
+
+    def after_test(state: PipelineState) -> str:
+        if state["test_report"]["failures"] and state.get("fix_rounds", 0) < max_fix_rounds:
+            return "fix"
+        return after_tests
+
+    def fix(state: PipelineState) -> dict:
+        report = state["test_report"]
+        messages = []
+        for agent_name, agent, target in (("backend_agent", backend_agent, "output/backend.py"),
+                                          ("qa_agent", qa_agent, "output/test_app.py")):
+            failures = [f for f in report["failures"] if f["owner"] == agent_name]
+            if not failures:
+                continue
+            task = (f"The generated test suite fails:\n{report['summary']}\n\nFix the failures marked "
+                    f"[{agent_name}] in '{target}' using manage_file mode 'edit'. Read the file first and change "
+                    "only what the failures need.")
+            summary = _final_text(agent.invoke({"messages": [HumanMessage(content=task)]}))
+            refresh_cache(state, agent_name, summary)
+            messages.append(AIMessage(content=summary, name=agent_name))
+        save_manifest(state, [{"agent": message.name, "summary": message.content} for message in messages])
+        return {"fix_rounds": state.get("fix_rounds", 0) + 1, "messages": messages}
+
+    def refresh_cache(state: PipelineState, agent_name: str, summary: str) -> None:
+        """Keeps an agent's cache entry in line with its fixed files, or the next build would miss."""
+        key = (state.get("cache_keys") or {}).get(agent_name)
+        if build_cache is not None and key:
+            build_cache.store_result(key, summary, output_dir(), ARTIFACTS[agent_name])
+
+    def load(state: PipelineState) -> dict:
+        report = run_load_test(output_dir(), state.get("backend_summary", ""), **load_test)
+        if report["violations"] and on_load_failure == "fail":
+            raise RuntimeError(f"Load test thresholds missed: {'; '.join(report['violations'])}")
+        return {"load_report": report,
+                "messages": [AIMessage(content=f"Load test:\n{format_report(report)}", name="load_tester")]}
+
+    def after_load(state: PipelineState) -> str:
+        if (state["load_report"]["violations"] and on_load_failure == "revise"
+                and state.get("revise_rounds", 0) < max_revise_rounds):
+            return "revise"
+        return END
+
+    def revise(state: PipelineState) -> dict:
+        report = state["load_report"]
+        endpoints = "\n".join(f"{e['method']} {e['path']}: {e['throughput_rps']} req/s, p95 {e['p95_ms']} ms, "
+                              f"{e['error_rate']:.1%} server errors" for e in report["endpoints"])
+        task = (f"A load test of 'output/backend.py' missed its thresholds:\n{format_report(report)}\n\n"
+                f"Per endpoint:\n{endpoints}\n\nRead the file and make it faster and more robust under "
+                "concurrent load (e.g. no blocking calls in async handlers, no per-request setup work) using "
+                "manage_file mode 'edit'. Keep the endpoints, inputs and outputs unchanged.")
+        summary = _final_text(backend_agent.invoke({"messages": [HumanMessage(content=task)]}))
+        refresh_cache(state, "backend_agent", summary)
+        save_manifest(state, [{"agent": "backend_agent", "summary": summary}])
+        return {"revise_rounds": state.get("revise_rounds", 0) + 1,
+                "messages": [AIMessage(content=summary, name="backend_agent")]}
+
+    graph = StateGraph(PipelineState)
+    graph.add_node("planner_agent", planner)
+    graph.add_node("backend_agent", backend)
+    graph.add_node("frontend_agent", frontend)
+    graph.add_node("qa_agent", qa)
+    graph.add_node("join", join)
+    graph.add_edge(START, "planner_agent")
+    graph.add_edge("planner_agent", "backend_agent")
+    graph.add_edge("backend_agent", "frontend_agent")
+    graph.add_edge("backend_agent", "qa_agent")
+    graph.add_edge(["frontend_agent", "qa_agent"], "join")
+    # join -> [test <-> fix] -> [load -> revise -> back to test or load] -> END
+    after_tests = "load" if load_test is not None else END
+    if test_stage:
+        graph.add_node("test", test)
+        graph.add_node("fix", fix)
+        graph.add_edge("join", "test")
+        graph.add_conditional_edges("test", after_test, ["fix", after_tests])
+        graph.add_edge("fix", "test")
+    else:
+        graph.add_edge("join", after_tests)
+    if load_test is not None:
+        graph.add_node("load", load)
+        graph.add_node("revise", revise)
+        graph.add_conditional_edges("load", after_load, ["revise", END])
+        graph.add_edge("revise", "test" if test_stage else "load")
+    return graph.compile(checkpointer=checkpointer)
@@ -0,0 +1,245 @@
+import ast
+import importlib.metadata
+import importlib.util
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from functools import lru_cache
+
+from dep_cache import normalize_dependencies
+from test_runner import untrusted_env
+
+# Distributions whose import name is not their (normalized) project name.
+_IMPORT_NAMES = {
+    "beautifulsoup4": "bs4",
+    "pillow": "PIL",
+    "python-dotenv": "dotenv",
+    "python-multipart": "multipart",
+    "python-jose": "jose",
+    "pyjwt": "jwt",
+    "pyyaml": "yaml",
+    "scikit-learn": "sklearn",
+    "opencv-python": "cv2",
+    "email-validator": "email_validator",
+    "psycopg2-binary": "psycopg2",
+}
+
+# Filename generated code is compiled under, so tracebacks point at its lines.
+_FILENAME = "<generated>"
+
+# Loads the generated app in a child process (code on stdin, app name in argv) and
+# prints {"diagnostics": [{"message", "line"}], "routes": [...]} as JSON.
+_CHILD = '''
+import json, sys, traceback, types
+
+out, sys.stdout = sys.stdout, sys.stderr  # prints of the generated code must not mix with the result
+code, app_name, filename = sys.stdin.read(), sys.argv[1], sys.argv[2]
+
+
+def error_line(exc):
+    if isinstance(exc, SyntaxError) and exc.filename == filename:
+        return exc.lineno
+    frames = [frame for frame in traceback.extract_tb(exc.__traceback__) if frame.filename == filename]
+    return frames[-1].lineno if frames else None
+
+
+result = {"diagnostics": [], "routes": []}
+module = types.ModuleType("generated_app")
+module.__file__ = filename
+sys.modules[module.__name__] = module  # Pydantic resolves forward references through sys.modules.
+try:
+    exec(compile(code, filename, "exec"), module.__dict__)
+    app = getattr(module, app_name)
+    from fastapi.testclient import TestClient
+    with TestClient(app) as client:
+        response = client.get(app.openapi_url or "/openapi.json")
+    if response.status_code != 200:
+        result["diagnostics"].append({"message": f"Building the OpenAPI schema failed with HTTP {response.status_code}.",
+                                      "line": None})
+    else:
+        # The docs and schema routes FastAPI adds itself are not in the schema.
+        result["routes"] = [f"{method} {route.path}" for route in app.routes if getattr(route, "include_in_schema", False)
+                            for method in sorted(route.methods or []) if method != "HEAD"]
+except BaseException as e:  # sys.exit() and KeyboardInterrupt in the generated code are findings too
+    result["diagnostics"].append({"message": f"{type(e).__name__}: {e}", "line": error_line(e)})
+out.write(json.dumps(result))
+'''
+
+
+def _diagnostic(stage: str, message: str, line: int = None, severity: str = "error") -> dict:
+    return {"stage": stage, "severity": severity, "line": line, "message": message}
+
+
+def _project_name(dependency: str) -> str:
+    """'uvicorn[standard]>=0.30' -> 'uvicorn'."""
+    return re.split(r"[\[<>=!~;@ ]", dependency, maxsplit=1)[0]
+
+
+@lru_cache(maxsize=1)
+def _modules_by_distribution() -> dict:
+    """Normalized project name -> top-level modules, for everything installed here."""
+    modules_of = {}
+    for module, dists in importlib.metadata.packages_distributions().items():
+        for dist in dists:
+            modules_of.setdefault(re.sub(r"[-_.]+", "-", dist).lower(), set()).add(module)
+    return modules_of
+
+
+@lru_cache(maxsize=256)
+def _requirements(name: str) -> tuple:
+    try:
+        requirements = importlib.metadata.requires(name) or []
+    except importlib.metadata.PackageNotFoundError:
+        return ()
+    return tuple(re.sub(r"[-_.]+", "-", _project_name(requirement.strip())).lower()
+                 for requirement in requirements if "extra ==" not in requirement)
+
+
+def _provided_modules(dependencies: list[str]) -> set:
+    """
+    Top-level modules importable once `dependencies` are installed: each project's own
+    module plus, for projects installed here, the modules of everything it requires
+    (e.g. fastapi brings starlette and pydantic).
+    """
+    modules_of = _modules_by_distribution()
+    provided = set()
+    pending = [_project_name(dep) for dep in normalize_dependencies(dependencies)]
+    seen = set()
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        provided.add(_IMPORT_NAMES.get(name, name.replace("-", "_")))
+        provided |= modules_of.get(name, set())
+        pending.extend(_requirements(name))
+    return provided
+
+
+def imported_modules(tree: ast.Module) -> dict:
+    """Top-level module name -> first line it is imported on (relative imports excluded)."""
+    modules = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            modules.setdefault(name.split(".")[0], node.lineno)
+    return modules
+
+
+def _defines(tree: ast.Module, name: str) -> bool:
+    for node in tree.body:
+        targets = node.targets if isinstance(node, ast.Assign) else [getattr(node, "target", None)]
+        if any(isinstance(target, ast.Name) and target.id == name for target in targets):
+            return True
+    return False
+
+
+def check_app(code: str, app_name: str = "app", timeout_s: float = 10.0) -> tuple[list, list]:
+    """
+    Imports the code as a module and loads its FastAPI app with TestClient: startup
+    events run and the OpenAPI schema is built, which catches broken routes and models
+    without starting a server. `if __name__ == "__main__"` blocks do not run.
+
+    The code runs in a child process with a minimal environment and a temporary
+    working directory. Module-level code that blocks (e.g. `uvicorn.run(app)`) or exits
+    is reported as a diagnostic; the process group is killed after `timeout_s`.
+
+    Returns:
+        A tuple of (diagnostics, routes as "METHOD /path" strings).
+    """
+    with tempfile.TemporaryDirectory(prefix="prevalidate-") as work_dir:
+        proc = subprocess.Popen(
+            [sys.executable, "-c", _CHILD, app_name, _FILENAME], cwd=work_dir,
+            env=untrusted_env(PYTHONDONTWRITEBYTECODE="1"), text=True,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            start_new_session=(os.name != "nt"),
+        )
+        try:
+            stdout, stderr = proc.communicate(code, timeout=timeout_s)
+        except subprocess.TimeoutExpired:
+            if os.name != "nt":
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+            proc.communicate()
+            return [_diagnostic("app", f"Loading the app did not finish within {timeout_s}s. Module-level code must "
+                                       "not block or start a server; put uvicorn.run() under "
+                                       "`if __name__ == \"__main__\":`.")], []
+    try:
+        result = json.loads(stdout)
+    except json.JSONDecodeError:
+        return [_diagnostic("app", f"The app check crashed (exit code {proc.returncode}): {stderr[-1500:]}")], []
+    return [_diagnostic("app", d["message"], d["line"]) for d in result["diagnostics"]], result["routes"]
+
+
+def validate_code(code: str, dependencies: list[str] = None, app_name: str = "app",
+                  timeout_s: float = 10.0) -> dict:
+    """
+    Checks generated code locally before it is sent to a sandbox, in three stages:
+
+    1. syntax: the code must parse
+    2. imports: every imported module must be in the standard library or provided by
+       `dependencies` (when given); imports nothing local can resolve are warnings
+    3. app: if the code defines `app_name` and its imports are available here, the
+       FastAPI app is loaded with TestClient in a child process, for at most
+       `timeout_s` seconds (see `check_app`)
+
+    Later stages are skipped after an error in an earlier one.
+
+    Returns:
+        A dict with "ok" (no errors), "diagnostics" (dicts with stage, severity, line
+        and message), "routes" and "duration_s".
+    """
+    start_time = time.time()
+    result = {"ok": True, "diagnostics": [], "routes": []}
+
+    def finish() -> dict:
+        result["ok"] = not any(d["severity"] == "error" for d in result["diagnostics"])
+        result["duration_s"] = round(time.time() - start_time, 4)
+        return result
+
+    # --- Syntax ---
+    try:
+        tree = ast.parse(code, filename=_FILENAME)
+    except SyntaxError as e:
+        result["diagnostics"].append(_diagnostic("syntax", f"{e.msg}: {(e.text or '').strip()}", e.lineno))
+        return finish()
+
+    # --- Imports ---
+    provided = _provided_modules(dependencies) if dependencies is not None else set()
+    locally_available = True
+    for module, line in sorted(imported_modules(tree).items(), key=lambda item: item[1]):
+        if module in sys.stdlib_module_names:
+            continue
+        found = importlib.util.find_spec(module) is not None
+        locally_available &= found
+        if module in provided:
+            continue
+        if dependencies is not None:
+            result["diagnostics"].append(_diagnostic(
+                "imports", f"'{module}' is imported but not provided by the dependencies {dependencies}.", line))
+        elif not found:
+            result["diagnostics"].append(_diagnostic(
+                "imports", f"'{module}' is not installed locally; pass it in dependencies.", line, "warning"))
+    if any(d["severity"] == "error" for d in result["diagnostics"]):
+        return finish()
+
+    # --- App load ---
+    if _defines(tree, app_name):
+        if not locally_available or importlib.util.find_spec("fastapi") is None:
+            result["diagnostics"].append(_diagnostic(
+                "app", "App load skipped: not all imports are installed locally.", severity="info"))
+        else:
+            diagnostics, result["routes"] = check_app(code, app_name, timeout_s)
+            result["diagnostics"].extend(diagnostics)
+    return finish()
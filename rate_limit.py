@@ -0,0 +1,225 @@
+import asyncio
+import os
+import threading
+import time
+from contextvars import ContextVar
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from tracing import annotate_span
+
+# Set by LimiterCallback.on_chat_model_start, which LangChain calls just before the
+# model asks its rate limiter for permission, so `acquire` can see the request size.
+_pending_request = ContextVar("pending_llm_request", default=None)
+
+# Requests per minute / tokens per minute used when no <PROVIDER>_RPM / _TPM is set.
+DEFAULT_LIMITS = {
+    "groq": (30, 60_000),
+    "google": (10, 250_000),
+    "cohere": (20, 100_000),
+}
+
+
+class TokenBucket:
+    """Classic token bucket refilled at `rate` per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it is available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def drain(self) -> None:
+        self._refill()
+        self.level = min(self.level, 0.0)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for the 429 / quota errors raised by the Groq, Google and Cohere clients."""
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    name = type(error).__name__
+    if any(marker in name for marker in ("RateLimit", "TooManyRequests", "ResourceExhausted")):
+        return True
+    text = str(error).lower()
+    return "429" in text or "rate limit" in text or "resource exhausted" in text
+
+
+class ProviderLimiter(BaseRateLimiter):
+    """
+    Rate limiter for one provider/model pair, passed to a chat model as `rate_limiter=`.
+
+    Requests must clear three gates: a request token bucket (RPM), a token bucket on
+    estimated prompt + completion tokens (TPM) and an adaptive concurrency limit. The
+    concurrency limit follows AIMD: it grows by 1/limit after each fast success and is
+    halved on a 429 (a slow response shrinks it by 10%). Outcomes are reported through
+    `self.callback`, which must be attached to the same model.
+    """
+
+    def __init__(self, provider: str, model: str, rpm: float, tpm: float, max_concurrency: int = 8,
+                 min_concurrency: int = 1, latency_target_s: float = 30.0,
+                 completion_tokens_estimate: int = 1000, burst_s: float = 10.0):
+        self.provider = provider
+        self.model = model
+        self.requests = TokenBucket(rpm / 60.0, max(1.0, rpm / 60.0 * burst_s))
+        self.tokens = TokenBucket(tpm / 60.0, max(1.0, tpm / 60.0 * burst_s))
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.concurrency_limit = float(max_concurrency)
+        self.latency_target_s = latency_target_s
+        self.completion_tokens_estimate = completion_tokens_estimate
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "rate_limited": 0, "errors": 0, "waited_s": 0.0}
+        self.callback = LimiterCallback(self)
+
+    # --- Acquire ---
+    def _try_acquire(self) -> float:
+        """Takes a slot if all gates are open; otherwise returns how long to wait."""
+        pending = _pending_request.get()
+        tokens = pending["tokens"] if pending else self.completion_tokens_estimate
+        with self._lock:
+            if self.in_flight >= int(self.concurrency_limit):
+                return 0.05
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait > 0:
+                return wait
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            self._counters["requests"] += 1
+        if pending is not None:
+            pending["limiter"] = self
+            pending["started"] = time.monotonic()
+        return 0.0
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        start_time = time.monotonic()
+        while True:
+            wait = self._try_acquire()
+            if wait == 0.0:
+                self._record_wait(start_time)
+                return True
+            if not blocking:
+                return False
+            time.sleep(min(wait, 1.0))
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        start_time = time.monotonic()
+        while True:
+            wait = self._try_acquire()
+            if wait == 0.0:
+                self._record_wait(start_time)
+                return True
+            if not blocking:
+                return False
+            await asyncio.sleep(min(wait, 1.0))
+
+    def _record_wait(self, start_time: float) -> None:
+        waited = time.monotonic() - start_time
+        pending = _pending_request.get()
+        if pending is not None:
+            pending["waited_s"] = waited
+        annotate_span(queue_s=round(waited, 4))
+        with self._lock:
+            self._counters["waited_s"] += waited
+
+    # --- Feedback ---
+    def on_success(self, latency_s: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if latency_s > self.latency_target_s:
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit * 0.9)
+            else:
+                self.concurrency_limit = min(self.max_concurrency,
+                                             self.concurrency_limit + 1.0 / self.concurrency_limit)
+
+    def on_error(self, error: BaseException) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._counters["errors"] += 1
+            if is_rate_limit_error(error):
+                self._counters["rate_limited"] += 1
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+                # Stop everyone else on this model from piling on until the bucket refills.
+                self.requests.drain()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._counters,
+                "waited_s": round(self._counters["waited_s"], 3),
+                "in_flight": self.in_flight,
+                "concurrency_limit": round(self.concurrency_limit, 2),
+            }
+
+
+class LimiterCallback(BaseCallbackHandler):
+    """Feeds request sizes into a ProviderLimiter and reports outcomes back to it."""
+
+    run_inline = True
+
+    def __init__(self, limiter: ProviderLimiter):
+        self.limiter = limiter
+        self._runs = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs) -> None:
+        tokens = count_tokens_approximately(messages[0]) + self.limiter.completion_tokens_estimate
+        pending = {"tokens": tokens, "limiter": None, "started": None, "waited_s": 0.0}
+        self._runs[run_id] = pending
+        _pending_request.set(pending)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs) -> None:
+        pending = self._runs.pop(run_id, None)
+        # Cache hits never acquire, so there is nothing to release for them.
+        if pending and pending["limiter"] is not None:
+            pending["limiter"].on_success(time.monotonic() - pending["started"])
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        pending = self._runs.pop(run_id, None)
+        if pending and pending["limiter"] is not None:
+            pending["limiter"].on_error(error)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str, model: str) -> ProviderLimiter:
+    """
+    Returns the shared limiter for a provider/model pair, creating it on first use.
+    Limits come from <PROVIDER>_RPM / <PROVIDER>_TPM and LLM_MAX_CONCURRENCY.
+    """
+    with _limiters_lock:
+        key = (provider, model)
+        if key not in _limiters:
+            default_rpm, default_tpm = DEFAULT_LIMITS.get(provider, (60, 100_000))
+            _limiters[key] = ProviderLimiter(
+                provider, model,
+                rpm=float(os.getenv(f"{provider.upper()}_RPM", default_rpm)),
+                tpm=float(os.getenv(f"{provider.upper()}_TPM", default_tpm)),
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            )
+        return _limiters[key]
+
+
+def limiter_stats() -> dict:
+    with _limiters_lock:
+        return {f"{provider}/{model}": limiter.stats() for (provider, model), limiter in _limiters.items()}
@@ -0,0 +1,77 @@
+"""
+Lists, resumes and cleans up checkpointed runs (see checkpoints.py).
+
+A run that failed or was interrupted continues from its last checkpoint, so agents
+that already finished are not run again. Its files go to the output directory the
+run was started with.
+
+    python resume.py --list
+    python resume.py streamlit-run-1718000000.123
+    python resume.py --gc --max-age-days 7
+"""
+import argparse
+import time
+
+from agents import (AgentConfig, finish_run, get_checkpointer, get_graph, get_sandbox_pool, output_root,
+                    pretty_print_messages, run_config)
+from checkpoints import resume_state
+
+
+def resume(graph, thread_id: str, stream_mode="updates", **stream_kwargs):
+    """
+    Continues a checkpointed run and yields its stream chunks, like `graph.stream`.
+
+    Raises:
+        ValueError: If there is no saved run with this id or it has already finished.
+    """
+    state, resumable = resume_state(graph, thread_id)
+    if not state.values:
+        raise ValueError(f"No saved run with id {thread_id!r}.")
+    if not resumable:
+        raise ValueError(f"Run {thread_id!r} has already finished.")
+    directory = (state.metadata or {}).get("output_root")
+    token = output_root.set(directory) if directory else None
+    try:
+        yield from graph.stream(None, config=run_config(thread_id), stream_mode=stream_mode, **stream_kwargs)
+    finally:
+        if token is not None:
+            output_root.reset(token)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("thread_id", nargs="?", help="Run to resume.")
+    parser.add_argument("--list", action="store_true", help="List recent runs and whether they can be resumed.")
+    parser.add_argument("--gc", action="store_true", help="Delete runs idle for longer than --max-age-days.")
+    parser.add_argument("--max-age-days", type=float, default=7.0)
+    args = parser.parse_args()
+
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        raise SystemExit("Checkpoints are turned off (CHECKPOINTS=0).")
+
+    if args.gc:
+        removed = checkpointer.gc(args.max_age_days * 86400)
+        print(f"Removed {removed} run(s); {checkpointer.stats()}")
+        return
+
+    graph = get_graph(AgentConfig.from_env())
+    if args.list or not args.thread_id:
+        for thread in checkpointer.threads():
+            _, resumable = resume_state(graph, thread["thread_id"])
+            updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(thread["updated_at"]))
+            print(f"{thread['thread_id']:<40} {updated}  step {thread['step']:<4} "
+                  f"{'resumable' if resumable else 'finished'}")
+        return
+
+    get_sandbox_pool(AgentConfig.from_env().e2b_api_key).start()
+    try:
+        for chunk in resume(graph, args.thread_id):
+            pretty_print_messages(chunk, last_message=True)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    finish_run(args.thread_id)
+
+
+if __name__ == "__main__":
+    main()
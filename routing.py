@@ -0,0 +1,300 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from langchain_core.caches import BaseCache
+from langchain_core.callbacks import AsyncCallbackManager, CallbackManager
+from langchain_core.globals import get_llm_cache
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import message_chunk_to_message
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from tracing import annotate_span
+
+
+class LatencyStats:
+    """Rolling latency and error stats of one model over its last `window` calls."""
+
+    def __init__(self, window: int = 50):
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)  # True for errors
+        self._lock = threading.Lock()
+
+    def record(self, latency_s: float = None, error: bool = False) -> None:
+        with self._lock:
+            self._outcomes.append(error)
+            if not error and latency_s is not None:
+                self._latencies.append(latency_s)
+
+    def percentile(self, q: float):
+        """The q-th percentile (0-100) of recent successful latencies, or None without samples."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(round(q / 100 * (len(latencies) - 1))))]
+
+    @property
+    def samples(self) -> int:
+        with self._lock:
+            return len(self._latencies)
+
+    @property
+    def calls(self) -> int:
+        with self._lock:
+            return len(self._outcomes)
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def snapshot(self) -> dict:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {"samples": self.samples, "error_rate": round(self.error_rate, 3),
+                "p50_s": round(p50, 3) if p50 is not None else None,
+                "p95_s": round(p95, 3) if p95 is not None else None}
+
+
+_stats = {}
+_counters = {"calls": 0, "hedges": 0, "hedge_wins": 0, "failovers": 0}
+_stats_lock = threading.Lock()
+
+# Runs the model calls of synchronous invocations; a hedge needs a second thread.
+_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="routed-llm")
+
+
+def get_latency_stats(name: str) -> LatencyStats:
+    """Stats are shared per model name, so agents using the same model pool their samples."""
+    with _stats_lock:
+        return _stats.setdefault(name, LatencyStats())
+
+
+def _count(counter: str) -> None:
+    with _stats_lock:
+        _counters[counter] += 1
+
+
+class _HedgeLost(Exception):
+    """Stops a sync call whose hedge already won."""
+
+
+def _child_callbacks(run_manager, manager_class):
+    """Callbacks for calls made on behalf of an LLM run, nested under it (LLM run managers have no get_child)."""
+    if run_manager is None:
+        return None
+    manager = manager_class(handlers=[], parent_run_id=run_manager.run_id)
+    manager.set_handlers(run_manager.inheritable_handlers)
+    manager.add_tags(run_manager.inheritable_tags)
+    manager.add_metadata(run_manager.inheritable_metadata)
+    return manager
+
+
+def _uses_cache(model) -> bool:
+    """Whether invoking `model` (or the model a tool binding wraps) goes through an LLM cache."""
+    cache = getattr(getattr(model, "bound", model), "cache", None)
+    if cache is False:
+        return False
+    return isinstance(cache, BaseCache) or get_llm_cache() is not None
+
+
+def routing_stats() -> dict:
+    with _stats_lock:
+        stats, counters = dict(_stats), dict(_counters)
+    return {**counters, "models": {name: s.snapshot() for name, s in stats.items()}}
+
+
+class RoutedChatModel(BaseChatModel):
+    """
+    A chat model that routes each call across `models` (the primary first, then
+    fallbacks, named by `names`) and hedges slow calls.
+
+    The call goes to the first healthy model. A model is unhealthy once at least
+    `min_samples` recent calls have an error rate of `max_error_rate` or more. If no
+    answer has arrived by the deadline, a duplicate request goes to the next model.
+    The deadline is the model's rolling p95 latency times `hedge_multiplier`, but at
+    least `hedge_min_s`, and `hedge_default_s` until there are `min_samples`
+    latencies. If a call fails, the next model is tried right away. The first good
+    response wins.
+
+    The losing request is cancelled: on the async path its task is cancelled, on the
+    sync path calls are streamed and the loser's stream is closed at its next chunk.
+    Models with an LLM cache are invoked instead, since streaming bypasses the cache,
+    and like models that do not stream they run to completion and their result is
+    dropped. The loser's latency still goes into the stats.
+
+    Tool binding is forwarded to every model. Calls run in the caller's context with
+    this run's child callbacks, so tracing and token streaming see them nested under
+    the routed call, which is annotated with the model that answered. Each model's
+    own callbacks, such as its rate limiter, still fire.
+    """
+
+    models: list
+    names: list
+    hedge_min_s: float = 2.0
+    hedge_default_s: float = 30.0
+    hedge_multiplier: float = 1.0
+    min_samples: int = 5
+    max_error_rate: float = 0.5
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"models": list(self.names)}
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"models": [model.bind_tools(tools, **kwargs) for model in self.models]})
+
+    # --- Routing ---
+    def _order(self) -> list:
+        """Candidate indices: healthy models first, keeping the configured order."""
+        def unhealthy(index: int) -> bool:
+            stats = get_latency_stats(self.names[index])
+            return stats.calls >= self.min_samples and stats.error_rate >= self.max_error_rate
+        return sorted(range(len(self.models)), key=unhealthy)
+
+    def _deadline(self, index: int) -> float:
+        stats = get_latency_stats(self.names[index])
+        if stats.samples < self.min_samples:
+            return self.hedge_default_s
+        return max(self.hedge_min_s, stats.percentile(95) * self.hedge_multiplier)
+
+    def _call(self, index: int, messages, cancelled: threading.Event, callbacks=None, **kwargs):
+        start_time = time.time()
+        try:
+            model = self.models[index]
+            if _uses_cache(model):
+                message = model.invoke(messages, config={"callbacks": callbacks}, **kwargs)
+                get_latency_stats(self.names[index]).record(time.time() - start_time)
+                return message
+            message = None
+            stream = model.stream(messages, config={"callbacks": callbacks}, **kwargs)
+            try:
+                for chunk in stream:
+                    if cancelled.is_set():
+                        raise _HedgeLost()
+                    message = chunk if message is None else message + chunk
+            finally:
+                stream.close()
+            if message is None:
+                raise ValueError(f"{self.names[index]} returned no message.")
+        except _HedgeLost:
+            # A lost hedge took at least this long; leaving it out would bias p95 low.
+            get_latency_stats(self.names[index]).record(time.time() - start_time)
+            raise
+        except Exception:
+            get_latency_stats(self.names[index]).record(error=True)
+            raise
+        get_latency_stats(self.names[index]).record(time.time() - start_time)
+        return message_chunk_to_message(message)
+
+    async def _acall(self, index: int, messages, callbacks=None, **kwargs):
+        start_time = time.time()
+        try:
+            message = await self.models[index].ainvoke(messages, config={"callbacks": callbacks}, **kwargs)
+        except asyncio.CancelledError:
+            # A lost hedge took at least this long; leaving it out would bias p95 low.
+            get_latency_stats(self.names[index]).record(time.time() - start_time)
+            raise
+        except Exception:
+            get_latency_stats(self.names[index]).record(error=True)
+            raise
+        get_latency_stats(self.names[index]).record(time.time() - start_time)
+        return message
+
+    def _result(self, message, index: int, hedged: bool) -> ChatResult:
+        name = self.names[index]
+        annotate_span(routed_to=name, hedged=hedged)
+        message.response_metadata = {**(message.response_metadata or {}), "routed_to": name, "hedged": hedged}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        _count("calls")
+        if stop is not None:
+            kwargs["stop"] = stop
+        order = self._order()
+        callbacks = _child_callbacks(run_manager, CallbackManager)
+        cancelled = threading.Event()
+        running = {}  # future -> candidate index
+        next_candidate, error, hedged = 0, None, False
+
+        def launch() -> None:
+            nonlocal next_candidate
+            index = order[next_candidate]
+            next_candidate += 1
+            # Each call gets its own copy of this context: spans and limiter state stay nested.
+            context = contextvars.copy_context()
+            running[_pool.submit(context.run, self._call, index, messages, cancelled, callbacks, **kwargs)] = index
+
+        launch()
+        while running:
+            can_hedge = next_candidate < len(order)
+            timeout = self._deadline(order[next_candidate - 1]) if can_hedge and not hedged else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Deadline passed without an answer: hedge with the next model.
+                _count("hedges")
+                hedged = True
+                launch()
+                continue
+            for future in done:
+                index = running.pop(future)
+                if future.exception() is None:
+                    cancelled.set()
+                    for loser in running:
+                        loser.cancel()
+                    if hedged and index != order[0]:
+                        _count("hedge_wins")
+                    return self._result(future.result(), index, hedged)
+                error = future.exception()
+            if not running and next_candidate < len(order):
+                _count("failovers")
+                launch()
+        raise error
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        _count("calls")
+        if stop is not None:
+            kwargs["stop"] = stop
+        order = self._order()
+        callbacks = _child_callbacks(run_manager, AsyncCallbackManager)
+        running = {}  # task -> candidate index
+        next_candidate, error, hedged = 0, None, False
+
+        def launch() -> None:
+            nonlocal next_candidate
+            index = order[next_candidate]
+            next_candidate += 1
+            running[asyncio.ensure_future(self._acall(index, messages, callbacks, **kwargs))] = index
+
+        launch()
+        try:
+            while running:
+                can_hedge = next_candidate < len(order)
+                timeout = self._deadline(order[next_candidate - 1]) if can_hedge and not hedged else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    _count("hedges")
+                    hedged = True
+                    launch()
+                    continue
+                for task in done:
+                    index = running.pop(task)
+                    if task.exception() is None:
+                        if hedged and index != order[0]:
+                            _count("hedge_wins")
+                        return self._result(task.result(), index, hedged)
+                    error = task.exception()
+                if not running and next_candidate < len(order):
+                    _count("failovers")
+                    launch()
+            raise error
+        finally:
+            for task in running:
+                task.cancel()
@@ -0,0 +1,407 @@
+import atexit
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+
+# --- Backends ---
+class SandboxBackend:
+    """
+    Interface the pool uses to manage sandboxes. A sandbox object must expose
+    `commands.run(cmd, timeout=..., on_stdout=..., on_stderr=...)` (returning an object
+    with `stdout`, `stderr` and `exit_code`) and `files.write(path, content)`, like the
+    E2B Sandbox does.
+    """
+
+    def create(self):
+        raise NotImplementedError
+
+    def is_healthy(self, sandbox) -> bool:
+        """Whether the sandbox still works; may also extend its lifetime."""
+        return True
+
+    def reset(self, sandbox) -> None:
+        """Clears per-use state so the next caller gets a clean sandbox."""
+
+    def close(self, sandbox) -> None:
+        pass
+
+
+# Home directory entries that survive a reset besides those the sandbox started with:
+# cached wheels and pip's user site/cache, so installed packages stay usable.
+_KEEP_ON_RESET = ("wheels", ".local", ".cache", ".pool-baseline")
+
+
+class E2BSandboxBackend(SandboxBackend):
+    """
+    Creates real E2B sandboxes. Installed packages survive a reset; anything else a
+    caller left in /home/user, and its processes, don't.
+    """
+
+    def __init__(self, api_key: str = None, lifetime_s: int = 900):
+        self.api_key = api_key
+        self.lifetime_s = lifetime_s
+
+    def create(self):
+        from e2b_code_interpreter import Sandbox
+        sandbox = Sandbox.create(api_key=self.api_key, timeout=self.lifetime_s)
+        sandbox.commands.run("ls -A /home/user > /home/user/.pool-baseline", timeout=30)
+        return sandbox
+
+    def is_healthy(self, sandbox) -> bool:
+        try:
+            if not sandbox.is_running():
+                return False
+            # Push the expiry out again so an acquired sandbox doesn't die mid-run.
+            sandbox.set_timeout(self.lifetime_s)
+            return True
+        except Exception:
+            return False
+
+    def reset(self, sandbox) -> None:
+        for proc in sandbox.commands.list():
+            sandbox.commands.kill(proc.pid)
+        keep = "|".join(name.replace(".", "\\.") for name in _KEEP_ON_RESET)
+        sandbox.commands.run(
+            f"cd /home/user && ls -A | grep -vxF -f .pool-baseline | grep -vxE '{keep}' "
+            f"| xargs -r -d '\\n' rm -rf --", timeout=30,
+        )
+
+    def close(self, sandbox) -> None:
+        sandbox.kill()
+
+
+@dataclass
+class LocalCommandResult:
+    stdout: str
+    stderr: str
+    exit_code: int
+
+
+class LocalSandbox:
+    """
+    A stand-in for an E2B sandbox backed by a temporary directory on this machine.
+    Paths under /home/user are mapped into that directory. It provides no isolation
+    and is meant for tests and offline development only.
+    """
+
+    home = "/home/user"
+
+    def __init__(self):
+        self.root = tempfile.mkdtemp(prefix="local-sandbox-")
+        self.commands = self
+        self.files = self
+        self.closed = False
+
+    def _map(self, text: str) -> str:
+        return text.replace(self.home, self.root)
+
+    def run(self, cmd: str, timeout: int = 60, on_stdout=None, on_stderr=None) -> LocalCommandResult:
+        """The output callbacks get the whole output once the command has finished."""
+        try:
+            proc = subprocess.run(
+                self._map(cmd), shell=True, cwd=self.root,
+                capture_output=True, text=True, timeout=timeout,
+            )
+            result = LocalCommandResult(proc.stdout, proc.stderr, proc.returncode)
+        except subprocess.TimeoutExpired as e:
+            stdout = e.stdout.decode(errors="replace") if isinstance(e.stdout, bytes) else e.stdout or ""
+            result = LocalCommandResult(stdout, f"Command timed out after {timeout}s", -1)
+        for callback, text in ((on_stdout, result.stdout), (on_stderr, result.stderr)):
+            if callback and text:
+                callback(text)
+        return result
+
+    def write(self, path: str, content) -> None:
+        local_path = self._map(path)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with open(local_path, "wb" if isinstance(content, bytes) else "w") as f:
+            f.write(content)
+
+    def read(self, path: str, format: str = "text"):
+        with open(self._map(path), "rb" if format == "bytes" else "r") as f:
+            return f.read()
+
+
+class LocalSandboxBackend(SandboxBackend):
+    def create(self):
+        return LocalSandbox()
+
+    def is_healthy(self, sandbox) -> bool:
+        return not sandbox.closed and os.path.isdir(sandbox.root)
+
+    def reset(self, sandbox) -> None:
+        for name in os.listdir(sandbox.root):
+            if name in _KEEP_ON_RESET:
+                continue
+            path = os.path.join(sandbox.root, name)
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    def close(self, sandbox) -> None:
+        sandbox.closed = True
+        shutil.rmtree(sandbox.root, ignore_errors=True)
+
+
+# --- Pool ---
+@dataclass
+class PooledSandbox:
+    sandbox: object
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    last_checked: float = field(default_factory=time.monotonic)
+    uses: int = 0
+    # Dependency-set keys already installed in this sandbox (see dep_cache.dependency_key).
+    installed: set = field(default_factory=set)
+    # Interpreter and platform tag of the sandbox (see dep_cache.local_platform), once known.
+    platform: str = None
+
+
+class SandboxPool:
+    """
+    Keeps between `min_size` and `max_size` sandboxes alive so that `run_python_code`
+    (and especially its debug retries) can reuse a warm sandbox instead of paying the
+    cold start every call.
+
+    A background thread pre-warms the pool up to `min_size` and evicts sandboxes that
+    have been idle for longer than `idle_timeout` seconds while the pool is above
+    `min_size`. Sandboxes are health-checked on acquire and reset on release; idle
+    ones are also checked every `health_check_interval` seconds, which for E2B extends
+    their lifetime, and dead ones are replaced, so the warm pool outlives quiet spells.
+    """
+
+    def __init__(self, backend: SandboxBackend, min_size: int = 1, max_size: int = 4,
+                 idle_timeout: float = 300.0, maintain_interval: float = 15.0,
+                 health_check_interval: float = 60.0):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("SandboxPool needs 1 <= max_size and min_size <= max_size")
+        self.backend = backend
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.maintain_interval = maintain_interval
+        self.health_check_interval = health_check_interval
+
+        self._idle = deque()
+        self._in_use = 0
+        self._creating = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = threading.Event()
+
+        self._acquire_latencies = deque(maxlen=1000)
+        self._counters = {"acquires": 0, "hits": 0, "misses": 0, "created": 0,
+                          "evicted": 0, "unhealthy": 0, "reset_failures": 0}
+
+    # --- Lifecycle ---
+    def start(self) -> None:
+        """Starts background pre-warming. Safe to call more than once."""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._maintain, name="sandbox-pool", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def close(self) -> None:
+        self._stopped.set()
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for entry in idle:
+            self._close(entry)
+
+    def _total(self) -> int:
+        return len(self._idle) + self._in_use + self._creating
+
+    def _maintain(self) -> None:
+        while not self._stopped.is_set():
+            self._evict_idle()
+            self._check_idle()
+            self._prewarm()
+            self._stopped.wait(self.maintain_interval)
+
+    def _prewarm(self) -> None:
+        while not self._stopped.is_set():
+            with self._cond:
+                if self._total() >= self.min_size:
+                    return
+                self._creating += 1
+            entry = None
+            try:
+                entry = PooledSandbox(self.backend.create())
+                self._count("created")
+            except Exception:
+                return
+            finally:
+                with self._cond:
+                    self._creating -= 1
+                    if entry is not None:
+                        self._idle.append(entry)
+                    self._cond.notify()
+
+    def _evict_idle(self) -> None:
+        now = time.monotonic()
+        evicted = []
+        with self._cond:
+            while self._idle and self._total() > self.min_size:
+                oldest = min(self._idle, key=lambda e: e.last_used)
+                if now - oldest.last_used < self.idle_timeout:
+                    break
+                self._idle.remove(oldest)
+                evicted.append(oldest)
+        for entry in evicted:
+            self._count("evicted")
+            self._close(entry)
+
+    def _check_idle(self) -> None:
+        """Health-checks idle sandboxes not checked for `health_check_interval` and drops dead ones."""
+        now = time.monotonic()
+        with self._cond:
+            due = [e for e in self._idle if now - e.last_checked >= self.health_check_interval]
+        for entry in due:
+            if self._stopped.is_set():
+                return
+            healthy = self.backend.is_healthy(entry.sandbox)
+            entry.last_checked = time.monotonic()
+            if healthy:
+                continue
+            with self._cond:
+                if entry not in self._idle:
+                    continue  # acquired meanwhile; acquire checks it again
+                self._idle.remove(entry)
+            self._count("unhealthy")
+            self._close(entry)
+
+    def _close(self, entry: PooledSandbox) -> None:
+        try:
+            self.backend.close(entry.sandbox)
+        except Exception:
+            pass
+
+    # --- Acquire / Release ---
+    def acquire(self, timeout: float = None) -> PooledSandbox:
+        """
+        Returns a healthy sandbox, reusing a warm one when possible.
+
+        Raises:
+            TimeoutError: If the pool is at `max_size` and nothing is released in time.
+        """
+        self.start()
+        start_time = time.monotonic()
+        deadline = None if timeout is None else start_time + timeout
+        while True:
+            entry, create = None, False
+            with self._cond:
+                while not self._idle and self._total() >= self.max_size:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No sandbox available within {timeout}s")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    create = True
+                self._in_use += 1
+
+            if create:
+                try:
+                    entry = PooledSandbox(self.backend.create())
+                except Exception:
+                    self._give_back_slot()
+                    raise
+                self._count("created")
+                self._record_acquire(start_time, hit=False)
+                return self._checkout(entry)
+
+            if self.backend.is_healthy(entry.sandbox):
+                self._record_acquire(start_time, hit=True)
+                return self._checkout(entry)
+
+            self._count("unhealthy")
+            self._close(entry)
+            self._give_back_slot()
+
+    def release(self, entry: PooledSandbox, discard: bool = False) -> None:
+        """
+        Resets the sandbox and returns it to the pool, or closes it if `discard` is set
+        or the pool has been closed.
+        """
+        if not discard:
+            try:
+                self.backend.reset(entry.sandbox)
+            except Exception:
+                self._count("reset_failures")
+                discard = True
+        entry.last_used = entry.last_checked = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            stopped = self._stopped.is_set()
+            if not discard and not stopped:
+                self._idle.append(entry)
+            self._cond.notify()
+        if discard or stopped:
+            self._close(entry)
+        if discard:
+            self._prewarm_async()
+
+    @contextmanager
+    def sandbox(self, timeout: float = None):
+        """Context manager that acquires a PooledSandbox and releases it afterwards."""
+        entry = self.acquire(timeout=timeout)
+        try:
+            yield entry
+        finally:
+            # A failing script (E2B raises on non-zero exit) doesn't poison the sandbox;
+            # a failed reset or the next health check weeds out broken ones.
+            self.release(entry)
+
+    def _checkout(self, entry: PooledSandbox) -> PooledSandbox:
+        entry.uses += 1
+        return entry
+
+    def _give_back_slot(self) -> None:
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify()
+
+    def _prewarm_async(self) -> None:
+        if not self._stopped.is_set():
+            threading.Thread(target=self._prewarm, daemon=True).start()
+
+    def _count(self, counter: str) -> None:
+        with self._cond:
+            self._counters[counter] += 1
+
+    def _record_acquire(self, start_time: float, hit: bool) -> None:
+        with self._cond:
+            self._acquire_latencies.append(time.monotonic() - start_time)
+            self._counters["acquires"] += 1
+            self._counters["hits" if hit else "misses"] += 1
+
+    # --- Metrics ---
+    def stats(self) -> dict:
+        """Returns acquire latency, hit rate and pool size counters."""
+        with self._cond:
+            latencies = sorted(self._acquire_latencies)
+            counters = dict(self._counters)
+            idle, in_use = len(self._idle), self._in_use
+        acquires = counters["acquires"]
+        return {
+            **counters,
+            "hit_rate": round(counters["hits"] / acquires, 3) if acquires else 0.0,
+            "acquire_latency_avg_s": round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+            "acquire_latency_p95_s": round(latencies[int(0.95 * (len(latencies) - 1))], 4) if latencies else 0.0,
+            "acquire_latency_max_s": round(latencies[-1], 4) if latencies else 0.0,
+            "idle": idle,
+            "in_use": in_use,
+        }
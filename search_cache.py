@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+from langchain_core.tools import tool
+
+from disk_cache import DiskCache
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key for a search query: lower-cased with runs of whitespace collapsed, so
+    "FastAPI CORS example" and " fastapi  CORS example" share one entry. Word order and
+    punctuation are kept: "python to rust" and "rust to python" are different searches.
+    """
+    return " ".join(query.lower().split())
+
+
+class CachedSearch:
+    """
+    Wraps a search backend (anything with `.invoke({"query": ...})`, e.g. TavilySearch)
+    with a disk-backed TTL cache and in-flight coalescing: while one call for a query
+    is running, identical queries from other agents/threads wait for its result instead
+    of calling the backend again.
+    """
+
+    def __init__(self, backend, store: DiskCache = None):
+        self.backend = backend
+        self.store = store
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._counters = {"hits": 0, "misses": 0, "coalesced": 0, "latency_saved_s": 0.0}
+
+    def search(self, query: str):
+        key = normalize_query(query)
+        if self.store is not None:
+            cached = self.store.get(key)
+            if cached is not None:
+                entry = json.loads(cached)
+                with self._lock:
+                    self._counters["hits"] += 1
+                    self._counters["latency_saved_s"] += entry["latency_s"]
+                return entry["result"]
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self._counters["misses"] += 1
+            else:
+                self._counters["coalesced"] += 1
+        if not leader:
+            start_time = time.monotonic()
+            result = future.result()
+            with self._lock:
+                self._counters["latency_saved_s"] += future.latency_s - (time.monotonic() - start_time)
+            return result
+
+        start_time = time.monotonic()
+        # The in-flight entry goes last: until the result is stored, an identical query
+        # must still find it, or it would call the backend again.
+        try:
+            result = self.backend.invoke({"query": query})
+            future.latency_s = time.monotonic() - start_time
+            if self.store is not None and not (isinstance(result, dict) and result.get("error")):
+                self.store.set(key, json.dumps({"result": result, "latency_s": future.latency_s}, default=str))
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"] + self._counters["coalesced"]
+            return {
+                **self._counters,
+                "latency_saved_s": round(self._counters["latency_saved_s"], 3),
+                "hit_rate": round((lookups - self._counters["misses"]) / lookups, 3) if lookups else 0.0,
+            }
+
+
+def create_web_search_tool(search: CachedSearch):
+    """Exposes a CachedSearch to the agents as the `web_search` tool."""
+
+    @tool
+    def web_search(query: str):
+        """
+        Searches the web and returns the top results (title, url and content) for the query.
+        Use it to look up library usage, API examples or error messages.
+        """
+        return search.search(query)
+
+    return web_search
@@ -0,0 +1,220 @@
+import importlib.util
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# pytest plugin loaded into every shard: records nodeid, outcome, duration and the
+# failure text of each test as JSON, which is simpler to merge than junit XML.
+_PLUGIN = '''
+import json, os
+
+_results = []
+
+def pytest_runtest_logreport(report):
+    if report.when == "call" or not report.passed:
+        _results.append({"nodeid": report.nodeid, "when": report.when, "outcome": report.outcome,
+                         "duration_s": round(report.duration, 4),
+                         "longrepr": report.longreprtext if report.failed else ""})
+
+def pytest_collectreport(report):
+    if report.failed:
+        _results.append({"nodeid": report.nodeid or "<collection>", "when": "collect", "outcome": "failed",
+                         "duration_s": 0.0, "longrepr": report.longreprtext})
+
+def pytest_sessionfinish(session):
+    with open(os.environ["AUTODEV_TEST_RESULTS"], "w", encoding="utf-8") as f:
+        json.dump(_results, f)
+'''
+_PLUGIN_NAME = "_autodev_results"
+
+# Autoloading every installed pytest plugin (langsmith, ...) costs more than running a
+# typical generated suite; only the async plugins such suites may rely on are loaded.
+_EXTRA_PLUGINS = ("anyio.pytest_plugin", "pytest_asyncio.plugin")
+
+_LOCATION = re.compile(r"^([^\s:]+\.py):(\d+):", re.MULTILINE)
+
+
+# Host variables passed on to generated code. Everything else, API keys included, stays here.
+_ENV_ALLOWLIST = ("PATH", "HOME", "LANG", "LC_ALL", "TMPDIR", "TEMP", "TMP", "SYSTEMROOT", "PYTHONPATH")
+
+
+def untrusted_env(**extra) -> dict:
+    """A minimal environment for subprocesses that run generated code, plus `extra`."""
+    env = {name: os.environ[name] for name in _ENV_ALLOWLIST if name in os.environ}
+    env.update(extra)
+    return env
+
+
+def _installed(module: str) -> bool:
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+def _pytest(args: list, cwd: str, plugin_dir: str, results_path: str, python: str, timeout_s: float):
+    env = untrusted_env(
+        PYTHONPATH=os.pathsep.join(filter(None, [plugin_dir, cwd, os.environ.get("PYTHONPATH")])),
+        PYTHONDONTWRITEBYTECODE="1",
+        AUTODEV_TEST_RESULTS=results_path,
+        PYTEST_DISABLE_PLUGIN_AUTOLOAD="1",
+    )
+    plugins = [_PLUGIN_NAME] + [name for name in _EXTRA_PLUGINS if _installed(name)]
+    cmd = [python, "-m", "pytest", *[arg for name in plugins for arg in ("-p", name)],
+           "-p", "no:cacheprovider", "-q", "--no-header", *args]
+    return subprocess.run(cmd, cwd=cwd, env=env, capture_output=True, text=True, timeout=timeout_s)
+
+
+def _load_results(path: str) -> list:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+
+def plan_shards(nodeids: list, workers: int, durations: dict = None, min_tests_per_shard: int = 4) -> list:
+    """
+    Splits tests into at most `workers` shards of similar expected duration: longest
+    first, each onto the shard with the least work so far. Tests without a recorded
+    duration count as the median of the known ones.
+    """
+    durations = durations or {}
+    count = max(1, min(workers, len(nodeids) // max(1, min_tests_per_shard)))
+    known = sorted(durations[n] for n in nodeids if n in durations)
+    default = known[len(known) // 2] if known else 1.0
+    shards = [[] for _ in range(count)]
+    loads = [0.0] * count
+    for nodeid in sorted(nodeids, key=lambda n: durations.get(n, default), reverse=True):
+        index = loads.index(min(loads))
+        shards[index].append(nodeid)
+        loads[index] += durations.get(nodeid, default)
+    return [shard for shard in shards if shard]
+
+
+def _owner(longrepr: str, source_file: str) -> tuple:
+    """
+    Agent that should fix a failure, and the location it points at: failures raised
+    inside the code under test go to the backend agent, everything else (assertions,
+    broken fixtures) to the QA agent that wrote the tests.
+    """
+    locations = _LOCATION.findall(longrepr or "")
+    if not locations:
+        return "qa_agent", None
+    path, line = locations[-1]
+    owner = "backend_agent" if os.path.basename(path) == source_file else "qa_agent"
+    return owner, f"{os.path.basename(path)}:{line}"
+
+
+def _error_lines(longrepr: str, limit: int = 3) -> str:
+    """The 'E   ...' lines pytest uses for the actual error, or the last line."""
+    lines = [line[1:].strip() for line in (longrepr or "").splitlines() if line.startswith("E ")]
+    if not lines:
+        lines = [line.strip() for line in (longrepr or "").splitlines() if line.strip()][-1:]
+    text = " | ".join(lines[:limit])
+    return text if len(text) <= 300 else text[:297] + "..."
+
+
+def summarize(report: dict, max_failures: int = 10) -> str:
+    """Compact, line-per-failure summary meant to be handed back to an agent."""
+    counts = ", ".join(f"{report[k]} {k}" for k in ("passed", "failed", "errors", "skipped") if report[k])
+    lines = [f"{counts or 'no tests'} in {report['duration_s']}s ({report['workers']} worker(s))"]
+    for failure in report["failures"][:max_failures]:
+        location = f" ({failure['location']})" if failure["location"] else ""
+        lines.append(f"FAILED {failure['nodeid']}{location} [{failure['owner']}]: {failure['message']}")
+    if len(report["failures"]) > max_failures:
+        lines.append(f"... and {len(report['failures']) - max_failures} more failure(s)")
+    return "\n".join(lines)
+
+
+def run_tests(test_dir: str, test_file: str = "test_app.py", source_file: str = "backend.py",
+              workers: int = None, durations: dict = None, timeout_s: float = 120.0,
+              python: str = None) -> dict:
+    """
+    Runs a generated pytest suite in `test_dir` (where it imports `source_file` from),
+    sharded across worker processes.
+
+    Tests are collected once, split into shards of similar expected duration (see
+    `plan_shards`; pass the "durations" of an earlier report to balance by measured
+    times) and each shard runs in its own pytest process.
+
+    Returns:
+        A dict with the counts "passed", "failed", "errors" and "skipped", "duration_s",
+        "workers", "tests" (nodeid, outcome and duration_s of each test), "durations"
+        (nodeid -> seconds), "failures" (nodeid, owner agent, location and message) and
+        a compact "summary".
+    """
+    start_time = time.time()
+    python = python or sys.executable
+    workers = workers or int(os.getenv("TEST_WORKERS", "0")) or os.cpu_count() or 1
+    work_dir = tempfile.mkdtemp(prefix="test-run-")
+    with open(os.path.join(work_dir, f"{_PLUGIN_NAME}.py"), "w", encoding="utf-8") as f:
+        f.write(_PLUGIN)
+
+    def run_shard(index: int, args: list) -> list:
+        results_path = os.path.join(work_dir, f"shard-{index}.json")
+        try:
+            proc = _pytest(args, test_dir, work_dir, results_path, python, timeout_s)
+        except subprocess.TimeoutExpired:
+            return [{"nodeid": nodeid, "when": "call", "outcome": "failed", "duration_s": timeout_s,
+                     "longrepr": f"E   Timeout: the shard exceeded {timeout_s}s"} for nodeid in args]
+        results = _load_results(results_path)
+        if not results and proc.returncode not in (0, 5):
+            # pytest itself failed (bad arguments, crash in a plugin or conftest).
+            results = [{"nodeid": "<pytest>", "when": "collect", "outcome": "failed", "duration_s": 0.0,
+                        "longrepr": (proc.stdout + proc.stderr)[-2000:]}]
+        return results
+
+    try:
+        collect_errors = []
+        if workers == 1:
+            # Nothing to split: skip the separate collection run.
+            shards = [[test_file]]
+        else:
+            try:
+                collect = _pytest(["--collect-only", test_file], test_dir, work_dir,
+                                  os.path.join(work_dir, "collect.json"), python, timeout_s)
+                collect_errors = _load_results(os.path.join(work_dir, "collect.json"))
+                nodeids = [line.strip() for line in collect.stdout.splitlines() if "::" in line]
+            except subprocess.TimeoutExpired:
+                collect_errors = [{"nodeid": test_file, "when": "collect", "outcome": "failed", "duration_s": timeout_s,
+                                   "longrepr": f"E   Timeout: collecting tests exceeded {timeout_s}s"}]
+                nodeids = []
+            shards = plan_shards(nodeids, workers, durations) if nodeids and not collect_errors else []
+        with ThreadPoolExecutor(max_workers=max(1, len(shards))) as pool:
+            shard_results = list(pool.map(run_shard, range(len(shards)), shards))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    # --- Merge ---
+    by_test = {}
+    for entry in collect_errors + [entry for results in shard_results for entry in results]:
+        current = by_test.get(entry["nodeid"])
+        if current is None or entry["outcome"] == "failed" or (current["outcome"] == "passed" and entry["outcome"] == "skipped"):
+            outcome = entry["outcome"]
+            if outcome == "failed" and entry["when"] != "call":
+                outcome = "error"
+            by_test[entry["nodeid"]] = {**entry, "outcome": outcome}
+
+    report = {key: sum(1 for t in by_test.values() if t["outcome"] == outcome)
+              for key, outcome in (("passed", "passed"), ("failed", "failed"), ("errors", "error"),
+                                   ("skipped", "skipped"))}
+    report["duration_s"] = round(time.time() - start_time, 3)
+    report["workers"] = len(shards)
+    report["tests"] = [{"nodeid": t["nodeid"], "outcome": t["outcome"], "duration_s": t["duration_s"]}
+                       for t in by_test.values()]
+    report["durations"] = {t["nodeid"]: t["duration_s"] for t in by_test.values() if t["when"] == "call"}
+    report["failures"] = []
+    for test in by_test.values():
+        if test["outcome"] in ("failed", "error"):
+            owner, location = _owner(test["longrepr"], source_file)
+            report["failures"].append({"nodeid": test["nodeid"], "owner": owner, "location": location,
+                                       "message": _error_lines(test["longrepr"])})
+    report["summary"] = summarize(report)
+    return report
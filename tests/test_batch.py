@@ -0,0 +1,81 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+
+from batch import run_batch
+
+output_root = contextvars.ContextVar("output_root", default="output")
+
+
+class SlowThenFastGraph:
+    """First attempt hangs after starting a tool thread that writes late; later attempts finish."""
+    checkpointer = None
+
+    def __init__(self):
+        self.thread_ids = []
+        self.stale_writes = []
+
+    async def astream(self, user_input, config=None):
+        self.thread_ids.append(config["configurable"]["thread_id"])
+        path = os.path.join(output_root.get(), "backend.py")
+        if len(self.thread_ids) == 1:
+            def stale_tool():
+                time.sleep(0.5)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write("stale")
+
+            # Like a sync tool run by LangGraph: cancelling the stream does not stop the thread.
+            thread = threading.Thread(target=stale_tool)
+            thread.start()
+            self.stale_writes.append(thread)
+            await asyncio.sleep(60)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("fresh")
+        yield {"agent": {"messages": []}}
+
+
+def test_retry_after_timeout_gets_its_own_thread_and_directory(tmp_path):
+    graph = SlowThenFastGraph()
+    results = asyncio.run(run_batch(graph, output_root, [("job", "build it")], str(tmp_path), concurrency=1,
+                                    retries=1, retry_backoff_s=0.0, timeout=0.2))
+    for thread in graph.stale_writes:
+        thread.join()
+
+    [result] = results
+    assert result["status"] == "ok" and result["attempts"] == 2
+    assert len(set(graph.thread_ids)) == 2
+    assert result["output_dir"] != str(tmp_path / "job")
+    with open(os.path.join(result["output_dir"], "backend.py"), encoding="utf-8") as f:
+        assert f.read() == "fresh"
+
+
+class EchoGraph:
+    """Writes the prompt into the job's directory, failing each prompt's first attempt."""
+    checkpointer = None
+
+    def __init__(self):
+        self.attempts = {}
+
+    async def astream(self, user_input, config=None):
+        prompt = user_input["messages"][0]["content"]
+        self.attempts[prompt] = self.attempts.get(prompt, 0) + 1
+        if self.attempts[prompt] == 1:
+            raise ConnectionError("provider unavailable")
+        with open(os.path.join(output_root.get(), "prompt.txt"), "w", encoding="utf-8") as f:
+            f.write(prompt)
+        yield {"agent": {"messages": []}}
+
+
+def test_repeated_ids_get_their_own_directories(tmp_path):
+    jobs = [("job", "first"), ("job", "second"), ("job", "third")]
+    results = asyncio.run(run_batch(EchoGraph(), output_root, jobs, str(tmp_path), concurrency=2,
+                                    retries=1, retry_backoff_s=0.01))
+    assert sorted(r["id"] for r in results) == ["job", "job-2", "job-3"]
+    assert all(r["status"] == "ok" for r in results)
+    written = set()
+    for result in results:
+        with open(os.path.join(result["output_dir"], "prompt.txt"), encoding="utf-8") as f:
+            written.add(f.read())
+    assert written == {"first", "second", "third"}
@@ -0,0 +1,9 @@
+import bench_edits
+
+
+def test_edit_saves_tokens_through_the_workspace():
+    results = bench_edits.measure()
+    assert [r["file"] for r in results] == [sample for sample, _, _ in bench_edits.SCENARIOS]
+    for result in results:
+        assert result["edit_tokens"] < result["write_tokens"]
+        assert result["saved_pct"] > 50
@@ -0,0 +1,59 @@
+from build_cache import BuildCache, plan_sections
+from disk_cache import DiskCache
+
+INPUTS = {"plan": "Backend: POST /calc adds two numbers."}
+
+
+def build(cache: BuildCache, directory) -> str:
+    """Looks the backend agent up and, on a miss, "runs" it by writing backend.py."""
+    key = cache.key("backend_agent", INPUTS, str(directory))
+    summary = cache.lookup(key, str(directory))
+    if summary is None:
+        summary = "POST /calc"
+        (directory / "backend.py").write_text("app = 1\n", encoding="utf-8")
+        cache.store_result(key, summary, str(directory), ["backend.py"])
+    return summary
+
+
+def test_unchanged_inputs_hit_and_restore_missing_files(tmp_path):
+    cache = BuildCache(DiskCache(str(tmp_path / "cache.sqlite")))
+    workspace = tmp_path / "ws"
+    workspace.mkdir()
+    build(cache, workspace)
+    (workspace / "backend.py").unlink()
+
+    assert build(cache, workspace) == "POST /calc"
+    assert (workspace / "backend.py").read_text(encoding="utf-8") == "app = 1\n"
+    assert cache.stats() == {"hits": 1, "misses": 1, "restored_files": 1}
+
+
+def test_edited_files_miss(tmp_path):
+    cache = BuildCache(DiskCache(str(tmp_path / "cache.sqlite")))
+    workspace = tmp_path / "ws"
+    workspace.mkdir()
+    build(cache, workspace)
+    (workspace / "backend.py").write_text("app = 2  # edited by hand\n", encoding="utf-8")
+
+    key = cache.key("backend_agent", INPUTS, str(workspace))
+    assert cache.lookup(key, str(workspace)) is None
+    assert (workspace / "backend.py").read_text(encoding="utf-8") == "app = 2  # edited by hand\n"
+
+
+def test_entries_are_not_shared_between_workspaces(tmp_path):
+    cache = BuildCache(DiskCache(str(tmp_path / "cache.sqlite")))
+    mine, theirs = tmp_path / "mine", tmp_path / "theirs"
+    mine.mkdir()
+    theirs.mkdir()
+    build(cache, mine)
+
+    key = cache.key("backend_agent", INPUTS, str(theirs))
+    assert cache.lookup(key, str(theirs)) is None
+    assert not (theirs / "backend.py").exists()
+
+
+def test_plan_sections_split_by_heading():
+    plan = "Calculator app.\n## Backend\nPOST /calc\n## Frontend\nA form.\n## QA\npytest."
+    sections = plan_sections(plan)
+    assert sections["backend_agent"] == "Calculator app.\n## Backend\nPOST /calc"
+    assert "A form." in sections["frontend_agent"] and "POST /calc" not in sections["frontend_agent"]
+    assert plan_sections("Just build it.")["qa_agent"] == "Just build it."
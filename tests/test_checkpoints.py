@@ -0,0 +1,85 @@
+import operator
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+
+from checkpoints import CompactSqliteSaver, CompressedSerializer, resume_state
+from resume import resume
+
+
+class State(TypedDict):
+    steps: Annotated[list, operator.add]
+
+
+def build(checkpointer, fail_once: list):
+    calls = {"first": 0, "second": 0}
+
+    def first(state):
+        calls["first"] += 1
+        return {"steps": ["first"]}
+
+    def second(state):
+        calls["second"] += 1
+        if fail_once:
+            fail_once.pop()
+            raise RuntimeError("model provider down")
+        return {"steps": ["second"]}
+
+    graph = StateGraph(State)
+    graph.add_node("first", first)
+    graph.add_node("second", second)
+    graph.add_edge(START, "first")
+    graph.add_edge("first", "second")
+    graph.add_edge("second", END)
+    return graph.compile(checkpointer=checkpointer), calls
+
+
+def checkpoint_count(saver, thread_id: str) -> int:
+    return len(list(saver.list({"configurable": {"thread_id": thread_id}})))
+
+
+def test_failed_run_resumes_without_rerunning_finished_nodes(tmp_path):
+    saver = CompactSqliteSaver.open(str(tmp_path / "cp.sqlite"))
+    graph, calls = build(saver, fail_once=[True])
+    config = {"configurable": {"thread_id": "run-1"}}
+    with pytest.raises(RuntimeError):
+        list(graph.stream({"steps": []}, config=config))
+    state, resumable = resume_state(graph, "run-1")
+    assert resumable and state.next == ("second",)
+
+    list(resume(graph, "run-1"))
+    state, resumable = resume_state(graph, "run-1")
+    assert not resumable
+    assert state.values["steps"] == ["first", "second"]
+    assert calls == {"first": 1, "second": 2}
+    with pytest.raises(ValueError, match="already finished"):
+        list(resume(graph, "run-1"))
+    with pytest.raises(ValueError, match="No saved run"):
+        list(resume(graph, "run-2"))
+
+
+def test_put_keeps_the_newest_checkpoints_and_prune_drops_the_rest(tmp_path):
+    saver = CompactSqliteSaver.open(str(tmp_path / "cp.sqlite"), keep=2)
+    graph, _ = build(saver, fail_once=[])
+    for thread_id in ("run-1", "run-2"):
+        graph.invoke({"steps": []}, config={"configurable": {"thread_id": thread_id}})
+        assert checkpoint_count(saver, thread_id) == 2
+
+    saver.prune(["run-1"])
+    assert checkpoint_count(saver, "run-1") == 1
+    assert graph.get_state({"configurable": {"thread_id": "run-1"}}).values["steps"] == ["first", "second"]
+
+    saver.prune(["run-2"], strategy="delete")
+    assert checkpoint_count(saver, "run-2") == 0
+    assert [thread["thread_id"] for thread in saver.threads()] == ["run-1"]
+    assert saver.stats()["threads"] == 1
+
+
+def test_large_payloads_are_compressed():
+    serde = CompressedSerializer(min_bytes=64)
+    value = {"code": "print('hello')\n" * 200}
+    type_, data = serde.dumps_typed(value)
+    assert type_.startswith(serde.prefix) and len(data) < 500
+    assert serde.loads_typed((type_, data)) == value
+    assert not serde.dumps_typed({"x": 1})[0].startswith(serde.prefix)
@@ -0,0 +1,58 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from compaction import HistoryCompactor
+
+BIG = "x = 1\n" * 2000
+
+
+def handoff(agent: str, call_id: str) -> list:
+    name = f"transfer_to_{agent}"
+    return [AIMessage(content="", name="supervisor", tool_calls=[{"name": name, "args": {}, "id": call_id}]),
+            ToolMessage(content=f"Successfully transferred to {agent}", name=name, tool_call_id=call_id)]
+
+
+def file_write(agent: str, call_id: str) -> list:
+    return [AIMessage(content="", name=agent, tool_calls=[
+                {"name": "manage_file", "args": {"filepath": "output/backend.py", "mode": "write", "content": BIG},
+                 "id": call_id}]),
+            ToolMessage(content="Successfully performed 'write'\n" + BIG, name="manage_file", tool_call_id=call_id)]
+
+
+def history() -> list:
+    return [
+        HumanMessage(content="Build a calculator app."),
+        *handoff("planner_agent", "h1"),
+        AIMessage(content="PLAN: " + "backend does math; frontend calls it. " * 50, name="planner_agent"),
+        *handoff("backend_agent", "h2"),
+        *file_write("backend_agent", "w1"),
+        *file_write("backend_agent", "w2"),
+        AIMessage(content="BACKEND SUMMARY: POST /calc " * 40, name="backend_agent"),
+        *handoff("frontend_agent", "h3"),
+        *file_write("frontend_agent", "w3"),
+    ]
+
+
+def test_pinned_answers_and_the_current_turn_are_kept_verbatim():
+    messages = history()
+    compacted = HistoryCompactor(token_budget=100_000).compact(messages, "frontend_agent")
+    request, plan, summary = messages[0], messages[3], messages[-5]
+    assert summary.content.startswith("BACKEND SUMMARY")
+    for kept in (request, plan, summary):
+        assert kept in compacted
+    assert compacted[-2:] == messages[-2:]  # the frontend agent's own turn
+    older_write = next(m for m in compacted if getattr(m, "tool_call_id", None) == "w1")
+    assert "characters omitted from history" in older_write.content
+
+
+def test_over_budget_drops_old_units_whole_and_keeps_pinned_ones():
+    messages = history()
+    compactor = HistoryCompactor(token_budget=3000, preview_chars=2000)
+    compacted = compactor.compact(messages, "frontend_agent")
+    assert count_tokens_approximately(compacted) <= 3000 + count_tokens_approximately(messages[-2:])
+    assert messages[3] in compacted and messages[-5] in compacted  # plan and backend summary
+    call_ids = {c["id"] for m in compacted for c in getattr(m, "tool_calls", None) or []}
+    results = {m.tool_call_id for m in compacted if isinstance(m, ToolMessage)}
+    assert results <= call_ids, "a tool result without its call"
+    report = compactor.report()["frontend_agent"]
+    assert report["calls"] == 1 and report["saved_pct"] > 50
@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+
+import pytest
+
+from dep_cache import DependencyCache, dependency_key, local_platform
+
+
+def _wheels(cache, dependencies, platform=None, site=False, size=0):
+    """Caches a wheel set of `size` bytes, optionally with its site dir already installed."""
+    wheel_dir = os.path.join(cache.root, f"src-{dependency_key(dependencies, platform)}")
+    os.makedirs(os.path.join(wheel_dir, "site") if site else wheel_dir)
+    with open(os.path.join(wheel_dir, "pkg.whl"), "wb") as f:
+        f.write(b"x" * size)
+    return cache.store(dependencies, wheel_dir, 1.0, platform)
+
+
+def test_keys_depend_on_the_platform():
+    assert dependency_key(["rich"]) == dependency_key(["rich"], local_platform())
+    assert dependency_key(["rich"]) != dependency_key(["rich"], "cpython-312-linux-aarch64")
+
+
+def test_wheels_of_another_platform_are_not_offered_here(tmp_path):
+    cache = DependencyCache(root=str(tmp_path))
+    _wheels(cache, ["rich"], "cpython-312-linux-aarch64")
+    assert cache.lookup(["rich"]) is None
+    assert cache.lookup(["rich"], "cpython-312-linux-aarch64") is not None
+
+
+def test_a_slow_build_does_not_block_other_keys(tmp_path, monkeypatch):
+    cache = DependencyCache(root=str(tmp_path))
+    _wheels(cache, ["ready"], site=True)
+    building, release = threading.Event(), threading.Event()
+
+    def slow_build(dependencies):
+        building.set()
+        release.wait(10)
+        raise RuntimeError("pip wheel failed")
+
+    monkeypatch.setattr(cache, "build", slow_build)
+    worker = threading.Thread(target=lambda: pytest.raises(RuntimeError, cache.site_packages, ["slow"]))
+    worker.start()
+    try:
+        assert building.wait(5)
+        start_time = time.time()
+        site_dir, hit = cache.site_packages(["ready"])
+        assert hit and time.time() - start_time < 1
+    finally:
+        release.set()
+        worker.join()
+
+
+def test_wheels_that_do_not_install_are_rebuilt_once(tmp_path, monkeypatch):
+    cache = DependencyCache(root=str(tmp_path))
+    _wheels(cache, ["rich"])
+    builds, installs = [], []
+
+    def build(dependencies):
+        builds.append(dependencies)
+        return _wheels(cache, dependencies)
+
+    def install(dependencies, wheel_dir):
+        installs.append(wheel_dir)
+        if len(installs) == 1:
+            raise RuntimeError("pip install failed: not a supported wheel on this platform")
+        tmp_dir = os.path.join(wheel_dir, ".site-new")
+        os.makedirs(tmp_dir)
+        return tmp_dir
+
+    monkeypatch.setattr(cache, "build", build)
+    monkeypatch.setattr(cache, "_install", install)
+    site_dir, hit = cache.site_packages(["rich"])
+    assert not hit and os.path.isdir(site_dir)
+    assert len(builds) == 1 and len(installs) == 2
+
+
+def test_recorded_installs_are_capped_by_entry_count(tmp_path):
+    cache = DependencyCache(root=str(tmp_path), max_entries=3)
+    for number in range(10):
+        cache.record_install([f"pkg{number}"], 1.0, platform="sandbox")
+    assert len(cache._index) == 3
+    assert cache.saved_seconds(["pkg9"], platform="sandbox") == 1.0
+
+
+def test_leased_entries_are_not_evicted(tmp_path):
+    cache = DependencyCache(root=str(tmp_path), max_bytes=150)
+    _wheels(cache, ["in-use"], site=True, size=100)
+    with cache.lease(["in-use"]) as (site_dir, hit):
+        assert hit
+        _wheels(cache, ["newer"], site=True, size=100)
+        assert os.path.isdir(site_dir)
+    _wheels(cache, ["newest"], site=True, size=100)
+    assert not os.path.isdir(site_dir)
@@ -0,0 +1,66 @@
+import difflib
+import os
+
+import pytest
+
+from file_edits import EditError, apply_search_replace, apply_unified_diff, atomic_write, read_range
+
+ABCD = "a\nb\nc\nd\n"
+
+
+def diff(old: str, new: str, context: int = 3) -> str:
+    return "".join(difflib.unified_diff(old.splitlines(keepends=True), new.splitlines(keepends=True),
+                                        "a/x.py", "b/x.py", n=context))
+
+
+@pytest.mark.parametrize("new", ["a\nb\nc\nX\nd\n", "X\na\nb\nc\nd\n", "a\nb\nc\nd\nX\n", "a\nX\nY\nb\nc\nd\n"])
+def test_zero_context_insertions_land_after_their_line(new):
+    assert apply_unified_diff(ABCD, diff(ABCD, new, context=0)) == new
+
+
+@pytest.mark.parametrize("new", ["a\nc\nd\n", "a\nB\nc\nd\n", "a\nb\nc\nd\ne\nf\n"])
+def test_zero_context_changes_and_deletions(new):
+    assert apply_unified_diff(ABCD, diff(ABCD, new, context=0)) == new
+
+
+def test_hunks_are_found_after_the_file_drifted():
+    old = "".join(f"line {n}\n" for n in range(1, 21))
+    patch = diff(old, old.replace("line 15\n", "line fifteen\n"))
+    shifted = "header 1\nheader 2\nheader 3\n" + old
+    assert apply_unified_diff(shifted, patch) == shifted.replace("line 15\n", "line fifteen\n")
+
+
+def test_mismatched_context_is_an_error():
+    with pytest.raises(EditError):
+        apply_unified_diff(ABCD, "@@ -2,2 +2,2 @@\n b\n-x\n+y\n")
+
+
+def test_crlf_files_keep_their_line_endings():
+    text = ABCD.replace("\n", "\r\n")
+    assert apply_unified_diff(text, diff(ABCD, "a\nB\nc\nd\n")) == "a\r\nB\r\nc\r\nd\r\n"
+
+
+def test_a_missing_final_newline_stays_missing():
+    assert apply_unified_diff("a\nb", "@@ -2 +2 @@\n-b\n+B\n\\ No newline at end of file\n") == "a\nB"
+    assert apply_unified_diff("a\nb", "@@ -2,0 +3 @@\n+c\n") == "a\nb\nc"
+
+
+def test_search_replace_requires_a_unique_match():
+    assert apply_search_replace(ABCD, [{"search": "b\n", "replace": "B\n"}]) == "a\nB\nc\nd\n"
+    with pytest.raises(EditError, match="not found"):
+        apply_search_replace(ABCD, [{"search": "z", "replace": ""}])
+    with pytest.raises(EditError, match="2 times"):
+        apply_search_replace("x\nx\n", [{"search": "x", "replace": "y"}])
+
+
+def test_read_range_numbers_the_lines():
+    assert read_range(ABCD, offset=2, limit=2) == "[lines 2-3 of 4]\n2| b\n3| c"
+
+
+def test_atomic_write_replaces_the_file_without_leftovers(tmp_path):
+    path = str(tmp_path / "out" / "x.py")
+    atomic_write(path, "one\r\n")
+    atomic_write(path, "two\r\n")
+    with open(path, encoding="utf-8", newline="") as f:
+        assert f.read() == "two\r\n"
+    assert os.listdir(tmp_path / "out") == ["x.py"]
@@ -0,0 +1,66 @@
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from disk_cache import DiskCache
+from fakes import ScriptedChatModel
+from llm_cache import LLMCache
+
+
+def cached_model(tmp_path, responses=("first", "second")):
+    cache = LLMCache(DiskCache(str(tmp_path / "llm.sqlite")), name="test")
+    return ScriptedChatModel(responses=list(responses), cache=cache), cache
+
+
+def test_identical_prompt_is_a_hit(tmp_path):
+    model, cache = cached_model(tmp_path)
+    answers = [model.invoke([HumanMessage(content="hi")]).content for _ in range(2)]
+    assert answers == ["first", "first"]
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_different_messages_miss(tmp_path):
+    model, cache = cached_model(tmp_path)
+    assert model.invoke([HumanMessage(content="hi")]).content == "first"
+    assert model.invoke([HumanMessage(content="bye")]).content == "second"
+    assert cache.stats()["misses"] == 2
+
+
+def test_keyed_on_model_and_parameters(tmp_path):
+    model, cache = cached_model(tmp_path)
+    other_model = ScriptedChatModel(responses=["other"], cache=cache)
+    messages = [HumanMessage(content="hi")]
+    assert model.bind(temperature=0.1).invoke(messages).content == "first"
+    assert model.bind(temperature=0.9).invoke(messages).content == "second"
+    assert other_model.invoke(messages).content == "other"
+    assert model.bind(temperature=0.1).invoke(messages).content == "first"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3
+
+
+def test_cached_tool_calls_survive_the_round_trip(tmp_path):
+    tool_calls = [{"name": "manage_file", "args": {"filepath": "output/a.py", "mode": "read"}, "id": "call_1"}]
+    model, _ = cached_model(tmp_path, responses=[AIMessage(content="", tool_calls=tool_calls)])
+    first, second = (model.invoke([HumanMessage(content="read it")]) for _ in range(2))
+    assert second.tool_calls == first.tool_calls == [{**tool_calls[0], "type": "tool_call"}]
+
+
+def test_disk_cache_expires_entries(tmp_path):
+    store = DiskCache(str(tmp_path / "store.sqlite"), ttl_s=0.05)
+    store.set("key", "value")
+    assert store.get("key") == "value"
+    time.sleep(0.1)
+    assert store.get("key") is None
+
+
+def test_disk_cache_evicts_least_recently_read_first(tmp_path):
+    store = DiskCache(str(tmp_path / "store.sqlite"), max_bytes=25)
+    store.set("old", "x" * 10)
+    time.sleep(0.01)
+    store.set("read", "y" * 10)
+    time.sleep(0.01)
+    store.get("old")
+    time.sleep(0.01)
+    store.set("new", "z" * 10)
+    assert store.get("read") is None
+    assert store.get("old") == "x" * 10 and store.get("new") == "z" * 10
+    assert store.stats() == {"entries": 2, "bytes": 20}
@@ -0,0 +1,50 @@
+import json
+
+from loadtest import run_load_test
+
+ERRORING_APP = """
+import os
+import traceback
+
+from fastapi import FastAPI, HTTPException
+
+app = FastAPI()
+
+
+@app.get("/fail")
+def fail():
+    # A chatty failing backend: a long traceback on stderr for every request.
+    try:
+        raise ValueError("x" * 2000)
+    except ValueError:
+        traceback.print_exc()
+    raise HTTPException(status_code=500, detail="failed")
+
+
+@app.get("/env")
+def env():
+    return {"has_api_key": "GROQ_API_KEY" in os.environ}
+"""
+
+
+def test_erroring_backend_does_not_stall_the_harness(tmp_path):
+    (tmp_path / "backend.py").write_text(ERRORING_APP)
+    report = run_load_test(str(tmp_path), "GET /fail", duration_s=2.0, concurrency=4)
+    assert report["duration_s"] < 3.5
+    assert report["error_rate"] == 1.0
+    assert report["requests"] > 100
+    assert report["p95_ms"] < 1000
+    assert json.loads((tmp_path / "loadtest.json").read_text())["requests"] == report["requests"]
+
+
+def test_backend_does_not_see_host_secrets(tmp_path, monkeypatch):
+    import httpx
+    from loadtest import start_server, stop_server
+
+    monkeypatch.setenv("GROQ_API_KEY", "secret")
+    (tmp_path / "backend.py").write_text(ERRORING_APP)
+    proc, base_url, _ = start_server(str(tmp_path))
+    try:
+        assert httpx.get(f"{base_url}/env").json() == {"has_api_key": False}
+    finally:
+        stop_server(proc)
@@ -0,0 +1,35 @@
+import pytest
+
+from dep_cache import DependencyCache
+from local_executor import LocalExecutor, resource
+
+pytestmark = pytest.mark.skipif(resource is None, reason="rlimits need the resource module")
+
+
+@pytest.fixture
+def executor(tmp_path):
+    executor = LocalExecutor(DependencyCache(root=str(tmp_path / "deps")), max_workers=4, cpu_time_s=7,
+                             memory_mb=512, wall_clock_s=30)
+    yield executor
+    executor._pool.shutdown(wait=True)
+
+
+def test_jobs_run_under_the_limits(executor):
+    code = ("import resource\n"
+            "print(resource.getrlimit(resource.RLIMIT_CPU)[0], resource.getrlimit(resource.RLIMIT_AS)[0])\n")
+    futures = [executor.submit(code) for _ in range(4)]
+    for future in futures:
+        result = future.result(timeout=60)
+        assert result["exit_code"] == 0, result
+        assert result["stdout"].split() == ["7", str(512 * 1024 * 1024)]
+
+
+def test_memory_limit_stops_a_job(executor):
+    result = executor.run("import time\nblob = bytearray(1024 ** 3)\nprint('allocated')\n")
+    assert result["exit_code"] != 0
+    assert "MemoryError" in result["stderr"]
+
+
+def test_shell_commands_are_limited_too(executor):
+    result = executor.run("ulimit -t && echo ok", is_python_script=False)
+    assert result["stdout"].split() == ["7", "ok"]
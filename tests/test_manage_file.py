@@ -0,0 +1,14 @@
+from agents import manage_file, output_root
+
+
+def test_replies_name_the_path_the_agent_gave(tmp_path):
+    workspace = str(tmp_path / "workspaces" / "run-1")
+    token = output_root.set(workspace)
+    try:
+        reply = manage_file.invoke({"filepath": "output/backend.py", "mode": "write", "content": "x = 1\n"})
+        assert reply == "Successfully performed 'write' on file: output/backend.py"
+        assert manage_file.invoke({"filepath": reply.rsplit(" ", 1)[-1], "mode": "read"}) == "x = 1\n"
+        missing = manage_file.invoke({"filepath": "output/missing.py", "mode": "read"})
+        assert "'output/missing.py'" in missing and workspace not in missing
+    finally:
+        output_root.reset(token)
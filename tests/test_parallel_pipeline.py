@@ -0,0 +1,39 @@
+import time
+
+import pipeline
+from bench_parallel import AGENT_REPLIES, build_agents, compare
+from build_cache import read_manifest
+from pipeline import build_parallel_pipeline
+
+AGENT_DELAY = 0.3
+
+
+def test_frontend_and_qa_overlap(tmp_path):
+    graph = build_parallel_pipeline(**build_agents(AGENT_DELAY), output_dir=lambda: str(tmp_path),
+                                    test_stage=False)
+    start_time = time.perf_counter()
+    graph.invoke({"messages": [{"role": "user", "content": "Create a calculator app"}]})
+    elapsed = time.perf_counter() - start_time
+    # Planner, backend, then frontend and QA side by side: three agent turns, not four.
+    assert elapsed < (len(AGENT_REPLIES) - 0.5) * AGENT_DELAY
+
+
+def test_manifest_records_fixes_made_after_the_build(tmp_path, monkeypatch):
+    failing = {"failures": [{"nodeid": "test_app.py::test_add", "owner": "backend_agent"}],
+               "summary": "1 failed", "durations": {}}
+    reports = iter([failing, {"failures": [], "summary": "1 passed", "durations": {}}])
+    monkeypatch.setattr(pipeline, "run_tests", lambda *args, **kwargs: next(reports))
+    graph = build_parallel_pipeline(**build_agents(0), output_dir=lambda: str(tmp_path))
+    graph.invoke({"messages": [{"role": "user", "content": "Create a calculator app"}]})
+
+    manifest = read_manifest(str(tmp_path))
+    assert manifest["request"] == "Create a calculator app"
+    # The backend agent's scripted model repeats its reply for the fix.
+    assert manifest["changes"] == [{"agent": "backend_agent", "summary": AGENT_REPLIES["backend_agent"]}]
+
+
+def test_benchmark_runs_the_whole_supervisor_script_every_run():
+    result = compare(agent_delay=0.1, supervisor_delay=0.05, runs=2)
+    # Four agent turns and five supervisor turns; a reused script would stop after one.
+    assert result["supervisor_s"] >= 4 * 0.1 + 5 * 0.05
+    assert result["speedup"] > 1
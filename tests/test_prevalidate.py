@@ -0,0 +1,54 @@
+from prevalidate import validate_code
+
+APP = """
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+app = FastAPI()
+
+
+class Numbers(BaseModel):
+    a: float
+    b: float
+
+
+@app.post("/add")
+def add(numbers: Numbers):
+    return {"result": numbers.a + numbers.b}
+"""
+
+
+def app_errors(result: dict) -> list:
+    return [d for d in result["diagnostics"] if d["stage"] == "app" and d["severity"] == "error"]
+
+
+def test_valid_app_lists_routes():
+    result = validate_code(APP, ["fastapi"])
+    assert result["ok"], result["diagnostics"]
+    assert result["routes"] == ["POST /add"]
+
+
+def test_runtime_error_points_at_its_line():
+    result = validate_code(APP + "\nraise RuntimeError('boom')\n", ["fastapi"])
+    [error] = app_errors(result)
+    assert error["message"] == "RuntimeError: boom"
+    assert error["line"] == APP.count("\n") + 2
+
+
+def test_module_level_exit_is_reported():
+    result = validate_code(APP + "\nimport sys\nsys.exit(3)\n", ["fastapi"])
+    [error] = app_errors(result)
+    assert error["message"].startswith("SystemExit")
+
+
+def test_module_level_server_start_times_out():
+    blocking = APP + "\nimport time\ntime.sleep(60)  # stands in for uvicorn.run(app)\n"
+    result = validate_code(blocking, ["fastapi"], timeout_s=2.0)
+    [error] = app_errors(result)
+    assert "did not finish within 2.0s" in error["message"]
+    assert result["duration_s"] < 10
+
+
+def test_main_guard_does_not_run():
+    guarded = APP + "\nif __name__ == '__main__':\n    import uvicorn\n    uvicorn.run(app)\n"
+    assert validate_code(guarded, ["fastapi", "uvicorn"])["ok"]
@@ -0,0 +1,68 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import HumanMessage
+
+from fakes import ScriptedChatModel
+from rate_limit import ProviderLimiter, is_rate_limit_error
+
+running = {"now": 0, "peak": 0}
+running_lock = threading.Lock()
+
+
+class ProbeChatModel(ScriptedChatModel):
+    """Records how many calls run at once."""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        with running_lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        try:
+            return super()._generate(messages, stop, run_manager, **kwargs)
+        finally:
+            with running_lock:
+                running["now"] -= 1
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def limited_model(limiter: ProviderLimiter, delay_s: float = 0.1):
+    return ProbeChatModel(responses=["ok"], delay_s=delay_s, rate_limiter=limiter, callbacks=[limiter.callback])
+
+
+def test_in_flight_calls_stay_within_the_concurrency_limit():
+    running.update(now=0, peak=0)
+    limiter = ProviderLimiter("test", "model", rpm=6000, tpm=10_000_000, max_concurrency=2)
+    model = limited_model(limiter)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        answers = list(pool.map(lambda n: model.invoke([HumanMessage(content=f"call {n}")]).content, range(6)))
+    assert answers == ["ok"] * 6
+    assert running["peak"] == 2
+    assert limiter.stats()["in_flight"] == 0 and limiter.stats()["requests"] == 6
+
+
+def test_requests_per_minute_are_paced():
+    # 120 RPM with a 0.5s burst: one request up front, then one every 0.5s.
+    limiter = ProviderLimiter("test", "model", rpm=120, tpm=10_000_000, burst_s=0.5)
+    model = limited_model(limiter, delay_s=0.0)
+    start_time = time.monotonic()
+    for n in range(3):
+        model.invoke([HumanMessage(content=f"call {n}")])
+    assert 0.9 < time.monotonic() - start_time < 2.0
+
+
+def test_a_429_halves_the_concurrency_limit():
+    limiter = ProviderLimiter("test", "model", rpm=6000, tpm=10_000_000, max_concurrency=8)
+    assert limiter.acquire()
+    limiter.on_error(RateLimitError("Too Many Requests"))
+    stats = limiter.stats()
+    assert stats["concurrency_limit"] == 4 and stats["rate_limited"] == 1 and stats["in_flight"] == 0
+
+
+def test_rate_limit_errors_are_recognized():
+    assert is_rate_limit_error(RateLimitError())
+    assert is_rate_limit_error(Exception("Error code: 429 - rate limit reached"))
+    assert not is_rate_limit_error(ValueError("bad request"))
@@ -0,0 +1,150 @@
+import asyncio
+import contextvars
+import time
+import uuid
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk
+
+import routing
+from disk_cache import DiskCache
+from fakes import ScriptedChatModel
+from llm_cache import LLMCache
+from routing import RoutedChatModel
+
+MESSAGES = [HumanMessage(content="hi")]
+request_tag = contextvars.ContextVar("request_tag", default=None)
+seen_tags = []
+
+
+class FailingChatModel(ScriptedChatModel):
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise ConnectionError("provider unavailable")
+
+
+class StreamingChatModel(ScriptedChatModel):
+    """Streams its reply one word at a time, `delay_s` apart, and counts what it produced."""
+
+    produced: int = 0
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        for word in self.responses[0].split():
+            time.sleep(self.delay_s)
+            self.produced += 1
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+
+class ContextRecordingChatModel(ScriptedChatModel):
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        seen_tags.append(request_tag.get())
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+
+class StartRecorder(BaseCallbackHandler):
+    def __init__(self):
+        self.starts = []
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self.starts.append((run_id, parent_run_id))
+
+
+def routed(*models, **settings):
+    names = [f"{index}-{uuid.uuid4().hex}" for index in range(len(models))]
+    return RoutedChatModel(models=list(models), names=names, **{"hedge_min_s": 0.05, **settings})
+
+
+def counters() -> dict:
+    return dict(routing._counters)
+
+
+def test_fast_primary_answers_without_hedging():
+    model = routed(ScriptedChatModel(responses=["primary"], delay_s=0.01),
+                   ScriptedChatModel(responses=["fallback"]), hedge_default_s=0.5)
+    before = counters()
+    message = model.invoke(MESSAGES)
+    assert message.content == "primary"
+    assert message.response_metadata["hedged"] is False
+    assert counters()["hedges"] == before["hedges"]
+
+
+def test_stalled_primary_is_hedged_at_the_deadline():
+    model = routed(ScriptedChatModel(responses=["primary"], delay_s=2.0),
+                   ScriptedChatModel(responses=["fallback"], delay_s=0.1), hedge_default_s=0.2)
+    before = counters()
+    start_time = time.perf_counter()
+    message = model.invoke(MESSAGES)
+    elapsed = time.perf_counter() - start_time
+    assert message.content == "fallback"
+    assert message.response_metadata["routed_to"] == model.names[1]
+    assert 0.25 < elapsed < 1.0
+    assert counters()["hedge_wins"] == before["hedge_wins"] + 1
+
+
+def test_primary_still_wins_if_it_answers_first_after_a_hedge():
+    model = routed(ScriptedChatModel(responses=["primary"], delay_s=0.3),
+                   ScriptedChatModel(responses=["fallback"], delay_s=1.0), hedge_default_s=0.1)
+    before = counters()
+    message = model.invoke(MESSAGES)
+    assert message.content == "primary"
+    assert message.response_metadata["hedged"] is True
+    assert counters()["hedge_wins"] == before["hedge_wins"]
+
+
+def test_failed_primary_fails_over():
+    model = routed(FailingChatModel(responses=[""]), ScriptedChatModel(responses=["fallback"]), hedge_default_s=5)
+    before = counters()
+    assert model.invoke(MESSAGES).content == "fallback"
+    assert counters()["failovers"] == before["failovers"] + 1
+    assert routing.get_latency_stats(model.names[0]).error_rate == 1.0
+
+
+def test_unhealthy_primary_is_tried_last():
+    model = routed(FailingChatModel(responses=[""]), ScriptedChatModel(responses=["fallback"]),
+                   hedge_default_s=5, min_samples=2)
+    for _ in range(2):
+        model.invoke(MESSAGES)
+    before = counters()
+    assert model.invoke(MESSAGES).content == "fallback"
+    assert counters()["failovers"] == before["failovers"]
+
+
+def test_sync_loser_stops_streaming():
+    slow = StreamingChatModel(responses=["one two three four five six seven eight nine ten"], delay_s=0.1)
+    model = routed(slow, ScriptedChatModel(responses=["fallback"], delay_s=0.05), hedge_default_s=0.15)
+    assert model.invoke(MESSAGES).content == "fallback"
+    time.sleep(0.5)
+    assert slow.produced < 5
+
+
+def test_sync_calls_keep_context_and_parent_run():
+    model = routed(ContextRecordingChatModel(responses=["primary"]), ScriptedChatModel(responses=["fallback"]),
+                   hedge_default_s=5)
+    recorder = StartRecorder()
+    token = request_tag.set("request-1")
+    try:
+        model.invoke(MESSAGES, config={"callbacks": [recorder]})
+    finally:
+        request_tag.reset(token)
+    assert seen_tags[-1] == "request-1"
+    (router_run, _), (inner_run, inner_parent) = recorder.starts
+    assert inner_parent == router_run
+
+
+def test_async_hedge_cancels_the_loser():
+    model = routed(ScriptedChatModel(responses=["primary"], delay_s=2.0),
+                   ScriptedChatModel(responses=["fallback"], delay_s=0.1), hedge_default_s=0.2)
+    start_time = time.perf_counter()
+    message = asyncio.run(model.ainvoke(MESSAGES))
+    assert message.content == "fallback"
+    assert time.perf_counter() - start_time < 1.0
+
+
+def test_streaming_models_still_use_their_llm_cache(tmp_path):
+    cache = LLMCache(DiskCache(str(tmp_path / "llm.sqlite")))
+    fake = GenericFakeChatModel(messages=iter(["first answer", "second answer"]), cache=cache)
+    model = routed(fake, ScriptedChatModel(responses=["fallback"]), hedge_default_s=5)
+    answers = [model.invoke(MESSAGES).content for _ in range(2)]
+    assert answers == ["first answer", "first answer"]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
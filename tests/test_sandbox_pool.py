@@ -0,0 +1,60 @@
+import os
+import time
+
+import bench_sandbox
+from sandbox_pool import LocalSandboxBackend, SandboxPool
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_debug_retries_reuse_the_warm_sandbox():
+    results = bench_sandbox.measure(builds=2, retries=3, create_s=0.2)
+    assert results["hit_rate"] == 1.0 and results["misses"] == 0
+    assert results["pooled_wait_s"] < results["unpooled_wait_s"] / 4
+
+
+def test_reset_removes_what_the_last_caller_left():
+    pool = SandboxPool(LocalSandboxBackend(), min_size=0)
+    try:
+        with pool.sandbox() as entry:
+            root = entry.sandbox.root
+            entry.sandbox.files.write("/home/user/script.py", "print('hi')\n")
+            entry.sandbox.files.write("/home/user/data/secret.txt", "token")
+            entry.sandbox.files.write("/home/user/wheels/abc/pkg.whl", b"wheel")
+        assert sorted(os.listdir(root)) == ["wheels"]
+    finally:
+        pool.close()
+
+
+def test_release_after_close_closes_the_sandbox():
+    pool = SandboxPool(LocalSandboxBackend(), min_size=0)
+    entry = pool.acquire()
+    pool.close()
+    pool.release(entry)
+    assert entry.sandbox.closed
+    assert pool.stats()["idle"] == 0
+
+
+def test_dead_idle_sandboxes_are_replaced():
+    pool = SandboxPool(LocalSandboxBackend(), min_size=1, maintain_interval=0.05, health_check_interval=0.05)
+    pool.start()
+    try:
+        assert wait_for(lambda: pool.stats()["idle"] == 1)
+        with pool._cond:
+            dead = pool._idle[0]
+        # E2B ends a sandbox that outlives its lifetime; the pool must notice while it's idle.
+        LocalSandboxBackend().close(dead.sandbox)
+        assert wait_for(lambda: pool.stats()["unhealthy"] == 1 and pool.stats()["idle"] == 1)
+        entry = pool.acquire()
+        assert entry is not dead and not entry.sandbox.closed
+        pool.release(entry)
+        assert pool.stats()["misses"] == 0
+    finally:
+        pool.close()
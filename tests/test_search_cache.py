@@ -0,0 +1,52 @@
+import os
+import threading
+
+from disk_cache import DiskCache
+from fakes import FakeSearch
+from search_cache import CachedSearch, normalize_query
+
+
+def test_case_and_whitespace_do_not_matter():
+    assert normalize_query("  FastAPI   CORS\texample ") == normalize_query("fastapi cors example")
+
+
+def test_word_order_matters():
+    assert normalize_query("python to rust") != normalize_query("rust to python")
+
+
+def test_reordered_queries_each_call_the_backend(tmp_path):
+    backend = FakeSearch()
+    search = CachedSearch(backend, DiskCache(os.path.join(tmp_path, "search.sqlite"), ttl_s=3600))
+    for query in ("python to rust", "rust to python", "Python  to Rust"):
+        search.search(query)
+    assert backend.calls == 2
+
+
+class SlowStore(DiskCache):
+    """Holds the leader inside store.set() until released."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.storing, self.release = threading.Event(), threading.Event()
+
+    def set(self, key, value, ttl_s=None):
+        self.storing.set()
+        self.release.wait(5)
+        super().set(key, value, ttl_s)
+
+
+def test_a_query_arriving_while_the_result_is_stored_is_coalesced(tmp_path):
+    backend = FakeSearch()
+    store = SlowStore(os.path.join(tmp_path, "search.sqlite"))
+    search = CachedSearch(backend, store)
+    leader = threading.Thread(target=search.search, args=("fastapi cors",))
+    leader.start()
+    assert store.storing.wait(5)
+    follower = threading.Thread(target=search.search, args=("fastapi cors",))
+    follower.start()
+    follower.join(0.2)
+    store.release.set()
+    for thread in (leader, follower):
+        thread.join(5)
+    assert backend.calls == 1
+    assert search.stats()["coalesced"] == 1
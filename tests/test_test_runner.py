@@ -0,0 +1,16 @@
+from test_runner import run_tests
+
+
+def test_generated_tests_do_not_see_host_secrets(tmp_path, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "secret")
+    (tmp_path / "backend.py").write_text("VALUE = 1\n")
+    (tmp_path / "test_app.py").write_text(
+        "import os\n"
+        "from backend import VALUE\n\n"
+        "def test_no_api_keys():\n"
+        "    assert 'GROQ_API_KEY' not in os.environ\n\n"
+        "def test_backend_importable():\n"
+        "    assert VALUE == 1\n"
+    )
+    report = run_tests(str(tmp_path), workers=1)
+    assert (report["passed"], report["failed"], report["errors"]) == (2, 0, 0), report["summary"]
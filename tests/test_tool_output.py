@@ -0,0 +1,95 @@
+import os
+import time
+
+import pytest
+
+from tool_output import LogArtifacts, StreamCapture, bound_text, compact_traceback, finish_captures
+
+TRACEBACK = [
+    "Traceback (most recent call last):",
+    '  File "/home/user/script.py", line 3, in <module>',
+    "    main()",
+    '  File "/usr/lib/python3.11/site-packages/httpx/_client.py", line 10, in get',
+    "    return self.request()",
+    '  File "/usr/lib/python3.11/site-packages/httpx/_client.py", line 20, in request',
+    "    return self.send()",
+    '  File "/usr/lib/python3.11/site-packages/httpx/_transports.py", line 30, in send',
+    "    raise ConnectError(message)",
+    "httpx.ConnectError: connection refused",
+]
+
+
+def test_short_output_is_kept_whole():
+    capture = StreamCapture(head_chars=10, tail_chars=10)
+    for chunk in ("hello ", "world"):
+        capture.feed(chunk)
+    capture.close()
+    assert capture.text() == "hello world" and not capture.truncated
+
+
+def test_long_output_keeps_head_and_tail():
+    text = "".join(f"{n:04d}\n" for n in range(1000))
+    bounded = bound_text(text, head_chars=10, tail_chars=10)
+    assert bounded.startswith(text[:10]) and bounded.endswith(text[-10:])
+    assert f"{len(text) - 20:,} characters omitted" in bounded
+
+
+def test_spill_file_is_kept_only_when_output_was_cut(tmp_path):
+    short, long = (StreamCapture(10, 10, str(tmp_path / name)) for name in ("short.log", "long.log"))
+    short.feed("tiny")
+    long.feed("x" * 100)
+    result = finish_captures(short, long, "log-1")
+    assert not (tmp_path / "short.log").exists()
+    assert (tmp_path / "long.log").read_text() == "x" * 100
+    assert result["truncated"] and result["log_id"] == "log-1"
+
+
+def test_spill_file_stops_at_its_size_limit(tmp_path):
+    capture = StreamCapture(5, 5, str(tmp_path / "out.log"), max_spill_chars=50)
+    for _ in range(10):
+        capture.feed("y" * 20)
+    capture.close()
+    spilled = (tmp_path / "out.log").read_text()
+    assert spilled.startswith("y" * 50) and "log cut at the size limit" in spilled
+
+
+def test_library_frames_are_collapsed_but_the_raising_frame_is_kept():
+    text = compact_traceback(TRACEBACK)
+    assert '"/home/user/script.py", line 3' in text
+    assert "... 2 frame(s) in installed packages ..." in text
+    assert "_transports.py" in text and "raise ConnectError(message)" in text
+    assert text.endswith("httpx.ConnectError: connection refused")
+
+
+def test_chained_tracebacks_are_kept_together_even_in_the_omitted_middle():
+    first = ["Traceback (most recent call last):", '  File "/app/a.py", line 1, in f', "    x = d['k']",
+             "KeyError: 'k'", "", "During handling of the above exception, another exception occurred:", ""]
+    second = ["Traceback (most recent call last):", '  File "/app/a.py", line 3, in f',
+              "    raise ValueError('bad')", "ValueError: bad"]
+    capture = StreamCapture(head_chars=20, tail_chars=20)
+    capture.feed("noise\n" * 100 + "\n".join(first + second) + "\n" + "more noise\n" * 100)
+    result = finish_captures(StreamCapture(), capture)
+    assert result["traceback"].startswith("Traceback") and "KeyError: 'k'" in result["traceback"]
+    assert result["traceback"].endswith("ValueError: bad")
+    assert "KeyError" not in result["stderr"]
+
+
+@pytest.mark.parametrize("log_id, stream", [("../etc/passwd", "stdout"), ("log-1/../../x", "stdout"),
+                                            ("log-1", "environ")])
+def test_log_paths_are_validated(tmp_path, log_id, stream):
+    with pytest.raises(ValueError):
+        LogArtifacts(str(tmp_path)).path(log_id, stream)
+
+
+def test_gc_deletes_the_oldest_logs_first(tmp_path):
+    artifacts = LogArtifacts(str(tmp_path), max_bytes=250)
+    ids = [artifacts.new_id() + f"-{n}" for n in range(3)]
+    for age, log_id in zip((30, 20, 10), ids):
+        path = artifacts.path(log_id, "stderr")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("e" * 100)
+        os.utime(path, (time.time() - age, time.time() - age))
+    artifacts.gc()
+    with pytest.raises(FileNotFoundError):
+        artifacts.read(ids[0])
+    assert artifacts.read(ids[1]) == artifacts.read(ids[2]) == "e" * 100
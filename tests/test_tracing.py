@@ -0,0 +1,58 @@
+import json
+import re
+
+from langchain_core.runnables import RunnableLambda
+
+from fakes import ScriptedChatModel
+from tracing import DURATION_BUCKETS, Tracer
+
+
+def run_traced(tracer: Tracer, delay_s: float = 0.06, fail: bool = False):
+    model = ScriptedChatModel(responses=["hello there"], delay_s=delay_s)
+
+    def agent(text):
+        answer = model.invoke(text)
+        if fail:
+            raise ValueError("broken")
+        return answer
+
+    try:
+        RunnableLambda(agent, name="agent").invoke("hi", config={"callbacks": [tracer]})
+    except ValueError:
+        pass
+
+
+def buckets(text: str, kind: str) -> dict:
+    pattern = re.compile(r'^autodev_span_duration_seconds_bucket\{kind="%s",.*le="([^"]+)"\} (\d+)$' % kind, re.M)
+    return {le: int(count) for le, count in pattern.findall(text)}
+
+
+def test_spans_are_recorded_and_written(tmp_path):
+    tracer = Tracer(jsonl_path=str(tmp_path / "traces.jsonl"))
+    run_traced(tracer)
+    [trace_id] = tracer.trace_ids()
+    spans = tracer.trace(trace_id)
+    assert [s["kind"] for s in spans] == ["graph", "llm"]
+    assert spans[1]["completion_tokens"] > 0 and spans[1]["status"] == "ok"
+    with open(tmp_path / "traces.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line)["kind"] for line in f] == ["graph", "llm"]
+
+
+def test_duration_histogram_is_cumulative():
+    tracer = Tracer()
+    run_traced(tracer, delay_s=0.06)
+    run_traced(tracer, delay_s=0.0)
+    counts = buckets(tracer.prometheus_text(), "llm")
+    assert list(counts) == [str(b) for b in DURATION_BUCKETS] + ["+Inf"]
+    assert counts["0.01"] == 1 and counts["0.05"] == 1 and counts["0.1"] == 2 and counts["+Inf"] == 2
+    values = list(counts.values())
+    assert values == sorted(values)
+    assert 'autodev_span_duration_seconds_count{kind="llm",name="llm",agent="graph"} 2' in tracer.prometheus_text()
+
+
+def test_errors_are_counted_by_status():
+    tracer = Tracer()
+    run_traced(tracer, delay_s=0.0, fail=True)
+    text = tracer.prometheus_text()
+    assert re.search(r'^autodev_spans_total\{kind="graph",.*status="error"\} 1$', text, re.M)
+    assert re.search(r'^autodev_spans_total\{kind="llm",.*status="ok"\} 1$', text, re.M)
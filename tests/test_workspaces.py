@@ -0,0 +1,38 @@
+import os
+import shutil
+
+import pytest
+
+import workspaces
+from workspaces import ArtifactStore, Workspaces
+
+
+def _objects(store):
+    return [name for _, _, names in os.walk(os.path.join(store.root, "objects")) for name in names]
+
+
+@pytest.mark.parametrize("links", [True, False], ids=["same-filesystem", "cross-filesystem"])
+def test_gc_keeps_objects_while_a_workspace_refers_to_them(tmp_path, monkeypatch, links):
+    if not links:
+        def no_link(src, dst):
+            raise OSError(18, "Invalid cross-device link")
+
+        monkeypatch.setattr(workspaces.os, "link", no_link)
+    store = ArtifactStore(str(tmp_path / "store"))
+    spaces = Workspaces(str(tmp_path / "runs"), store)
+    first, second = spaces.create("first"), spaces.create("second")
+    for path in (first, second):
+        with open(os.path.join(path, "backend.py"), "w", encoding="utf-8") as f:
+            f.write("print('hi')\n")
+        spaces.seal(path)
+
+    spaces.gc()
+    assert len(_objects(store)) == 1
+
+    shutil.rmtree(first)
+    spaces.gc()
+    assert len(_objects(store)) == 1
+
+    shutil.rmtree(second)
+    spaces.gc()
+    assert _objects(store) == []
@@ -0,0 +1,232 @@
+import os
+import re
+import threading
+import time
+import uuid
+
+# Frames from these locations are library internals, collapsed in extracted tracebacks.
+_LIBRARY_PATH = re.compile(r"[/\\](site-packages|dist-packages|lib[/\\]python\d+(\.\d+)?)[/\\]")
+_FRAME = re.compile(r'^\s+File "([^"]+)", line \d+')
+_CHAINED = ("During handling of the above exception", "The above exception was the direct cause")
+
+
+class LogArtifacts:
+    """
+    On-disk store for full tool output that was too long to return. Each call's output
+    gets an id, with one file per stream (`<id>.stdout.log`, `<id>.stderr.log`). The
+    oldest logs are deleted once the directory exceeds `max_bytes`.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 256 * 1024 ** 2):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def new_id(self) -> str:
+        return f"log-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    def path(self, log_id: str, stream: str) -> str:
+        if not re.fullmatch(r"log-[\w-]+", log_id) or stream not in ("stdout", "stderr"):
+            raise ValueError(f"Unknown log {log_id!r} / stream {stream!r}.")
+        return os.path.join(self.root, f"{log_id}.{stream}.log")
+
+    def read(self, log_id: str, stream: str = "stderr") -> str:
+        """
+        Raises:
+            ValueError: If the id or stream is malformed.
+            FileNotFoundError: If the log does not exist (or was collected).
+        """
+        with open(self.path(log_id, stream), "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+
+    def gc(self) -> None:
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+class StreamCapture:
+    """
+    Bounded capture of one output stream, fed chunk by chunk as the process writes.
+
+    Keeps the first `head_chars` and last `tail_chars` characters in memory and
+    writes everything, up to `max_spill_chars`, to `spill_path` (if given) as it
+    arrives; `close()` deletes the spill file again unless the output was truncated.
+    Lines are scanned as they stream so the last Python traceback is kept even when
+    it falls in the omitted middle.
+    """
+
+    def __init__(self, head_chars: int = 2000, tail_chars: int = 4000, spill_path: str = None,
+                 max_spill_chars: int = 20_000_000):
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self.spill_path = spill_path
+        self.max_spill_chars = max_spill_chars
+        self.total_chars = 0
+        self._head = []
+        self._head_len = 0
+        self._tail = ""
+        self._spill = open(spill_path, "w", encoding="utf-8") if spill_path else None
+        self._partial = ""
+        self._traceback = None  # lines of the traceback being read
+        self._finished = None  # lines of the last complete one, until a chained exception can no longer follow
+        self.last_traceback = None
+        self._lock = threading.Lock()
+
+    def feed(self, chunk: str) -> None:
+        if not chunk:
+            return
+        with self._lock:
+            if self._spill:
+                room = self.max_spill_chars - self.total_chars
+                self._spill.write(chunk if len(chunk) <= room else chunk[:max(room, 0)])
+                if len(chunk) > room:
+                    self._spill.write("\n… log cut at the size limit …\n")
+                    self._spill.close()
+                    self._spill = False  # full, but keep the file
+            self.total_chars += len(chunk)
+            if self._head_len < self.head_chars:
+                part = chunk[:self.head_chars - self._head_len]
+                self._head.append(part)
+                self._head_len += len(part)
+            self._tail = (self._tail + chunk)[-self.tail_chars:] if self.tail_chars else ""
+            lines = (self._partial + chunk).split("\n")
+            self._partial = lines.pop()
+            if len(self._partial) > 10_000:  # a line without end (progress bars); not a traceback
+                self._partial = ""
+            for line in lines:
+                self._scan(line.rstrip("\r"))
+
+    def _scan(self, line: str) -> None:
+        if line.startswith("Traceback (most recent call last):"):
+            if not self._chained():
+                self._traceback = []
+            self._traceback.append(line)
+        elif self._traceback is not None:
+            if line.startswith((" ", "\t")) or line.startswith(_CHAINED) or not line.strip():
+                if len(self._traceback) < 400:
+                    self._traceback.append(line)
+            else:
+                # The first unindented line is the exception itself.
+                self._traceback.append(line)
+                self.last_traceback = compact_traceback(self._traceback)
+                self._finished, self._traceback = self._traceback, None
+        elif self._finished is not None:
+            if line.startswith(_CHAINED):
+                # "During handling of the above exception...": the next traceback continues this one.
+                self._traceback, self._finished = self._finished + ["", line], None
+            elif line.strip():
+                self._finished = None
+
+    def _chained(self) -> bool:
+        """Whether the traceback being read ends in a chained-exception line."""
+        lines = [line for line in self._traceback or [] if line.strip()]
+        return bool(lines) and lines[-1].startswith(_CHAINED)
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_chars > self.head_chars + self.tail_chars
+
+    def text(self) -> str:
+        """The whole output if it fits, otherwise head and tail around an omission marker."""
+        with self._lock:
+            head = "".join(self._head)
+            rest = self.total_chars - len(head)
+            if not self.truncated:
+                # The tail overlaps the head; only its last `rest` characters are new.
+                return head + self._tail[-rest:] if rest else head
+            omitted = self.total_chars - len(head) - len(self._tail)
+            return f"{head}\n… {omitted:,} characters omitted …\n{self._tail}"
+
+    def close(self) -> None:
+        with self._lock:
+            if self._partial:
+                self._scan(self._partial)
+                self._partial = ""
+            if self._traceback is not None:
+                self.last_traceback = compact_traceback(self._traceback)
+                self._traceback = None
+            if self._spill:
+                self._spill.close()
+            if self._spill is not None and not self.truncated:
+                os.remove(self.spill_path)
+            self._spill = None
+
+
+def compact_traceback(lines: list) -> str:
+    """
+    A traceback with library frames collapsed: frames in the user's own code and the
+    frame the exception was raised in are kept, runs of frames inside installed
+    packages become one "... N frames in installed packages" line.
+    """
+    out, collapsed = [], 0
+    index = 0
+    frames = [i for i, line in enumerate(lines) if _FRAME.match(line)]
+    last_frame = frames[-1] if frames else None
+    while index < len(lines):
+        line = lines[index]
+        match = _FRAME.match(line)
+        if match:
+            # A frame is the "File ..." line plus its indented source lines.
+            end = index + 1
+            while end < len(lines) and lines[end].startswith("    ") and not _FRAME.match(lines[end]):
+                end += 1
+            if _LIBRARY_PATH.search(match.group(1)) and index != last_frame:
+                collapsed += 1
+            else:
+                if collapsed:
+                    out.append(f"  ... {collapsed} frame(s) in installed packages ...")
+                    collapsed = 0
+                out.extend(lines[index:end])
+            index = end
+            continue
+        if collapsed:
+            out.append(f"  ... {collapsed} frame(s) in installed packages ...")
+            collapsed = 0
+        out.append(line)
+        index += 1
+    return "\n".join(out).strip()
+
+
+def finish_captures(stdout: StreamCapture, stderr: StreamCapture, log_id: str = None) -> dict:
+    """
+    Closes both captures and returns the tool-result fields: bounded "stdout" and
+    "stderr", plus "traceback" (the last one, compacted), "output_chars" and, if either
+    stream was cut, "truncated" and the "log_id" its full output is stored under.
+    """
+    stdout.close()
+    stderr.close()
+    result = {"stdout": stdout.text(), "stderr": stderr.text(),
+              "output_chars": stdout.total_chars + stderr.total_chars}
+    traceback_text = stderr.last_traceback or stdout.last_traceback
+    if traceback_text:
+        result["traceback"] = traceback_text
+    if stdout.truncated or stderr.truncated:
+        result["truncated"] = True
+        if log_id is not None:
+            result["log_id"] = log_id
+    return result
+
+
+def bound_text(text: str, head_chars: int = 2000, tail_chars: int = 4000) -> str:
+    """Head and tail of an already collected output, like StreamCapture.text()."""
+    capture = StreamCapture(head_chars, tail_chars)
+    capture.feed(text or "")
+    capture.close()
+    return capture.text()
@@ -0,0 +1,252 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.errors import GraphBubbleUp
+
+# The LLM or tool span running in the current context; see annotate_span().
+_current_span = ContextVar("current_trace_span", default=None)
+
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300)
+
+
+def annotate_span(**attributes) -> None:
+    """
+    Adds attributes (e.g. queue_s) to the LLM call or tool call running in the current
+    context. Does nothing when tracing is off.
+    """
+    span = _current_span.get()
+    if span is not None and span.get("end") is None:
+        span.update(attributes)
+
+
+def _agent_of(metadata: dict) -> str:
+    """The top-level graph node (agent) an event belongs to."""
+    metadata = metadata or {}
+    namespace = metadata.get("checkpoint_ns") or metadata.get("langgraph_checkpoint_ns") or ""
+    return namespace.split(":")[0] or metadata.get("langgraph_node") or "graph"
+
+
+class Tracer(BaseCallbackHandler):
+    """
+    Records spans for a graph run from LangChain callback events, independent of LangSmith:
+
+    - "graph": the whole run (the root chain; its run_id is the trace id)
+    - "node": every LangGraph node, including the nodes inside each agent
+    - "llm": model calls, with prompt/completion tokens and the rate limiter wait (queue_s)
+    - "tool": manage_file, run_python_code, web_search, ... (run_python_code adds queue_s)
+    - "handoff": transfer_to_* / transfer_back_to_* tool calls
+
+    Finished traces are appended to `jsonl_path` (one span per line) and the last
+    `keep_traces` are kept in memory for the UI. Aggregates are exposed in the
+    Prometheus text format by `prometheus_text()`.
+    """
+
+    run_inline = True
+
+    def __init__(self, jsonl_path: str = None, keep_traces: int = 20):
+        self.jsonl_path = jsonl_path
+        self._lock = threading.Lock()
+        self._runs = {}  # run_id -> {"trace_id", "span_id"} for every open run
+        self._open = {}  # trace_id -> spans of the running trace
+        self._traces = OrderedDict()
+        self.keep_traces = keep_traces
+        self._counters = {}
+        self._histograms = {}
+
+    # --- Span bookkeeping ---
+    def _enter(self, run_id: UUID, parent_run_id: UUID, kind: str = None, **fields):
+        with self._lock:
+            parent = self._runs.get(parent_run_id) if parent_run_id else None
+            trace_id = parent["trace_id"] if parent else str(run_id)
+            span = None
+            if kind is not None:
+                span = {
+                    "trace_id": trace_id, "span_id": str(run_id),
+                    "parent_id": parent["span_id"] if parent else None,
+                    "kind": kind, "start": time.time(), "end": None, "status": "ok", **fields,
+                }
+                self._open.setdefault(trace_id, []).append(span)
+            self._runs[run_id] = {
+                "trace_id": trace_id,
+                "span_id": str(run_id) if span else (parent["span_id"] if parent else None),
+                "span": span,
+            }
+        if span is not None and kind in ("llm", "tool", "handoff"):
+            _current_span.set(span)
+        return span
+
+    def _exit(self, run_id: UUID, error: BaseException = None, **fields):
+        # LangGraph signals handoffs and interrupts (Command(goto=...)) with GraphBubbleUp.
+        if isinstance(error, GraphBubbleUp):
+            error = None
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return None
+        span = run["span"]
+        if span is not None:
+            span.update(fields)
+            span["end"] = time.time()
+            span["duration_s"] = round(span["end"] - span["start"], 4)
+            if error is not None:
+                span["status"] = "error"
+                span["error"] = f"{type(error).__name__}: {error}"[:500]
+            self._observe(span)
+        if str(run_id) == run["trace_id"]:
+            self._finish_trace(run["trace_id"])
+        return span
+
+    def _finish_trace(self, trace_id: str) -> None:
+        with self._lock:
+            spans = self._open.pop(trace_id, [])
+            self._traces[trace_id] = spans
+            while len(self._traces) > self.keep_traces:
+                self._traces.popitem(last=False)
+        if self.jsonl_path and spans:
+            os.makedirs(os.path.dirname(self.jsonl_path) or ".", exist_ok=True)
+            with self._lock, open(self.jsonl_path, "a", encoding="utf-8") as f:
+                for span in spans:
+                    f.write(json.dumps(span, default=str) + "\n")
+
+    # --- Graph and nodes ---
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        name = kwargs.get("name") or ""
+        if parent_run_id is None:
+            self._enter(run_id, None, "graph", name=name or "graph", agent="graph")
+        elif "langgraph_node" in metadata and name == metadata["langgraph_node"]:
+            self._enter(run_id, parent_run_id, "node", name=name, agent=_agent_of(metadata),
+                        depth=len([p for p in (metadata.get("checkpoint_ns") or "").split("|") if p]))
+        else:
+            self._enter(run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._exit(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._exit(run_id, error)
+
+    # --- LLM calls ---
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or ((serialized or {}).get("kwargs") or {}).get("model") or "llm"
+        self._enter(run_id, parent_run_id, "llm", name=model, agent=_agent_of(metadata),
+                    prompt_tokens=count_tokens_approximately(messages[0]), completion_tokens=0, queue_s=0.0)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        message = getattr(response.generations[0][0], "message", None) if response.generations else None
+        usage = getattr(message, "usage_metadata", None) or {}
+        fields = {"completion_tokens": usage.get("output_tokens")
+                  or (count_tokens_approximately([message]) if message is not None else 0)}
+        if usage.get("input_tokens"):
+            fields["prompt_tokens"] = usage["input_tokens"]
+        self._exit(run_id, **fields)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._exit(run_id, error)
+
+    # --- Tools and handoffs ---
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        kind = "handoff" if name.startswith("transfer_") else "tool"
+        self._enter(run_id, parent_run_id, kind, name=name, agent=_agent_of(metadata))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._exit(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._exit(run_id, error)
+
+    # --- Reading traces ---
+    def trace(self, trace_id) -> list:
+        """Spans of a finished (or still running) trace, in start order."""
+        with self._lock:
+            spans = self._traces.get(str(trace_id)) or self._open.get(str(trace_id)) or []
+            return sorted((dict(s) for s in spans), key=lambda s: s["start"])
+
+    def trace_ids(self) -> list:
+        with self._lock:
+            return list(self._traces)
+
+    # --- Metrics ---
+    def _observe(self, span: dict) -> None:
+        labels = (("kind", span["kind"]), ("name", span["name"]), ("agent", span["agent"]))
+        with self._lock:
+            self._count("autodev_spans_total", labels + (("status", span["status"]),))
+            histogram = self._histograms.setdefault(labels, {"buckets": [0] * len(DURATION_BUCKETS), "sum": 0.0, "count": 0})
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if span["duration_s"] <= bound:
+                    histogram["buckets"][index] += 1
+            histogram["sum"] += span["duration_s"]
+            histogram["count"] += 1
+            if span.get("queue_s"):
+                self._count("autodev_queue_wait_seconds_total", (("kind", span["kind"]), ("agent", span["agent"])),
+                            span["queue_s"])
+            if span["kind"] == "llm":
+                agent = (("agent", span["agent"]), ("model", span["name"]))
+                self._count("autodev_llm_tokens_total", agent + (("direction", "prompt"),), span["prompt_tokens"])
+                self._count("autodev_llm_tokens_total", agent + (("direction", "completion"),), span["completion_tokens"])
+
+    def _count(self, metric: str, labels: tuple, amount: float = 1) -> None:
+        key = (metric, labels)
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def prometheus_text(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        def fmt(labels) -> str:
+            escaped = ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                               for k, v in labels)
+            return "{" + escaped + "}" if escaped else ""
+
+        lines = [
+            "# HELP autodev_span_duration_seconds Duration of graph nodes, LLM calls, tool calls and handoffs.",
+            "# TYPE autodev_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            for labels, histogram in sorted(self._histograms.items()):
+                for bound, count in zip(DURATION_BUCKETS, histogram["buckets"]):
+                    lines.append(f"autodev_span_duration_seconds_bucket{fmt(labels + (('le', bound),))} {count}")
+                lines.append(f"autodev_span_duration_seconds_bucket{fmt(labels + (('le', '+Inf'),))} {histogram['count']}")
+                lines.append(f"autodev_span_duration_seconds_sum{fmt(labels)} {round(histogram['sum'], 6)}")
+                lines.append(f"autodev_span_duration_seconds_count{fmt(labels)} {histogram['count']}")
+            for metric, help_text in (
+                ("autodev_spans_total", "Finished spans by status."),
+                ("autodev_llm_tokens_total", "Prompt and completion tokens (approximate unless the provider reports usage)."),
+                ("autodev_queue_wait_seconds_total", "Time spent waiting for a rate limiter slot or sandbox."),
+            ):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                for (name, labels), value in sorted(self._counters.items()):
+                    if name == metric:
+                        lines.append(f"{metric}{fmt(labels)} {round(value, 6)}")
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(tracer: Tracer, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serves `tracer.prometheus_text()` at http://host:port/metrics from a daemon thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = tracer.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
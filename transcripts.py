@@ -0,0 +1,60 @@
+import json
+import os
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+
+def _is_handoff_back(message: AIMessage) -> bool:
+    """The 'Transferring back to supervisor' messages langgraph_supervisor adds itself."""
+    return bool(message.tool_calls) and all(c["name"].startswith("transfer_back_to_") for c in message.tool_calls)
+
+
+def transcript_from_messages(messages: list) -> dict:
+    """
+    Records a supervisor run's final message history as a transcript: the user prompt
+    plus every model reply in order, tagged with the agent that produced it. Tool
+    results are not recorded; a replay runs the tools again.
+
+    Record in supervisor mode: the parallel pipeline keeps only each agent's last reply
+    in the graph state.
+    """
+    prompt = next((_text(m.content) for m in messages if isinstance(m, HumanMessage)), "")
+    turns = []
+    for message in messages:
+        if not isinstance(message, AIMessage) or not message.name or _is_handoff_back(message):
+            continue
+        turns.append({
+            "agent": message.name,
+            "content": _text(message.content),
+            "tool_calls": [{"name": c["name"], "args": c["args"]} for c in message.tool_calls],
+        })
+    return {"prompt": prompt, "turns": turns}
+
+
+def save_transcript(path: str, transcript: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(transcript, f, indent=2)
+
+
+def load_transcript(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def scripts_by_agent(transcript: dict) -> dict:
+    """Each agent's replies in order, as AIMessages for ScriptedChatModel."""
+    scripts = {}
+    for number, turn in enumerate(transcript["turns"]):
+        tool_calls = [
+            {"name": call["name"], "args": call["args"], "id": f"call_{number}_{index}"}
+            for index, call in enumerate(turn.get("tool_calls", []))
+        ]
+        scripts.setdefault(turn["agent"], []).append(AIMessage(content=turn.get("content", ""), tool_calls=tool_calls))
+    return scripts
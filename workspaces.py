@@ -0,0 +1,269 @@
+"""
+Per-run workspaces: every build writes its files into its own directory, so concurrent
+sessions never see each other's files. Agents keep using 'output/...' paths, which
+resolve_in_workspace maps into the run's workspace (and refuses to let out of it).
+
+Finished workspaces are sealed into a content-addressed ArtifactStore: identical files
+of different runs (an unchanged backend.py after a "make the buttons red" change, say)
+become hard links to one stored copy. Workspaces.gc() applies the retention policy.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from file_edits import atomic_write
+
+INDEX = ".artifacts.json"
+
+
+class WorkspaceError(ValueError):
+    """A path that points outside the run's workspace."""
+
+
+def resolve_in_workspace(root: str, filepath: str, alias: str = "output") -> str:
+    """
+    Maps a path an agent gave onto the workspace `root`. 'output/x' (the `alias`) and
+    relative paths land inside `root`; absolute paths are only accepted if they already
+    point inside it.
+
+    Raises:
+        WorkspaceError: If the path escapes `root`, e.g. with '..' or through a symlink.
+    """
+    normalized = os.path.normpath(filepath)
+    if normalized == alias or normalized.startswith(alias + os.sep):
+        normalized = os.path.relpath(normalized, alias)
+    path = normalized if os.path.isabs(normalized) else os.path.normpath(os.path.join(root, normalized))
+    real_root, real_path = os.path.realpath(root), os.path.realpath(path)
+    if real_path != real_root and not real_path.startswith(real_root + os.sep):
+        raise WorkspaceError(f"'{filepath}' is outside this run's workspace. Use a path under 'output/'.")
+    return path
+
+
+def detach(path: str) -> None:
+    """
+    Gives a hard-linked file its own copy before it is changed in place (appending),
+    so the stored artifact other runs link to stays intact. Files replaced with
+    atomic_write need no detaching: the rename already breaks the link.
+    """
+    try:
+        if os.stat(path).st_nlink <= 1:
+            return
+    except FileNotFoundError:
+        return
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f".{os.path.basename(path)}.")
+    os.close(fd)
+    shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class ArtifactStore:
+    """
+    Content-addressed file store: `objects/<sha256[:2]>/<sha256>`. Files are added by
+    hard-linking them to their object, so each distinct content is on disk once however
+    many runs produced it. Across filesystems, where links fail, the object is a copy and
+    only the workspace indexes refer to it, which is why gc() is given their digests.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def put(self, path: str) -> str:
+        """Stores the file at `path`, replaces it with a link to the stored copy and returns its digest."""
+        digest = _digest(path)
+        target = self.object_path(digest)
+        with self._lock:
+            if not os.path.exists(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                try:
+                    os.link(path, target)
+                    return digest
+                except OSError:
+                    tmp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+                    shutil.copyfile(path, tmp_path)
+                    os.replace(tmp_path, target)
+            if os.path.samefile(path, target):
+                return digest
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            try:
+                os.link(target, tmp_path)
+                os.replace(tmp_path, path)
+            except OSError:
+                pass  # different filesystem: keep the file as it is
+        return digest
+
+    def gc(self, referenced: set) -> int:
+        """
+        Deletes objects that no workspace links to and whose digest is not in
+        `referenced` (the digests the workspace indexes list). Returns the bytes freed.
+        """
+        freed = 0
+        with self._lock:
+            for directory, _, names in os.walk(os.path.join(self.root, "objects")):
+                for name in names:
+                    path = os.path.join(directory, name)
+                    stat = os.stat(path)
+                    if stat.st_nlink == 1 and name not in referenced:
+                        os.remove(path)
+                        freed += stat.st_size
+        return freed
+
+
+class Workspaces:
+    """
+    Creates, seals and garbage-collects per-run workspaces under `root`.
+
+    Retention: the `keep_runs` most recently used workspaces are kept unless they are
+    older than `max_age_s`; beyond that, the least recently used ones are deleted until
+    workspaces and stored artifacts together fit in `max_bytes`. Workspaces leased by a
+    running build are never deleted.
+    """
+
+    def __init__(self, root: str, store: ArtifactStore = None, keep_runs: int = 50,
+                 max_age_s: float = 7 * 24 * 3600, max_bytes: int = None):
+        self.root = root
+        self.store = store
+        self.keep_runs = keep_runs
+        self.max_age_s = max_age_s
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._active = {}  # workspace path -> number of leases
+        self._lock = threading.Lock()
+        self._seal_lock = threading.Lock()  # an index being written is not readable by gc yet
+
+    def create(self, run_id: str = None) -> str:
+        """Makes an empty workspace and returns its path."""
+        run_id = run_id or f"run-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(self.root, run_id)
+        os.makedirs(path)
+        return path
+
+    def touch(self, path: str) -> None:
+        """Marks a workspace as used now, for retention."""
+        os.utime(path)
+
+    @contextmanager
+    def lease(self, path: str):
+        """Keeps gc() away from a workspace while a build writes into it."""
+        with self._lock:
+            self._active[path] = self._active.get(path, 0) + 1
+        try:
+            yield path
+        finally:
+            with self._lock:
+                self._active[path] -= 1
+                if not self._active[path]:
+                    del self._active[path]
+            self.touch(path)
+
+    def seal(self, path: str) -> dict:
+        """
+        Moves a finished workspace's files into the artifact store (if there is one) and
+        records their digests in `<workspace>/.artifacts.json`.
+
+        Returns:
+            The index: file path relative to the workspace -> sha256.
+        """
+        with self._seal_lock:
+            return self._seal(path)
+
+    def _seal(self, path: str) -> dict:
+        index = {}
+        for directory, dirnames, names in os.walk(path):
+            dirnames[:] = [d for d in dirnames if d != "__pycache__" and not d.startswith(".")]
+            for name in names:
+                if name == INDEX or name.endswith(".tmp"):
+                    continue
+                file_path = os.path.join(directory, name)
+                if os.path.islink(file_path):
+                    continue
+                relative = os.path.relpath(file_path, path).replace(os.sep, "/")
+                index[relative] = self.store.put(file_path) if self.store else _digest(file_path)
+        atomic_write(os.path.join(path, INDEX), json.dumps(index, indent=2, sort_keys=True))
+        self.touch(path)
+        return index
+
+    def _referenced(self) -> set:
+        """Digests listed in the index of any workspace."""
+        digests = set()
+        for _, path in self._workspaces():
+            try:
+                with open(os.path.join(path, INDEX), "r", encoding="utf-8") as f:
+                    digests.update(json.load(f).values())
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+        return digests
+
+    def _gc_store(self) -> None:
+        with self._seal_lock:
+            self.store.gc(self._referenced())
+
+    def _workspaces(self) -> list:
+        """(last used, path) of every workspace, most recently used first."""
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if os.path.isdir(path):
+                entries.append((os.stat(path).st_mtime, path))
+        return sorted(entries, reverse=True)
+
+    def disk_usage(self) -> int:
+        """Bytes used by workspaces and the store, counting hard-linked files once."""
+        seen, total = set(), 0
+        roots = [self.root] + ([self.store.root] if self.store else [])
+        for root in roots:
+            for directory, _, names in os.walk(root):
+                for name in names:
+                    try:
+                        stat = os.lstat(os.path.join(directory, name))
+                    except FileNotFoundError:
+                        continue
+                    if (stat.st_dev, stat.st_ino) not in seen:
+                        seen.add((stat.st_dev, stat.st_ino))
+                        total += stat.st_size
+        return total
+
+    def gc(self) -> dict:
+        """Applies the retention policy. Returns how many workspaces were removed and the bytes freed."""
+        before = self.disk_usage()
+        now = time.time()
+        with self._lock:
+            active = set(self._active)
+        removed = 0
+        remaining = []
+        for rank, (last_used, path) in enumerate(self._workspaces()):
+            if path not in active and (rank >= self.keep_runs or now - last_used > self.max_age_s):
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+            else:
+                remaining.append(path)
+        if self.max_bytes is not None:
+            for path in reversed(remaining):
+                if self.disk_usage() <= self.max_bytes:
+                    break
+                if path not in active:
+                    shutil.rmtree(path, ignore_errors=True)
+                    if self.store:
+                        self._gc_store()
+                    removed += 1
+        if self.store:
+            self._gc_store()
+        return {"workspaces_removed": removed, "bytes_freed": before - self.disk_usage()}